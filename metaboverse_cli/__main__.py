@@ -28,6 +28,7 @@ SOFTWARE.
 
 """
 from __future__ import print_function
+import multiprocessing
 import argparse
 import certifi
 import sklearn
@@ -35,7 +36,6 @@ import networkx
 import scipy
 import numpy
 import pandas
-import requests
 import pickle
 import sys
 import os
@@ -49,11 +49,14 @@ try:
     from arguments import parse_arguments
     from curate.__main__ import __main__ as curate
     from analyze.__main__ import __main__ as analyze
+    from analyze.__main__ import __batch__ as analyze_batch
     from mapper.__main__ import __main__ as mapper
     from target.__main__ import __main__ as curate_target
+    from prebuild.__main__ import __main__ as prebuild
     from utils import progress_feed, update_session, \
         safestr, get_metaboverse_cli_version, init_mvrs_file, \
-        update_network_vars, update_session_vars
+        update_network_vars, update_session_vars, get_source_url, \
+        get_source_status
 except:
     import importlib.util
     spec = importlib.util.spec_from_file_location(
@@ -78,6 +81,7 @@ except:
         "__main__", os.path.abspath(os.path.join(".", "metaboverse_cli", "analyze/__main__.py")))
     analyze = importlib.util.module_from_spec(spec)
     spec.loader.exec_module(analyze)
+    analyze_batch = analyze.__batch__
     analyze = analyze.__main__
 
     spec = importlib.util.spec_from_file_location(
@@ -92,6 +96,12 @@ except:
     spec.loader.exec_module(target)
     curate_target = target.__main__
 
+    spec = importlib.util.spec_from_file_location(
+        "__main__", os.path.abspath(os.path.join(".", "metaboverse_cli", "prebuild/__main__.py")))
+    prebuild = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(prebuild)
+    prebuild = prebuild.__main__
+
     spec = importlib.util.spec_from_file_location(
         "", os.path.abspath(os.path.join(".", "metaboverse_cli", "utils.py")))
     utils = importlib.util.module_from_spec(spec)
@@ -103,6 +113,8 @@ except:
     init_mvrs_file = utils.init_mvrs_file
     update_network_vars = utils.update_network_vars
     update_session_vars = utils.update_session_vars
+    get_source_url = utils.get_source_url
+    get_source_status = utils.get_source_status
 
 
 # Set globals
@@ -137,10 +149,21 @@ def main(
         __version__)
     progress_feed(args_dict, "graph", 2)
 
+    # Build a local mirror of pre-built source files
+    if args_dict['cmd'] == 'prebuild':
+        print('Pre-building organism source files...')
+        prebuild(args_dict)
+        return
+
+    # Outputs with a matching provenance manifest are returned as they are,
+    # unless the user asks for new ones (force_new_curation is also set below
+    # when the source archive is unreachable)
+    args_dict['reuse_outputs'] = args_dict['force_new_curation'] != True
+
     # Get info on archived database versions available for direct download
     this_version = get_metaboverse_cli_version()
     reference_url = (
-        SOURCE_URL
+        get_source_url(args_dict, SOURCE_URL)
         + 'v' + this_version + '/'
         + CURATION_DIR + '/'
         + args_dict['organism_id'] + '.mvdb')
@@ -148,14 +171,14 @@ def main(
     # If unable to access pre-curated network, force new curation
     if args_dict['force_new_curation'] != True:
         try:
-            url_response = requests.head(reference_url)
+            url_response = get_source_status(reference_url)
         except:
             print("Unable to access source files from: " + str(reference_url))
             print("Will force a new curation of source files instead...")
             args_dict['force_new_curation'] = True
-            url_response = ''
+            url_response = 404
     else:
-        url_response = ''
+        url_response = 404
         
     if args_dict['cmd'] == 'metaboliteMapper':
         print('Generating metabolite mapper...')
@@ -191,7 +214,7 @@ def main(
         # MVDB file exists in repo
         elif (args_dict['force_new_curation'] == False \
         or args_dict['force_new_curation'] == "False") \
-        and url_response.status_code != 404 and url_response.status_code != 10054:
+        and url_response != 404 and url_response != 10054:
             try:
                 file = get_reference(
                     args_dict=args_dict,
@@ -224,7 +247,12 @@ def main(
 
         # Curate data overlaid on organism network
         print('Curating data onto the network model...')
-        if args_dict['cmd'] == 'curate':
+        if args_dict['cmd'] == 'curate' \
+        and 'batch' in args_dict \
+        and safestr(args_dict['batch']) != 'None' \
+        and safestr(args_dict['batch']) != None:
+            analyze_batch(args_dict)
+        elif args_dict['cmd'] == 'curate':
             args_dict['output_file'] = analyze(args_dict)
         elif args_dict['cmd'] == 'electrum':
             curate_target(args_dict)
@@ -243,4 +271,5 @@ def main(
 if __name__ == '__main__':
     """Run main
     """
+    multiprocessing.freeze_support()
     sys.exit(main() or 0)
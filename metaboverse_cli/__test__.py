@@ -28,6 +28,8 @@ SOFTWARE.
 
 """
 from __future__ import print_function
+import tempfile
+import shutil
 import os
 import sys
 import json
@@ -42,7 +44,14 @@ try:
         check_files, \
         check_curate, \
         argument_checks, \
-        get_session_value
+        get_session_value, \
+        run_forked, \
+        get_source_url, \
+        get_source_status, \
+        hash_file, \
+        make_provenance, \
+        read_provenance, \
+        write_provenance
 except:
     from utils import update_session, \
         progress_feed, \
@@ -50,7 +59,14 @@ except:
         check_files, \
         check_curate, \
         argument_checks, \
-        get_session_value
+        get_session_value, \
+        run_forked, \
+        get_source_url, \
+        get_source_status, \
+        hash_file, \
+        make_provenance, \
+        read_provenance, \
+        write_provenance
 
 # update_session()
 session_file = os.path.abspath(os.path.join(
@@ -205,4 +221,88 @@ val3 = get_session_value(
     key="database_url")
 assert val3 == "unknown", 'get_session_value() failed'
 
+# run_forked()
+def square_shard(values, offset):
+    return [x * x + offset for x in values]
+
+shard_arguments = [([1, 2], 0), ([3], 1), ([], 2), ([4, 5], 3)]
+assert run_forked(square_shard, shard_arguments, max_workers=2) \
+    == [[1, 4], [10], [], [19, 28]], 'run_forked() failed'
+assert run_forked(square_shard, shard_arguments, max_workers=1) \
+    == [[1, 4], [10], [], [19, 28]], 'run_forked() failed'
+
+def failing_shard(value):
+    if value == 1:
+        raise ValueError('bad shard')
+    return value
+
+try:
+    run_forked(failing_shard, [(0,), (1,)], max_workers=2)
+    raise AssertionError('run_forked() failed')
+except Exception as e:
+    assert 'bad shard' in str(e), 'run_forked() failed'
+
+# get_source_url()
+default_url = 'https://example.org/source/'
+assert get_source_url({}, default_url) == default_url, \
+    'get_source_url() failed'
+assert get_source_url({'source_url': 'None'}, default_url) == default_url, \
+    'get_source_url() failed'
+assert get_source_url(
+    {'source_url': 'https://mirror.org/source'}, default_url) \
+    == 'https://mirror.org/source/', 'get_source_url() failed'
+mirror_dir = os.path.abspath(os.path.join(
+    ".", "metaboverse_cli", "test"))
+mirror_url = get_source_url({'source_url': mirror_dir}, default_url)
+assert mirror_url.startswith('file:') and mirror_url.endswith('/'), \
+    'get_source_url() failed'
+
+# get_source_status()
+assert get_source_status(mirror_url + 'session_data.json') == 200, \
+    'get_source_status() failed'
+assert get_source_status(mirror_url + 'missing_file.mvrs') == 404, \
+    'get_source_status() failed'
+
+# hash_file()
+provenance_dir = tempfile.mkdtemp()
+input_file = os.path.join(provenance_dir, 'data.txt')
+output_file = os.path.join(provenance_dir, 'output.mvrs')
+with open(input_file, 'w') as f:
+    f.write('gene\t0\nA\t1\n')
+assert hash_file(input_file) == hash_file(input_file), 'hash_file() failed'
+assert hash_file(input_file) != hash_file(os.path.abspath(__file__)), \
+    'hash_file() failed'
+assert hash_file('None') == None, 'hash_file() failed'
+
+# make_provenance() / write_provenance() / read_provenance()
+provenance = make_provenance(
+    inputs={'transcriptomics': input_file, 'proteomics': 'None'},
+    settings={'collapse_threshold': 0.3, 'blocklist': ['H+']})
+assert provenance['inputs']['proteomics'] == None, 'make_provenance() failed'
+assert read_provenance(output_file, provenance) == (False, None), \
+    'read_provenance() failed'
+with open(output_file, 'w') as f:
+    f.write('{}')
+write_provenance(output_file, provenance, arguments={'organism_id': 'HSA'})
+found, manifest = read_provenance(output_file, provenance)
+assert found == True and manifest['arguments'] == {'organism_id': 'HSA'}, \
+    'read_provenance() failed'
+changed = make_provenance(
+    inputs={'transcriptomics': input_file, 'proteomics': 'None'},
+    settings={'collapse_threshold': 0.5, 'blocklist': ['H+']})
+assert read_provenance(output_file, changed) == (False, None), \
+    'read_provenance() failed'
+with open(input_file, 'a') as f:
+    f.write('B\t2\n')
+changed = make_provenance(
+    inputs={'transcriptomics': input_file, 'proteomics': 'None'},
+    settings={'collapse_threshold': 0.3, 'blocklist': ['H+']})
+assert read_provenance(output_file, changed) == (False, None), \
+    'read_provenance() failed'
+with open(output_file, 'w') as f:
+    f.write('{"edited": true}')
+assert read_provenance(output_file, provenance) == (False, None), \
+    'read_provenance() failed'
+shutil.rmtree(provenance_dir)
+
 print('Tests completed')
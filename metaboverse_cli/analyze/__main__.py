@@ -30,9 +30,11 @@ SOFTWARE.
 from __future__ import print_function
 import networkx as nx
 import pandas as pd
+import numpy as np
+from scipy import sparse
 from datetime import date
-import requests
 import json
+import copy
 import os
 
 """Import internal dependencies
@@ -40,13 +42,21 @@ import os
 try:
     from analyze.prepare_data import __main__ as prepare_data
     from analyze.model import __template__
+    from analyze.model import name_graph
     from analyze.model import __model__
+    from analyze.model import map_data
     from analyze.model import load_references
     from analyze.model import load_metabolite_synonym_dictionary
-    from analyze.utils import remove_defective_reactions
-    from utils import progress_feed, track_progress, read_network, \
+    from analyze.model import get_degree_threshold
+    from analyze.model import compile_node_degrees
+    from analyze.utils import remove_defective_reactions, \
+                              read_mapping_cache, write_mapping_cache, \
+                              get_index_dtype, decode_node_link
+    from utils import progress_feed, read_network, \
                       get_metaboverse_cli_version, write_database, safestr, \
-                      update_session_vars
+                      update_session_vars, get_source_url, get_source_status, \
+                      run_forked, can_fork, hash_file, make_provenance, \
+                      read_provenance, write_provenance, reuse_outputs
 except:
     import importlib.util
     spec = importlib.util.spec_from_file_location(
@@ -60,9 +70,13 @@ except:
     model = importlib.util.module_from_spec(spec)
     spec.loader.exec_module(model)
     __template__ = model.__template__
+    name_graph = model.name_graph
     __model__ = model.__model__
+    map_data = model.map_data
     load_references = model.load_references
     load_metabolite_synonym_dictionary = model.load_metabolite_synonym_dictionary
+    get_degree_threshold = model.get_degree_threshold
+    compile_node_degrees = model.compile_node_degrees
 
     module_path = os.path.abspath(
         os.path.join(".", "metaboverse_cli", "analyze", "utils.py"
@@ -71,23 +85,43 @@ except:
     analyze_utils = importlib.util.module_from_spec(spec)
     spec.loader.exec_module(analyze_utils)
     remove_defective_reactions = analyze_utils.remove_defective_reactions
+    read_mapping_cache = analyze_utils.read_mapping_cache
+    write_mapping_cache = analyze_utils.write_mapping_cache
+    get_index_dtype = analyze_utils.get_index_dtype
+    decode_node_link = analyze_utils.decode_node_link
 
     spec = importlib.util.spec_from_file_location(
         "", os.path.abspath("./metaboverse_cli/utils.py"))
     utils = importlib.util.module_from_spec(spec)
     spec.loader.exec_module(utils)
     progress_feed = utils.progress_feed
-    track_progress = utils.track_progress
     read_network = utils.read_network
     get_metaboverse_cli_version = utils.get_metaboverse_cli_version
     write_database = utils.write_database
     safestr = utils.safestr
     update_session_vars = utils.update_session_vars
+    get_source_url = utils.get_source_url
+    get_source_status = utils.get_source_status
+    run_forked = utils.run_forked
+    can_fork = utils.can_fork
+    hash_file = utils.hash_file
+    make_provenance = utils.make_provenance
+    read_provenance = utils.read_provenance
+    write_provenance = utils.write_provenance
+    reuse_outputs = utils.reuse_outputs
 
 
 SOURCE_URL='https://rutter.chpc.utah.edu/Metaboverse/source/'
 NEIGHBOR_DIR='nbdb'
 TEMPLATE_DIR='mvrs'
+DATA_COLUMNS=['transcriptomics', 'proteomics', 'metabolomics']
+MANIFEST_COLUMNS=DATA_COLUMNS + [
+    'labels', 'experiment_name', 'experiment_type', 'output_file']
+MODEL_SETTINGS=[
+    'organism_id', 'database_source', 'labels', 'experiment_name',
+    'experiment_type', 'blocklist', 'collapse_threshold',
+    'collapse_with_modifiers', 'broadcast_genes', 'broadcast_metabolites',
+    'precision']
 
 
 def process_data(
@@ -95,6 +129,11 @@ def process_data(
         args_dict):
     """
     """
+    precision = 'float64'
+    if 'precision' in args_dict \
+            and args_dict['precision'] != None:
+        precision = args_dict['precision']
+
     if str(args_dict['transcriptomics']).lower() != 'none' \
             or str(args_dict['proteomics']).lower() != 'none' \
             or str(args_dict['metabolomics']).lower() != 'none':
@@ -104,7 +143,8 @@ def process_data(
             transcriptomics_url=args_dict['transcriptomics'],
             proteomics_url=args_dict['proteomics'],
             metabolomics_url=args_dict['metabolomics'],
-            database_source=args_dict['database_source'])
+            database_source=args_dict['database_source'],
+            precision=precision)
         flag_data = False
 
     else:
@@ -149,6 +189,8 @@ def read_template(
 
     with open(file) as graph_template:
         graph_data = json.load(graph_template)
+    # Templates may store categorical attributes as integer codes
+    graph_data = decode_node_link(graph_data)
 
     graph = nx.readwrite.json_graph.node_link_graph(
         {
@@ -215,52 +257,112 @@ def download_neighbors_dictionary(
     return neighbors_dictionary
 
 
+def filter_hub_neighbors(
+        neighbors,
+        reaction_list,
+        reaction_dictionary,
+        hubs):
+    """Drop neighbors that collapse could only match through a hub
+    - Keeps neighbors sharing a non-hub reactant or product, or with a
+    reactant or product list identical to an all-hub side of the reaction
+    """
+
+    species = {}
+    sides = {}
+    shared_rows = []
+    shared_columns = []
+    side_rows = []
+    side_columns = []
+    for x, reaction in enumerate(reaction_list):
+        for side_key in ['reactants', 'products']:
+            side = reaction_dictionary[reaction][side_key]
+            for y in side:
+                if y not in hubs:
+                    shared_rows.append(x)
+                    shared_columns.append(species.setdefault(y, len(species)))
+            if all(y in hubs for y in side):
+                side_rows.append(x)
+                side_columns.append(sides.setdefault(tuple(side), len(sides)))
+
+    shared = sparse.csr_matrix(
+        (np.ones(len(shared_rows), dtype=np.int32),
+         (shared_rows, shared_columns)),
+        shape=(len(reaction_list), max(1, len(species))))
+    matched = sparse.csr_matrix(
+        (np.ones(len(side_rows), dtype=np.int32),
+         (side_rows, side_columns)),
+        shape=(len(reaction_list), max(1, len(sides))))
+    keep = shared @ shared.T + matched @ matched.T
+
+    filtered = sparse.csr_matrix(neighbors.multiply(keep))
+    filtered.eliminate_zeros()
+    filtered.sort_indices()
+
+    return filtered
+
+
 def make_neighbors_dictionary(
         args_dict,
         graph,
         reaction_dictionary):
-    """
+    """Two reactions are neighbors if they share a component
+    - Computed as one sparse product of the reaction-component incidence
+    matrix with its transpose
+    - Neighbors are stored as CSR arrays over the list of reactions
     """
     reaction_ids = set(reaction_dictionary.keys())
 
     print('Generating Metaboverse neighbors dictionary for organism...')
 
-    counter = 0
-    edges = list(graph.edges)
-    edge_len = len(edges)
-    neighbors_dictionary = {}
-    for e in edges:
-        one = e[0]
-        two = e[1]
-        if one in neighbors_dictionary.keys():
-            neighbors_dictionary[one].add(two)
-        else:
-            neighbors_dictionary[one] = set()
-            neighbors_dictionary[one].add(two)
-        if two in neighbors_dictionary.keys():
-            neighbors_dictionary[two].add(one)
-        else:
-            neighbors_dictionary[two] = set()
-            neighbors_dictionary[two].add(one)
-        counter = track_progress(args_dict, counter, edge_len, 3)
+    # Undirected adjacency, with one entry per connected pair of nodes
+    nodes = list(graph.nodes())
+    index = {node: x for x, node in enumerate(nodes)}
+    sources = [index[u] for u, v in graph.edges()]
+    targets = [index[v] for u, v in graph.edges()]
+    adjacency = sparse.csr_matrix(
+        (np.ones(2 * len(sources), dtype=np.int32),
+         (sources + targets, targets + sources)),
+        shape=(len(nodes), len(nodes)))
+    adjacency.data[:] = 1
+    progress_feed(args_dict, "graph", 3)
 
     print('Tuning neighbors dictionary...')
-    reaction_neighbors_dictionary = {}
-    counter = 0
-    neighbors = list(neighbors_dictionary.keys())
-    neighbors_number = len(neighbors)
-    for neighbor in neighbors:
-        if neighbor in reaction_ids:
-            components = neighbors_dictionary[neighbor]
-            connected_reactions = set()
-            for _c in components:
-                for _c_ in neighbors_dictionary[_c]:
-                    if _c_ in reaction_ids:
-                        connected_reactions.add(_c_)
-            connected_reactions = list(connected_reactions)
-            reaction_neighbors_dictionary[neighbor] = connected_reactions
-        counter = track_progress(args_dict, counter, neighbors_number, 3)
-
+    reactions = np.array(
+        [x for x in range(len(nodes)) if nodes[x] in reaction_ids],
+        dtype=np.int64)
+    incidence = adjacency[reactions, :]
+    neighbors = (incidence @ incidence.T).tocsr()
+    neighbors.sort_indices()
+    progress_feed(args_dict, "graph", 3)
+
+    # Also store the neighbors left once hub metabolites are ignored
+    reaction_list = [nodes[x] for x in reactions]
+    degree_dictionary = compile_node_degrees(graph)
+    degree_threshold = get_degree_threshold(
+        degree_dictionary=degree_dictionary)
+    hubs = set()
+    for reaction in reaction_list:
+        for side_key in ['reactants', 'products']:
+            for x in reaction_dictionary[reaction][side_key]:
+                if x in degree_dictionary \
+                        and degree_dictionary[x] > degree_threshold:
+                    hubs.add(x)
+    filtered_neighbors = filter_hub_neighbors(
+        neighbors=neighbors,
+        reaction_list=reaction_list,
+        reaction_dictionary=reaction_dictionary,
+        hubs=hubs)
+    print('Hub-filtered neighbors: ' + str(filtered_neighbors.nnz)
+          + ' of ' + str(neighbors.nnz))
+
+    index_dtype = get_index_dtype(len(reactions))
+    reaction_neighbors_dictionary = {
+        'nbdb-reactions': reaction_list,
+        'nbdb-indptr': neighbors.indptr.astype(np.int64),
+        'nbdb-indices': neighbors.indices.astype(index_dtype),
+        'nbdb-hubs': sorted(hubs),
+        'nbdb-filtered-indptr': filtered_neighbors.indptr.astype(np.int64),
+        'nbdb-filtered-indices': filtered_neighbors.indices.astype(index_dtype)}
     reaction_neighbors_dictionary['nbdb-Metaboverse-version'] = get_metaboverse_cli_version()
     reaction_neighbors_dictionary['nbdb-Metaboverse-date'] = date.today().strftime('%Y-%m-%d')
     reaction_neighbors_dictionary['nbdb-Metaboverse-url'] = os.path.join(args_dict['output'], args_dict['organism_id'] + '.nbdb')
@@ -274,31 +376,142 @@ def make_neighbors_dictionary(
     return reaction_neighbors_dictionary
 
 
-def __main__(
+def get_curation_url(
         args_dict):
-    """Analyze data on network model
+    """Get the path of the curation read by read_network()
     """
 
-    # Get network curation info
-    network = read_network(
-        file_path=args_dict['output'],
-        network_url=args_dict['curation'])
-    progress_feed(args_dict, "graph", 1)
+    return os.path.join(
+        args_dict['output'],
+        args_dict['curation'])
 
-    if args_dict['organism_curation_file'] != 'None':
-        args_dict['organism_id'] = network['organism_id']
 
-    # Read in data (if any)
-    data, stats, unmapped, flag_data = process_data(
+def build_template(
+        args_dict,
+        network):
+    """Build the graph template for an organism
+    - A template built before from the same curation is read instead
+    """
+
+    template_file = os.path.join(
+        args_dict['output'],
+        name_graph(
+            output_file=args_dict['output_file'],
+            species_id=args_dict['organism_id'],
+            template=True))
+    provenance = make_provenance(
+        inputs={'curation': get_curation_url(args_dict)},
+        settings={'organism_id': args_dict['organism_id']})
+
+    if reuse_outputs(args_dict) \
+            and read_provenance(template_file, provenance)[0] == True:
+        print('Graph template is up to date: ' + template_file)
+        return read_template(
+            args_dict=args_dict,
+            network=network,
+            url=template_file,
+            user_provided=True)
+
+    template = __template__(
+        args_dict=args_dict,
         network=network,
-        args_dict=args_dict)
-    progress_feed(args_dict, "graph", 2)
-    print("Data processed of dimensions: " + str(data.shape))
-    
+        species_id=args_dict['organism_id'],
+        output_file=args_dict['output_file'])
+    write_provenance(
+        output_file=template_file,
+        provenance=provenance)
+
+    return template
+
+
+def build_neighbors_dictionary(
+        args_dict,
+        graph,
+        network):
+    """Build the neighbors dictionary for an organism
+    - A dictionary built before from the same curation and graph template is
+    read instead
+    """
+
+    neighbors_file = os.path.join(
+        args_dict['output'],
+        args_dict['organism_id'] + '.nbdb')
+    provenance = make_provenance(
+        inputs={
+            'curation': get_curation_url(args_dict),
+            'template': args_dict['template_url']},
+        settings={'organism_id': args_dict['organism_id']})
+
+    if reuse_outputs(args_dict) \
+            and read_provenance(neighbors_file, provenance)[0] == True:
+        print('Neighbors dictionary is up to date: ' + neighbors_file)
+        neighbors_dictionary = download_neighbors_dictionary(
+            args_dict=args_dict,
+            url=neighbors_file,
+            user_provided=True)
+        progress_feed(args_dict, "graph", 6)
+        return neighbors_dictionary
+
+    neighbors_dictionary = make_neighbors_dictionary(
+        args_dict=args_dict,
+        graph=graph,
+        reaction_dictionary=remove_defective_reactions(
+            network=network))
+    write_provenance(
+        output_file=neighbors_file,
+        provenance=provenance)
+
+    return neighbors_dictionary
+
+
+def get_model_provenance(
+        args_dict):
+    """Inputs and settings a modeled network depends on
+    - Graph templates and neighbors dictionaries not provided by the user are
+    either built from the curation or taken from the source mirror, which is
+    versioned with the CLI
+    """
+
+    inputs = {x: args_dict[x] for x in DATA_COLUMNS}
+    inputs['curation'] = get_curation_url(args_dict)
+    for x in ['graph_template_file', 'neighbor_dictionary_file']:
+        if x in args_dict:
+            inputs[x] = args_dict[x]
+
+    settings = {
+        x: args_dict[x] if x in args_dict else None for x in MODEL_SETTINGS}
+    settings['source_url'] = get_source_url(args_dict, SOURCE_URL)
+
+    return make_provenance(
+        inputs=inputs,
+        settings=settings)
+
+
+def get_model_file(
+        args_dict):
+    """Get the path of the network written by __model__()
+    """
+
+    return os.path.join(
+        args_dict['output'],
+        name_graph(
+            output_file=args_dict['output_file'],
+            species_id=args_dict['organism_id']))
+
+
+def load_organism(
+        args_dict,
+        network):
+    """Load the graph template and neighbors dictionary for an organism
+    - These, with the references loaded alongside the template, do not depend
+    on user data and can be shared by every dataset modeled on the organism
+    """
+
     # Generate graph template
     this_version = get_metaboverse_cli_version()
+    source_url = get_source_url(args_dict, SOURCE_URL)
     test_url = (
-        SOURCE_URL
+        source_url
         + 'v' + this_version + '/'
         + TEMPLATE_DIR + '/'
         + args_dict['organism_id'] + '_template.mvrs')
@@ -306,14 +519,15 @@ def __main__(
     # If unable to access pre-curated network, force new curation
     if args_dict['force_new_curation'] != True:
         try:
-            url_response = requests.head(test_url)
+            url_response = get_source_status(test_url)
         except:
+            # Unreachable sources are treated as missing, so any
+            # user-provided file is still used
             print("Unable to access source files from: " + str(test_url))
-            print("Will force a new curation of source files instead...")
-            args_dict['force_new_curation'] == True
-            url_response = ''
+            print("Will build source files locally instead...")
+            url_response = 404
     else:
-        url_response = ''
+        url_response = 404
 
     if (args_dict['force_new_curation'] == False \
     or args_dict['force_new_curation'] == "False") \
@@ -331,14 +545,12 @@ def __main__(
         except:
             graph, args_dict, network, name_reference, \
             degree_dictionary, super_pathways, chebi_dictionary, \
-            uniprot_mapper, metabolite_mapper = __template__(
+            uniprot_mapper, metabolite_mapper = build_template(
                 args_dict=args_dict,
-                network=network,
-                species_id=args_dict['organism_id'],
-                output_file=args_dict['output_file'])
+                network=network)
     elif (args_dict['force_new_curation'] == False \
     or args_dict['force_new_curation'] == "False") \
-    and url_response.status_code != 404:
+    and url_response != 404:
         graph, args_dict, network, name_reference, \
         degree_dictionary, super_pathways, chebi_dictionary, \
         uniprot_mapper, metabolite_mapper = read_template(
@@ -348,11 +560,9 @@ def __main__(
     else:
         graph, args_dict, network, name_reference, \
         degree_dictionary, super_pathways, chebi_dictionary, \
-        uniprot_mapper, metabolite_mapper = __template__(
+        uniprot_mapper, metabolite_mapper = build_template(
             args_dict=args_dict,
-            network=network,
-            species_id=args_dict['organism_id'],
-            output_file=args_dict['output_file'])
+            network=network)
 
     if len(graph.nodes) == 0 or len(graph.edges) == 0:
         raise Exception("Unable to generate a reaction-based network based on the input organism template.")
@@ -361,7 +571,7 @@ def __main__(
     
     # Generate graph template
     neighbors_url = (
-        SOURCE_URL
+        source_url
         + 'v' + this_version + '/'
         + NEIGHBOR_DIR + '/'
         + args_dict['organism_id'] + '.nbdb')
@@ -369,14 +579,15 @@ def __main__(
     # If unable to access pre-curated network, force new curation
     if args_dict['force_new_curation'] != True:
         try:
-            neighbor_response = requests.head(neighbors_url)
+            neighbor_response = get_source_status(neighbors_url)
         except:
-            print("Unable to access source files from: " + str(test_url))
-            print("Will force a new curation of source files instead...")
-            args_dict['force_new_curation'] == True
-            neighbor_response = ''
+            # Unreachable sources are treated as missing, so any
+            # user-provided file is still used
+            print("Unable to access source files from: " + str(neighbors_url))
+            print("Will build source files locally instead...")
+            neighbor_response = 404
     else:
-        neighbor_response = ''
+        neighbor_response = 404
 
     force_neighbors = False
     if (args_dict['force_new_curation'] == False \
@@ -394,7 +605,7 @@ def __main__(
 
     elif (args_dict['force_new_curation'] == False \
     or args_dict['force_new_curation'] == "False") \
-    and neighbor_response.status_code != 404:
+    and neighbor_response != 404:
         try:
             neighbors_dictionary = download_neighbors_dictionary(
                 args_dict=args_dict,
@@ -405,40 +616,339 @@ def __main__(
         force_neighbors = True
 
     if force_neighbors == True:
-        no_defective_reactions = remove_defective_reactions(
-            network=network)
-        neighbors_dictionary = make_neighbors_dictionary(
+        neighbors_dictionary = build_neighbors_dictionary(
             args_dict=args_dict,
             graph=graph,
-            reaction_dictionary=no_defective_reactions)
+            network=network)
     else:
         progress_feed(args_dict, "graph", 6)
 
-    # Overlay data on graph and collapse as able
+    organism = {
+        'network': network,
+        'graph': graph,
+        'name_reference': name_reference,
+        'degree_dictionary': degree_dictionary,
+        'super_pathways': super_pathways,
+        'chebi_dictionary': chebi_dictionary,
+        'uniprot_mapper': uniprot_mapper,
+        'metabolite_mapper': metabolite_mapper,
+        'neighbors_dictionary': neighbors_dictionary}
+
+    return args_dict, organism
+
+
+def get_mapping_key(
+        args_dict):
+    """Inputs and settings a cached data mapping must match to be reused
+    - Files are compared by content; the metabolite mapper ships with the
+    CLI, so its version is the CLI version
+    - Returns None if the curation or template file cannot be found
+    """
+
+    precision = 'float64'
+    if 'precision' in args_dict \
+            and args_dict['precision'] != None:
+        precision = args_dict['precision']
+
+    key = {
+        'metaboverse-cli_version': get_metaboverse_cli_version(),
+        'organism_id': args_dict['organism_id'],
+        'database_source': str(args_dict['database_source']).lower(),
+        'precision': precision,
+        'curation': hash_file(get_curation_url(args_dict)),
+        'template': hash_file(args_dict['template_url'])}
+    if key['curation'] == None or key['template'] == None:
+        return None
+
+    for x in DATA_COLUMNS:
+        key[x] = hash_file(args_dict[x])
+
+    return key
+
+
+def model_data(
+        args_dict,
+        organism):
+    """Read in data (if any), overlay it on the organism graph, and collapse
+    as able
+    - The data mapping is cached in the output directory, so re-runs that
+    only change broadcast, blocklist, or collapse settings skip data
+    processing and mapping
+    - Modifies the graph and network of organism in place
+    """
+
+    mapping_key = get_mapping_key(args_dict)
+    if mapping_key != None:
+        found, mapping = read_mapping_cache(
+            output_dir=args_dict['output'],
+            key=mapping_key)
+    else:
+        found, mapping = False, None
+
+    if found == True:
+        print('Using cached mapping of data onto network...')
+        data, stats, unmapped, flag_data = None, None, None, False
+        progress_feed(args_dict, "graph", 7)
+
+    else:
+        data, stats, unmapped, flag_data = process_data(
+            network=organism['network'],
+            args_dict=args_dict)
+        progress_feed(args_dict, "graph", 2)
+        print("Data processed of dimensions: " + str(data.shape))
+
+        mapping = map_data(
+            args_dict=args_dict,
+            graph=organism['graph'],
+            network=organism['network'],
+            data=data,
+            stats=stats,
+            name_reference=organism['name_reference'],
+            degree_dictionary=organism['degree_dictionary'],
+            chebi_dictionary=organism['chebi_dictionary'],
+            uniprot_mapper=organism['uniprot_mapper'],
+            metabolite_mapper=organism['metabolite_mapper'],
+            flag_data=flag_data)
+        if mapping_key != None:
+            write_mapping_cache(
+                output_dir=args_dict['output'],
+                key=mapping_key,
+                mapping=mapping)
+
     print("Modeling data onto network...")
     graph_name = __model__(
-        graph=graph,
+        graph=organism['graph'],
         args_dict=args_dict,
-        network=network,
+        network=organism['network'],
         data=data,
         stats=stats,
         species_id=args_dict['organism_id'],
         output_file=args_dict['output_file'],
-        neighbors_dictionary=neighbors_dictionary,
-        name_reference=name_reference,
-        degree_dictionary=degree_dictionary,
-        chebi_dictionary=chebi_dictionary,
-        uniprot_mapper=uniprot_mapper,
-        metabolite_mapper=metabolite_mapper,
-        super_pathways=super_pathways,
+        neighbors_dictionary=organism['neighbors_dictionary'],
+        name_reference=organism['name_reference'],
+        degree_dictionary=organism['degree_dictionary'],
+        chebi_dictionary=organism['chebi_dictionary'],
+        uniprot_mapper=organism['uniprot_mapper'],
+        metabolite_mapper=organism['metabolite_mapper'],
+        super_pathways=organism['super_pathways'],
         unmapped=unmapped,
-        flag_data=flag_data)
+        flag_data=flag_data,
+        mapping=mapping)
+
+    return graph_name
+
+
+def read_manifest(
+        manifest_url):
+    """Read a batch manifest of datasets to model on one organism
+    - Tab-delimited with a header row naming any of MANIFEST_COLUMNS;
+    output_file is required and must be a unique .mvrs file for each row
+    - Blank data cells are read as 'None' and blank labels or experiment
+    fields as None, matching the curate defaults
+    """
+
+    manifest = pd.read_csv(
+        manifest_url,
+        sep='\t',
+        dtype=str,
+        keep_default_na=False)
+    manifest.columns = [x.strip() for x in manifest.columns]
+
+    unknown = [x for x in manifest.columns if x not in MANIFEST_COLUMNS]
+    if len(unknown) > 0:
+        raise Exception(
+            'Unknown batch manifest columns: ' + ', '.join(unknown)
+            + '\nValid columns are: ' + ', '.join(MANIFEST_COLUMNS))
+    if 'output_file' not in manifest.columns:
+        raise Exception('Batch manifest is missing an output_file column.')
+
+    datasets = []
+    for row in manifest.to_dict('records'):
+        dataset = {}
+        for column in MANIFEST_COLUMNS:
+            value = row[column].strip() if column in row else ''
+            if value == '' and column in DATA_COLUMNS:
+                value = 'None'
+            elif value == '':
+                value = None
+            dataset[column] = value
+        if dataset['output_file'] == None \
+                or dataset['output_file'][-5:].lower() != '.mvrs':
+            raise Exception(
+                'Batch manifest rows must all give an .mvrs output_file.')
+        datasets.append(dataset)
+
+    if len(datasets) == 0:
+        raise Exception('No datasets provided in batch manifest.')
+
+    outputs = [x['output_file'] for x in datasets]
+    duplicates = sorted(set(x for x in outputs if outputs.count(x) > 1))
+    if len(duplicates) > 0:
+        raise Exception(
+            'Batch manifest output files must be unique: '
+            + ', '.join(duplicates))
+
+    return datasets
+
+
+def get_dataset_args(
+        args_dict,
+        dataset):
+    """Get the arguments for one batch manifest dataset
+    """
+
+    dataset_args = args_dict.copy()
+    dataset_args.update(dataset)
+    # Datasets run concurrently, so only the batch reports progress
+    dataset_args['progress_log'] = 'None'
+
+    return dataset_args
+
+
+def analyze_dataset(
+        args_dict,
+        organism,
+        dataset,
+        provenance,
+        isolate=True):
+    """Process and model one batch manifest dataset on a loaded organism
+    - If isolate is True, the dataset is modeled on a copy of the organism
+    graph and network; forked workers already have their own
+    """
+
+    dataset_args = get_dataset_args(args_dict, dataset)
+
+    try:
+        print('Modeling batch dataset: ' + dataset['output_file'])
+        if isolate == True:
+            organism = organism.copy()
+            organism['graph'] = copy.deepcopy(organism['graph'])
+            organism['network'] = copy.deepcopy(organism['network'])
+
+        graph_name = model_data(
+            args_dict=dataset_args,
+            organism=organism)
+        write_provenance(
+            output_file=graph_name,
+            provenance=provenance)
+
+    except Exception as e:
+        return dataset['output_file'], False, str(e)
+
+    return graph_name, True, ''
+
+
+def __main__(
+        args_dict):
+    """Analyze data on network model
+    - Returns an existing output made from the same inputs and settings
+    without modeling it again
+    """
+
+    provenance = get_model_provenance(args_dict)
+    model_file = get_model_file(args_dict)
+    if reuse_outputs(args_dict) \
+            and read_provenance(model_file, provenance)[0] == True:
+        print('Modeled network is up to date: ' + model_file)
+        args_dict = update_session_vars(args_dict)
+        return model_file
+
+    # Get network curation info
+    network = read_network(
+        file_path=args_dict['output'],
+        network_url=args_dict['curation'])
+    progress_feed(args_dict, "graph", 1)
+
+    if args_dict['organism_curation_file'] != 'None':
+        args_dict['organism_id'] = network['organism_id']
+
+    args_dict, organism = load_organism(
+        args_dict=args_dict,
+        network=network)
+
+    graph_name = model_data(
+        args_dict=args_dict,
+        organism=organism)
+    write_provenance(
+        output_file=graph_name,
+        provenance=provenance)
 
     args_dict = update_session_vars(args_dict)
 
     return graph_name
 
 
+def __batch__(
+        args_dict):
+    """Analyze each dataset of a batch manifest on one network model
+    - The network, graph template, neighbors dictionary, and references are
+    loaded once; datasets are then modeled in forked worker processes that
+    share them
+    - Datasets with an existing output made from the same inputs and settings
+    are not modeled again
+    """
+
+    datasets = read_manifest(args_dict['batch'])
+
+    outputs = []
+    pending = []
+    for dataset in datasets:
+        dataset_args = get_dataset_args(args_dict, dataset)
+        provenance = get_model_provenance(dataset_args)
+        model_file = get_model_file(dataset_args)
+        if reuse_outputs(args_dict) \
+                and read_provenance(model_file, provenance)[0] == True:
+            print('Modeled network is up to date: ' + model_file)
+            outputs.append(model_file)
+        else:
+            pending.append((dataset, provenance))
+
+    if len(pending) == 0:
+        progress_feed(args_dict, "graph", 50)
+        return outputs
+
+    network = read_network(
+        file_path=args_dict['output'],
+        network_url=args_dict['curation'])
+    progress_feed(args_dict, "graph", 1)
+
+    if args_dict['organism_curation_file'] != 'None':
+        args_dict['organism_id'] = network['organism_id']
+
+    args_dict, organism = load_organism(
+        args_dict=args_dict,
+        network=network)
+
+    if 'workers' in args_dict \
+            and args_dict['workers'] != None:
+        workers = int(args_dict['workers'])
+    else:
+        workers = 1
+    isolate = not can_fork(workers, len(pending))
+
+    results = run_forked(
+        function=analyze_dataset,
+        arguments=[
+            (args_dict, organism, x, provenance, isolate)
+            for x, provenance in pending],
+        max_workers=workers)
+
+    failed = []
+    for output_file, success, message in results:
+        if success == True:
+            print('Modeled ' + output_file)
+            outputs.append(output_file)
+        else:
+            print('Unable to model ' + output_file + ': ' + message)
+            failed.append(output_file)
+    progress_feed(args_dict, "graph", 10)
+
+    if len(failed) > 0:
+        raise Exception('Batch analysis failed for: ' + ', '.join(failed))
+
+    return outputs
+
+
 def test():
     args_dict = {
         'output': "C:\\Users\\jorda\\Desktop",
@@ -29,12 +29,16 @@ SOFTWARE.
 """
 from __future__ import print_function
 import zipfile
+import tempfile
+import shutil
+import copy
 import importlib.util
 import numpy as np
 import networkx as nx
 import xml.etree.ElementTree as et
 import pandas as pd
 import pickle
+import json
 import os
 
 """prepare_data.py
@@ -45,7 +49,10 @@ spec = importlib.util.spec_from_file_location(
 prepare_data = importlib.util.module_from_spec(spec)
 spec.loader.exec_module(prepare_data)
 read_data = prepare_data.read_data
+check_data = prepare_data.check_data
 format_data = prepare_data.format_data
+make_symbol_reference = prepare_data.make_symbol_reference
+translate_index = prepare_data.translate_index
 output_unmapped = prepare_data.output_unmapped
 extract_data = prepare_data.extract_data
 broadcast_transcriptomics = prepare_data.broadcast_transcriptomics
@@ -78,6 +85,19 @@ transcriptomics_df = read_data(
     url=transcriptomics_url)
 assert len(transcriptomics_df.columns.tolist()) == 2, "read_data() failed"
 
+# check_data()
+print("Testing check_data()")
+assert check_data(transcriptomics_df)['should_exit'] == False, \
+    "check_data() failed"
+bad_df = pd.DataFrame(
+    {'fc': ['1', 'x', ' 2 ', 'inf'], 'p': [0.1, 0.2, 0.3, None]},
+    index=['A', 'B', 3, 'D'])
+bad_report = check_data(bad_df, max_print=1)
+assert bad_report['should_exit'] == True, "check_data() failed"
+assert bad_report['cells'] == [('B', 'fc', 1)], "check_data() failed"
+assert bad_report['index'] == [(3, 2)], "check_data() failed"
+assert bad_report['count'] == 2, "check_data() failed"
+
 # format_data()
 print("Testing format_data()")
 e_sym = {}
@@ -98,6 +118,29 @@ except KeyError:
 else:
     raise Exception('format_data() failed')
 
+# make_symbol_reference()
+print("Testing make_symbol_reference()")
+symbol_reference, symbol_ambiguous = make_symbol_reference({
+    'ENSG1': 'phospho-GCN1',
+    'ENSG2': 'gcn1',
+    'ENSG3': 'MYC (123)'})
+assert symbol_reference['GCN1'] == 'ENSG2', 'make_symbol_reference() failed'
+assert symbol_reference['MYC'] == 'ENSG3', 'make_symbol_reference() failed'
+assert symbol_reference['ENSG1'] == 'ENSG1', 'make_symbol_reference() failed'
+assert symbol_ambiguous == {'GCN1'}, 'make_symbol_reference() failed'
+
+# translate_index()
+print("Testing translate_index()")
+translated, counts = translate_index(
+    index=pd.Index(['GCN1', 'MYC', 'X']),
+    reference=symbol_reference,
+    ambiguous=symbol_ambiguous)
+assert translated.tolist() == ['ENSG2', 'ENSG3', 'X'], 'translate_index() failed'
+assert counts == {
+    'mapped': 2,
+    'unmapped': 1,
+    'ambiguous': 1}, 'translate_index() failed'
+
 # output_unmapped()
 print("Testing output_unmapped()")
 output_unmapped(
@@ -110,6 +153,11 @@ _v, _s = extract_data(
     data=t_mapped)
 assert _v.shape[1] == 1, "extract_data()"
 assert _s.shape[1] == 1, "extract_data()"
+_v32, _s32 = extract_data(
+    data=t_mapped,
+    precision='float32')
+assert _v32[0].dtype == np.float32, "extract_data()"
+assert _s32[0].dtype == _s[0].dtype, "extract_data()"
 
 # broadcast_transcriptomics()
 # How is this mapped gene vs protein in graphing?
@@ -135,6 +183,29 @@ assert stat_col[0].values.all(
 print("Testing catenate_data()")
 concat_df = catenate_data([_v, _p])
 assert concat_df.shape > _v.shape and concat_df.shape > _p.shape, 'catenate_data() failed'
+numeric_df = catenate_data([
+    pd.DataFrame({0: [1, 2, np.inf]}, index=['B', 'A', 'C']),
+    pd.DataFrame({0: ['0.5']}, index=['D'])])
+assert numeric_df.index.tolist() == ['A', 'B', 'D'], 'catenate_data() failed'
+assert numeric_df[0].dtype == np.float64, 'catenate_data() failed'
+interval_df = catenate_data([pd.DataFrame(
+    {0: ['[0.1, 0.2]', '[0.3, 0.4]', "['x', 1]"]},
+    index=['B', 'A', 'C'])])
+assert interval_df[(0, 'lower')].tolist() == [0.3, 0.1], 'catenate_data() failed'
+assert interval_df[(0, 'upper')].tolist() == [0.4, 0.2], 'catenate_data() failed'
+interval_v, interval_s = extract_data(pd.DataFrame(
+    [[1.0, 0.5, 1.5], [2.0, 1.5, 2.5]],
+    index=['A', 'B'],
+    columns=['fc', 'ci lower', 'ci upper']))
+assert interval_v[0].tolist() == [1.0, 2.0], 'extract_data() failed'
+assert interval_s[(0, 'upper')].tolist() == [1.5, 2.5], 'extract_data() failed'
+_, interval_col = copy_columns(interval_v, interval_s, 3)
+assert interval_col.shape == (2, 6), 'copy_columns() failed'
+try:
+    catenate_data([interval_s, _s])
+    raise AssertionError('catenate_data() failed')
+except Exception as e:
+    assert 'do not match' in str(e), 'catenate_data() failed'
 
 # Test main()
 print("Testing main()")
@@ -178,7 +249,20 @@ spec.loader.exec_module(utils)
 file_path = utils.file_path
 check_suffix = utils.check_suffix
 add_data = utils.add_data
+read_table = utils.read_table
+strip_suffix = utils.strip_suffix
 convert_rgba = utils.convert_rgba
+get_neighbors_lookup = utils.get_neighbors_lookup
+use_filtered_neighbors = utils.use_filtered_neighbors
+make_interval_stats = utils.make_interval_stats
+is_interval_stats = utils.is_interval_stats
+get_interval_array = utils.get_interval_array
+get_stats_rows = utils.get_stats_rows
+read_mapping_cache = utils.read_mapping_cache
+write_mapping_cache = utils.write_mapping_cache
+get_index_dtype = utils.get_index_dtype
+encode_node_link = utils.encode_node_link
+decode_node_link = utils.decode_node_link
 
 # file_path()
 print("Testing file_path()")
@@ -188,12 +272,51 @@ assert file_path(file) == os.path.abspath(file), 'file_path() failed'
 # check_suffix()
 print("Testing check_suffix()")
 assert check_suffix('file.txt') == '\t', 'check_suffix() failed'
+assert check_suffix('file.csv.gz') == ',', 'check_suffix() failed'
+assert check_suffix('file.parquet') == None, 'check_suffix() failed'
+
+# strip_suffix()
+print("Testing strip_suffix()")
+assert strip_suffix('/data/file.tsv.xz') == '/data/file', 'strip_suffix() failed'
+assert strip_suffix('/data/file.parquet') == '/data/file', 'strip_suffix() failed'
 
 # add_data()
 print("Testing add_data()")
 df = add_data(transcriptomics_url)
 assert type(df) == pd.DataFrame, 'add_data() failed'
 
+# read_table()
+print("Testing read_table()")
+table_dir = tempfile.mkdtemp()
+df.to_csv(os.path.join(table_dir, 'data.txt.gz'), sep='\t')
+assert read_table(os.path.join(table_dir, 'data.txt.gz')).equals(df), \
+    'read_table() failed'
+if importlib.util.find_spec('pyarrow') != None:
+    df.to_parquet(os.path.join(table_dir, 'data.parquet'))
+    assert read_table(os.path.join(table_dir, 'data.parquet')).equals(df), \
+        'read_table() failed'
+    df.reset_index().to_feather(os.path.join(table_dir, 'data.feather'))
+    assert read_table(os.path.join(table_dir, 'data.feather')).equals(df), \
+        'read_table() failed'
+else:
+    print("pyarrow not installed, skipping Parquet and Feather tests")
+
+# read_mapping_cache() / write_mapping_cache()
+print("Testing read_mapping_cache()")
+write_mapping_cache(
+    output_dir=table_dir,
+    key={'transcriptomics': 'abc'},
+    mapping={'max_value': 5})
+assert read_mapping_cache(
+    output_dir=table_dir,
+    key={'transcriptomics': 'abc'}) == (True, {'max_value': 5}), \
+    'read_mapping_cache() failed'
+assert read_mapping_cache(
+    output_dir=table_dir,
+    key={'transcriptomics': 'abd'}) == (False, None), \
+    'read_mapping_cache() failed'
+shutil.rmtree(table_dir)
+
 # convert_rgba()
 print("Testing convert_rgba()")
 n = 2
@@ -206,6 +329,70 @@ n = 1
 color2 = [missing_color for x in range(n)]
 assert convert_rgba(color2) == [(255, 255, 255, 1)], 'convert_rgba() failed'
 
+# get_index_dtype()
+print("Testing get_index_dtype()")
+assert get_index_dtype(10) == np.int32, 'get_index_dtype() failed'
+assert get_index_dtype(2 ** 32) == np.int64, 'get_index_dtype() failed'
+
+# encode_node_link()
+print("Testing encode_node_link()")
+G_link = nx.DiGraph()
+G_link.add_node('C', type='complex', complex='true')
+G_link.add_node('A', type='reactant')
+G_link.add_node('R', type='reaction')
+G_link.add_node('B', type='product', values=[1.5])
+G_link.add_edge('A', 'R', type='reactant')
+G_link.add_edge('R', 'B', type='product')
+G_link.add_edge('C', 'R', type='catalyst')
+node_link = nx.readwrite.json_graph.node_link_data(G_link, edges='links')
+encoded = encode_node_link(node_link)
+assert [x['type'] for x in encoded['nodes']] == [0, 1, 2, 3], 'encode_node_link() failed'
+assert encoded['vocabularies']['nodes']['type'] == [
+    'complex', 'reactant', 'reaction', 'product'], 'encode_node_link() failed'
+assert encoded['vocabularies']['nodes']['complex'] == ['true'], 'encode_node_link() failed'
+assert 'values' not in encoded['vocabularies']['nodes'], 'encode_node_link() failed'
+assert node_link['nodes'][0]['type'] == 'complex', 'encode_node_link() failed'
+
+# decode_node_link()
+print("Testing decode_node_link()")
+decoded = decode_node_link(json.loads(json.dumps(encoded)))
+assert decoded == node_link, 'decode_node_link() failed'
+assert decode_node_link(dict(node_link)) == node_link, 'decode_node_link() failed'
+
+# get_neighbors_lookup()
+print("Testing get_neighbors_lookup()")
+csr_neighbors = {
+    'nbdb-reactions': ['R1', 'R2', 'R3'],
+    'nbdb-indptr': np.array([0, 2, 4, 5]),
+    'nbdb-indices': np.array([0, 1, 0, 1, 2], dtype=np.int32),
+    'nbdb-Metaboverse-version': '0.0.0'}
+get_neighbors = get_neighbors_lookup(csr_neighbors)
+assert get_neighbors('R1') == ['R1', 'R2'], 'get_neighbors_lookup() failed'
+assert get_neighbors('R3') == ['R3'], 'get_neighbors_lookup() failed'
+assert get_neighbors('R4') == None, 'get_neighbors_lookup() failed'
+get_neighbors = get_neighbors_lookup({
+    'R1': ['R1', 'R2'],
+    'nbdb-Metaboverse-version': '0.0.0'})
+assert get_neighbors('R1') == ['R1', 'R2'], 'get_neighbors_lookup() failed'
+assert get_neighbors('R4') == None, 'get_neighbors_lookup() failed'
+
+# make_interval_stats()
+print("Testing make_interval_stats()")
+interval_stats = make_interval_stats(
+    pd.DataFrame({0: [0.1, 0.3], 1: [0.5, np.nan]}, index=['A', 'B']),
+    pd.DataFrame({0: [0.2, 0.4], 1: [0.6, 0.7]}, index=['A', 'B']))
+assert interval_stats.shape == (2, 4), 'make_interval_stats() failed'
+assert is_interval_stats(interval_stats) == True, 'is_interval_stats() failed'
+assert is_interval_stats(
+    pd.DataFrame({0: [0.1]})) == False, 'is_interval_stats() failed'
+assert get_interval_array(interval_stats).shape == (2, 2, 2), \
+    'get_interval_array() failed'
+stats_rows = get_stats_rows(interval_stats)
+assert stats_rows['A'] == [[0.1, 0.2], [0.5, 0.6]], 'get_stats_rows() failed'
+assert stats_rows['B'][0] == [0.3, 0.4], 'get_stats_rows() failed'
+assert get_stats_rows(pd.DataFrame({0: [0.1]}, index=['A'])) == {
+    'A': [0.1]}, 'get_stats_rows() failed'
+
 """model.py
 """
 print("Testing model.py")
@@ -215,12 +402,22 @@ model = importlib.util.module_from_spec(spec)
 spec.loader.exec_module(model)
 name_graph = model.name_graph
 build_graph = model.build_graph
+shard_reactions = model.shard_reactions
+reaction_signature = model.reaction_signature
 process_reactions = model.process_reactions
+init_graph_builder = model.init_graph_builder
+add_builder_node = model.add_builder_node
+add_builder_edge = model.add_builder_edge
+commit_graph_builder = model.commit_graph_builder
 add_node_edge = model.add_node_edge
 check_complexes = model.check_complexes
 uniprot_ensembl_reference = model.uniprot_ensembl_reference
 map_attributes = model.map_attributes
+map_data = model.map_data
+apply_mapping = model.apply_mapping
 extract_value = model.extract_value
+get_color_index = model.get_color_index
+geometric_mean = model.geometric_mean
 output_graph = model.output_graph
 compile_pathway_degree = model.compile_pathway_degree
 compile_node_degrees = model.compile_node_degrees
@@ -383,14 +580,65 @@ assert list(gg1.nodes()) == [
     'species_7',
     'species_8'], 'build_graph() failed'
 
+# build_graph() with workers
+print("Testing build_graph() with workers")
+net_copy = copy.deepcopy(net_test)
+net_copy['reaction_database']['reaction_2_copy'] = dict(
+    net_copy['reaction_database']['reaction_2'],
+    id='reaction_2_copy')
+net_copy['pathway_database']['R-HSA-1']['reactions'].append('reaction_2_copy')
+gg_serial = None
+for workers in [1, 2]:
+    network_workers = copy.deepcopy(net_copy)
+    gg_workers, reactions_workers, pathways_workers = build_graph(
+        args_dict=test_args,
+        network=network_workers['reaction_database'],
+        pathway_database=network_workers['pathway_database'],
+        species_reference={},
+        name_reference={},
+        protein_reference={},
+        chebi_dictionary={},
+        uniprot_reference={},
+        complexes={},
+        species_id={},
+        gene_reference={},
+        compartment_reference={'compartment_1': 'hello'},
+        component_database={
+            'species_1': {'is': 'gene0', 'name': 'gene0', 'compartment': 'none', 'type': 'gene', 'hasPart': []},
+            'species_2': {'is': 'gene0', 'name': 'gene0', 'compartment': 'none', 'type': 'gene', 'hasPart': []},
+            'species_3': {'is': 'gene0', 'name': 'gene0', 'compartment': 'none', 'type': 'gene', 'hasPart': []},
+            'species_4': {'is': 'gene0', 'name': 'gene0', 'compartment': 'none', 'type': 'gene', 'hasPart': []},
+            'species_5': {'is': 'gene1', 'name': 'geneA', 'compartment': 'none', 'type': 'gene', 'hasPart': []},
+            'species_6': {'is': 'gene2', 'name': 'geneB', 'compartment': 'none', 'type': 'gene', 'hasPart': []},
+            'species_7': {'is': 'gene3', 'name': 'geneC', 'compartment': 'none', 'type': 'gene', 'hasPart': []},
+            'species_8': {'is': 'gene4', 'name': 'geneD', 'compartment': 'none', 'type': 'gene', 'hasPart': []}
+        },
+        workers=workers)
+    assert 'reaction_2_copy' not in reactions_workers, 'build_graph() failed'
+    assert 'reaction_2_copy' not in pathways_workers['R-HSA-1']['reactions'], 'build_graph() failed'
+    if gg_serial == None:
+        gg_serial = gg_workers
+        reactions_serial = reactions_workers
+    else:
+        assert list(gg_workers.nodes(data=True)) == list(gg_serial.nodes(data=True)), 'build_graph() failed'
+        assert list(gg_workers.edges(data=True)) == list(gg_serial.edges(data=True)), 'build_graph() failed'
+        assert reactions_workers == reactions_serial, 'build_graph() failed'
+
+# shard_reactions()
+print("Testing shard_reactions()")
+assert shard_reactions(['a', 'b', 'c', 'd', 'e'], 2) == [
+    ['a', 'b', 'c'], ['d', 'e']], 'shard_reactions() failed'
+assert shard_reactions(['a'], 4) == [['a']], 'shard_reactions() failed'
+assert shard_reactions([], 4) == [], 'shard_reactions() failed'
+
 # process_reactions()
 print("Testing process_reactions()")
 net_copy = net_test['reaction_database'].copy()
-gg2 = nx.DiGraph()
-key_hash = set()
+builder = init_graph_builder()
+key_hash = {}
 remove_keys = []
-gg2, net_copy, key_hash, remove_keys = process_reactions(
-    graph=gg2,
+builder, net_copy, key_hash, remove_keys = process_reactions(
+    builder=builder,
     reactome_id='reaction_2',
     network=net_copy,
     species_reference={},
@@ -410,6 +658,7 @@ gg2, net_copy, key_hash, remove_keys = process_reactions(
     },
     key_hash=key_hash,
     remove_keys=remove_keys)
+gg2 = commit_graph_builder(builder)
 try:
     gg2.nodes()['reaction_2']
     gg2.nodes()['species_5']
@@ -419,11 +668,68 @@ try:
 except:
     raise Exception('process_reactions() failed')
 
+net_copy['reaction_2_copy'] = dict(
+    net_copy['reaction_2'],
+    id='reaction_2_copy',
+    name='another name',
+    reactants=['species_6', 'species_5'])
+net_copy['reaction_2_anagram'] = dict(
+    net_copy['reaction_2'],
+    id='reaction_2_anagram',
+    name='2 test reaction',
+    products=['species_8'])
+net_copy['reaction_2_irreversible'] = dict(
+    net_copy['reaction_2'],
+    id='reaction_2_irreversible',
+    name='irreversible test reaction',
+    reversible='false')
+for reaction in [
+        'reaction_2_copy', 'reaction_2_anagram', 'reaction_2_irreversible']:
+    builder, net_copy, key_hash, remove_keys = process_reactions(
+        builder=builder,
+        reactome_id=reaction,
+        network=net_copy,
+        species_reference={},
+        name_reference={},
+        protein_reference={},
+        chebi_dictionary={},
+        uniprot_reference={},
+        complex_reference={},
+        species_id={},
+        gene_reference={},
+        compartment_reference={'compartment_1': 'hello'},
+        component_database={
+            'species_5': {'is': 'gene1', 'name': 'geneA', 'compartment': 'none', 'type': 'gene', 'hasPart': []},
+            'species_6': {'is': 'gene2', 'name': 'geneB', 'compartment': 'none', 'type': 'gene', 'hasPart': []},
+            'species_7': {'is': 'gene3', 'name': 'geneC', 'compartment': 'none', 'type': 'gene', 'hasPart': []},
+            'species_8': {'is': 'gene4', 'name': 'geneD', 'compartment': 'none', 'type': 'gene', 'hasPart': []}
+        },
+        key_hash=key_hash,
+        remove_keys=remove_keys)
+assert remove_keys == ['reaction_2_copy'], 'process_reactions() failed'
+assert key_hash[reaction_signature(net_copy['reaction_2_copy'])] == 'reaction_2', 'process_reactions() failed'
+assert 'reaction_2_anagram' in key_hash.values(), 'process_reactions() failed'
+assert 'reaction_2_irreversible' in key_hash.values(), 'process_reactions() failed'
+
+# commit_graph_builder()
+print("Testing commit_graph_builder()")
+builder = init_graph_builder()
+add_builder_node(builder, 'a', {'name': 'first', 'type': 'reactant'})
+add_builder_node(builder, 'b', {'name': 'second'})
+add_builder_node(builder, 'a', {'name': 'third'})
+add_builder_edge(builder, 'a', 'b', {'type': 'reactant'})
+add_builder_edge(builder, 'a', 'b', {'type': 'catalyst'})
+G_builder = commit_graph_builder(builder)
+assert list(G_builder.nodes()) == ['a', 'b'], 'commit_graph_builder() failed'
+assert G_builder.nodes()['a'] == {'name': 'third', 'type': 'reactant'}, 'commit_graph_builder() failed'
+assert G_builder.edges()[('a', 'b')] == {'type': 'catalyst'}, 'commit_graph_builder() failed'
+assert G_builder.number_of_edges() == 1, 'commit_graph_builder() failed'
+
 # add_node_edge()
 print("Testing add_node_edge()")
-G_add = G.copy()
-G_add = add_node_edge(
-    graph=G_add,
+builder = init_graph_builder()
+builder = add_node_edge(
+    builder=builder,
     id='thisisnew',
     map_id='mapper',
     name='test',
@@ -437,6 +743,7 @@ G_add = add_node_edge(
     name_reference={},
     protein_reference={},
     compartment_reference={})
+G_add = commit_graph_builder(builder, G.copy())
 try:
     G_add.nodes()['thisisnew']
     G_add.edges()[('thisisnew', 'Gamma')]
@@ -445,10 +752,10 @@ except:
 
 # check_complexes()
 print("Testing check_complexes()")
-G_complex = G.copy()
-G_complex, add_components = check_complexes(
+builder = init_graph_builder()
+builder, add_components = check_complexes(
     species_id='HSA',
-    graph=G_complex,
+    builder=builder,
     id='Epsilon',
     complex_reference={'Epsilon': ['x', 'y', 'z']},
     species_reference={''},
@@ -459,6 +766,7 @@ G_complex, add_components = check_complexes(
     gene_reference={},
     component_database={'Epsilon': {'hasPart': ['x', 'y', 'z']}},
     compartment_reference={})
+G_complex = commit_graph_builder(builder, G.copy())
 try:
     G_complex.nodes()['x']
     G_complex.edges()[('x', 'Epsilon')]
@@ -467,6 +775,29 @@ try:
 except:
     raise Exception('check_complexes() failed')
 
+complex_cache = {}
+for x in range(2):
+    builder = init_graph_builder()
+    builder, cached_components = check_complexes(
+        species_id='HSA',
+        builder=builder,
+        id='Epsilon',
+        complex_reference={'Epsilon': ['x', 'y', 'z']},
+        species_reference={''},
+        name_reference={},
+        protein_reference={},
+        chebi_dictionary={},
+        uniprot_reference={},
+        gene_reference={},
+        component_database={'Epsilon': {'hasPart': ['x', 'y', 'z']}},
+        compartment_reference={},
+        complex_cache=complex_cache)
+    assert cached_components == add_components, 'check_complexes() failed'
+    assert list(commit_graph_builder(builder).edges(data=True)) \
+        == list(G_complex.subgraph(['x', 'y', 'z', 'Epsilon']).edges(data=True)), \
+        'check_complexes() failed'
+assert list(complex_cache.keys()) == ['Epsilon'], 'check_complexes() failed'
+
 # uniprot_ensembl_reference()
 print("Testing uniprot_ensembl_reference()")
 uni_ref = {'Alpha': 'Beta', 'Epsilon': 'F'}
@@ -561,6 +892,100 @@ assert G_mapped.nodes()['Delta']['stats'] == [None], 'map_attributes() failed'
 assert G_mapped.nodes()['Epsilon']['values'] == [5], 'map_attributes() failed'
 assert G_mapped.nodes()['Epsilon']['stats'] == [0.5], 'map_attributes() failed'
 
+# map_attributes() in column chunks
+G_chunked, data_max, stats_max, non_mappers = map_attributes(
+    args_dict={},
+    graph=G.copy(),
+    data=pd.DataFrame(
+        [[1, 2, 3], [3, 4, 5], [5, 6, 7]],
+        index=['Alpha', 'Gamma', 'epsilon']),
+    stats=pd.DataFrame(
+        [[.1, .2, .3], [.3, .4, .5], [.5, .6, .7]],
+        index=['Alpha', 'Gamma', 'epsilon']),
+    name_reference={},
+    degree_dictionary=degree_dictionary,
+    chebi_dictionary={},
+    chebi_synonyms={},
+    metabolite_mapper={},
+    uniprot_mapper={},
+    chunk_size=2)
+assert G_chunked.nodes()['Gamma']['values'] == [3, 4, 5], 'map_attributes() failed'
+assert G_chunked.nodes()['Gamma']['stats'] == [.3, .4, .5], 'map_attributes() failed'
+assert G_chunked.nodes()['Gamma']['values_rgba'] == extract_value(
+    value_array=[3, 4, 5],
+    max_value=7), 'map_attributes() failed'
+assert len(G_chunked.nodes()['Gamma']['values_js']) == 3, 'map_attributes() failed'
+assert G_chunked.nodes()['Beta']['values'] == [None, None, None], \
+    'map_attributes() failed'
+assert G_chunked.nodes()['Beta']['values'] \
+    is not G_chunked.nodes()['Beta']['stats'], 'map_attributes() failed'
+
+# map_data() / apply_mapping()
+print("Testing map_data()")
+G_data = G.copy()
+mapping = map_data(
+    args_dict={'metabolomics': 'None'},
+    graph=G_data,
+    network={'chebi_synonyms': {}},
+    data=data,
+    stats=stats,
+    name_reference={},
+    degree_dictionary=degree_dictionary,
+    chebi_dictionary={},
+    uniprot_mapper={},
+    metabolite_mapper={})
+assert mapping['max_value'] == 5, 'map_data() failed'
+assert mapping['categories'] == [0], 'map_data() failed'
+assert mapping['stat_type'] == 'float', 'map_data() failed'
+G_restored = apply_mapping(
+    graph=G.copy(),
+    mapping=copy.deepcopy(mapping))
+assert dict(G_restored.nodes(data=True)) == dict(G_data.nodes(data=True)), \
+    'apply_mapping() failed'
+metabolomics_dir = tempfile.mkdtemp()
+data_unknown = pd.concat([data, pd.DataFrame({0: [7]}, index=['unknown'])])
+stats_unknown = pd.concat([stats, pd.DataFrame({0: [.7]}, index=['unknown'])])
+data_unknown.to_csv(
+    os.path.join(metabolomics_dir, 'metabolites.tsv.gz'), sep='\t')
+map_data(
+    args_dict={'metabolomics': os.path.join(
+        metabolomics_dir, 'metabolites.tsv.gz')},
+    graph=G.copy(),
+    network={'chebi_synonyms': {}},
+    data=data_unknown,
+    stats=stats_unknown,
+    name_reference={},
+    degree_dictionary=degree_dictionary,
+    chebi_dictionary={},
+    uniprot_mapper={},
+    metabolite_mapper={})
+assert pd.read_csv(
+    os.path.join(metabolomics_dir, 'metabolites_unmapped.txt'),
+    sep='\t',
+    index_col=0).index.tolist() == ['unknown'], 'map_data() failed'
+shutil.rmtree(metabolomics_dir)
+
+# get_color_index()
+print("Testing get_color_index()")
+def get_reference_color(x, max_value):
+    key = round((x + max_value) / (2 * max_value), 3)
+    if key not in model.CMAP:
+        key = max([k for k in model.CMAP.keys() if k < key])
+    return tuple(model.CMAP[key])
+color_values = np.linspace(-5, 5, 2001).tolist()
+assert extract_value(
+    value_array=color_values,
+    max_value=5) == [
+    get_reference_color(x, 5) for x in color_values], 'get_color_index() failed'
+assert get_color_index(
+    np.array([[-1, 1]]), 1).tolist() == [[0, 511]], 'get_color_index() failed'
+
+# geometric_mean()
+print("Testing geometric_mean()")
+from scipy.stats import gmean
+gmean_values = [0.01, 0.2, 0.03, 0.5, 1e-10, 0.7, 0.8, 0.09, 0.1, 0.4]
+assert geometric_mean(gmean_values) == gmean(gmean_values), 'geometric_mean() failed'
+
 # extract_value()
 """
 v_e = [(0.0, 0.0, 0.3, 1.0),
@@ -623,6 +1048,11 @@ assert infer_protein_values(vals, length) == [3], 'infer_protein_values() failed
 # infer_protein_stats()
 print("Testing infer_protein_stats()")
 assert infer_protein_stats(vals, length) == [1.0], 'infer_protein_stats() failed'
+assert infer_protein_stats(
+    [[[0.1, 0.3]], [[0.3, 0.5]], [None]], 1, stat_type="array") == [[0.2, 0.4]], \
+    'infer_protein_stats() failed'
+assert infer_protein_stats(
+    [[None]], 1, stat_type="array") == [None], 'infer_protein_stats() failed'
 
 # broadcast_values()
 print("Testing broadcast_values()")
@@ -1129,6 +1559,157 @@ final_reactions2 = [
 assert list(updated_rxns2.keys()
             ) == final_reactions2, 'collapse_nodes() failed'
 
+# make_neighbors_dictionary()
+print("Testing make_neighbors_dictionary()")
+spec = importlib.util.spec_from_file_location(
+    "", os.path.abspath("./metaboverse_cli/analyze/__main__.py"))
+analyze_main = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(analyze_main)
+
+# N24 becomes a hub shared by half of the reactions
+hub_database = copy.deepcopy(collapser_database)
+for x, reaction in enumerate(hub_database.keys()):
+    if x % 2 == 0:
+        hub_database[reaction]['products'].append('N24')
+hub_database['R11']['reactants'] = ['N24']
+hub_database['R12']['products'] = ['N24']
+
+G_neighbors = G_collapse.copy()
+for reaction, attributes in hub_database.items():
+    for x in attributes['reactants']:
+        G_neighbors.add_edge(x, reaction)
+    for x in attributes['products']:
+        G_neighbors.add_edge(reaction, x)
+    for x in attributes['modifiers']:
+        G_neighbors.add_edge(x[0], reaction)
+neighbors_dir = tempfile.mkdtemp()
+collapse_neighbors = analyze_main.make_neighbors_dictionary(
+    args_dict={
+        'output': neighbors_dir,
+        'organism_id': 'TEST'},
+    graph=G_neighbors,
+    reaction_dictionary=hub_database)
+get_neighbors = get_neighbors_lookup(collapse_neighbors)
+U_neighbors = G_neighbors.to_undirected()
+for reaction in hub_database.keys():
+    expected = sorted(set(
+        y for x in U_neighbors[reaction] for y in U_neighbors[x]
+        if y in hub_database))
+    assert sorted(get_neighbors(reaction)) == expected, \
+        'make_neighbors_dictionary() failed'
+assert os.path.exists(os.path.join(neighbors_dir, 'TEST.nbdb')), \
+    'make_neighbors_dictionary() failed'
+shutil.rmtree(neighbors_dir)
+
+# filter_hub_neighbors()
+print("Testing filter_hub_neighbors()")
+hubs = set(collapse_neighbors['nbdb-hubs'])
+assert hubs == {'N24'}, 'make_neighbors_dictionary() failed'
+get_filtered = get_neighbors_lookup(collapse_neighbors, filtered=True)
+for reaction in hub_database.keys():
+    sides = [
+        hub_database[reaction]['reactants'],
+        hub_database[reaction]['products']]
+    for neighbor in get_neighbors(reaction):
+        neighbor_sides = [
+            hub_database[neighbor]['reactants'],
+            hub_database[neighbor]['products']]
+        shared = set(sides[0] + sides[1]).intersection(
+            neighbor_sides[0] + neighbor_sides[1]) - hubs
+        matched = any(
+            x == y and all(z in hubs for z in x)
+            for x in sides for y in neighbor_sides)
+        assert (neighbor in get_filtered(reaction)) \
+            == (len(shared) > 0 or matched), 'filter_hub_neighbors() failed'
+
+# read_manifest()
+print("Testing read_manifest()")
+manifest_dir = tempfile.mkdtemp()
+manifest_url = os.path.join(manifest_dir, 'manifest.tsv')
+with open(manifest_url, 'w') as manifest_file:
+    manifest_file.write(
+        'transcriptomics\tmetabolomics\tlabels\toutput_file\n'
+        + 'rna1.txt\t\t0,1\tone.mvrs\n'
+        + '\tmet2.txt\t\ttwo.mvrs\n')
+datasets = analyze_main.read_manifest(manifest_url)
+assert datasets == [
+    {
+        'transcriptomics': 'rna1.txt',
+        'proteomics': 'None',
+        'metabolomics': 'None',
+        'labels': '0,1',
+        'experiment_name': None,
+        'experiment_type': None,
+        'output_file': 'one.mvrs'},
+    {
+        'transcriptomics': 'None',
+        'proteomics': 'None',
+        'metabolomics': 'met2.txt',
+        'labels': None,
+        'experiment_name': None,
+        'experiment_type': None,
+        'output_file': 'two.mvrs'}], 'read_manifest() failed'
+for bad_manifest in [
+        'transcriptomics\toutput_file\nrna1.txt\tone.mvrs\nrna2.txt\tone.mvrs\n',
+        'transcriptomics\toutput_file\nrna1.txt\t\n',
+        'transcriptomics\nrna1.txt\n',
+        'rnaseq\toutput_file\nrna1.txt\tone.mvrs\n']:
+    with open(manifest_url, 'w') as manifest_file:
+        manifest_file.write(bad_manifest)
+    try:
+        analyze_main.read_manifest(manifest_url)
+        test_var = False
+    except Exception:
+        test_var = True
+    assert test_var == True, 'read_manifest() failed'
+shutil.rmtree(manifest_dir)
+
+# use_filtered_neighbors()
+print("Testing use_filtered_neighbors()")
+assert use_filtered_neighbors(
+    neighbors_dictionary=collapse_neighbors,
+    degree_dictionary=collapse_degree_dictionary,
+    blocklist=list(hubs),
+    degree_threshold=50,
+    collapse_threshold=0.3) == True, 'use_filtered_neighbors() failed'
+assert use_filtered_neighbors(
+    neighbors_dictionary=collapse_neighbors,
+    degree_dictionary=collapse_degree_dictionary,
+    blocklist=list(hubs),
+    degree_threshold=50,
+    collapse_threshold=0) == False, 'use_filtered_neighbors() failed'
+assert use_filtered_neighbors(
+    neighbors_dictionary=collapse_neighbors,
+    degree_dictionary=collapse_degree_dictionary,
+    blocklist=[],
+    degree_threshold=1000,
+    collapse_threshold=0.3) == False, 'use_filtered_neighbors() failed'
+assert use_filtered_neighbors(
+    neighbors_dictionary={},
+    degree_dictionary=collapse_degree_dictionary,
+    blocklist=list(hubs),
+    degree_threshold=50,
+    collapse_threshold=0.3) == False, 'use_filtered_neighbors() failed'
+
+# collapse_nodes() with full and hub-filtered neighbors
+full_neighbors = {
+    x: collapse_neighbors[x] for x in collapse_neighbors.keys()
+    if x != 'nbdb-hubs'}
+for collapse_modifiers in [False, True]:
+    collapsed = []
+    for neighbors in [{}, full_neighbors, collapse_neighbors]:
+        collapsed.append(collapse_nodes(
+            args_dict={},
+            graph=G_collapse.copy(),
+            reaction_dictionary=hub_database,
+            neighbors_dictionary=neighbors,
+            degree_dictionary=collapse_degree_dictionary,
+            samples=1,
+            collapse_with_modifiers=collapse_modifiers,
+            blocklist=list(hubs))[1:])
+    assert collapsed[0] == collapsed[1] == collapsed[2], \
+        'collapse_nodes() failed'
+
 
 # collapse_nodes() for partial collapse
 print('Testing collapse_nodes() for partial collapse...')
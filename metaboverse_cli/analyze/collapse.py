@@ -33,7 +33,8 @@ from __future__ import print_function
 """
 try:
     from utils import track_progress
-    from analyze.utils import convert_rgba
+    from analyze.utils import convert_rgba, get_neighbors_lookup, \
+                              use_filtered_neighbors
 except:
     import os
     import importlib.util
@@ -47,6 +48,8 @@ except:
         "convert_rgba", os.path.abspath("./metaboverse_cli/analyze/utils.py"))
     convert_rgba = importlib.util.module_from_spec(spec)
     spec.loader.exec_module(convert_rgba)
+    get_neighbors_lookup = convert_rgba.get_neighbors_lookup
+    use_filtered_neighbors = convert_rgba.use_filtered_neighbors
     convert_rgba = convert_rgba.convert_rgba
 
 
@@ -433,6 +436,20 @@ def collapse_nodes(
     removed_reaction = set()  # for reactions that are collapsed, make sure the
     # original reactions are removed from the final reaction dictionary
 
+    # Neighbors matched only through ignored hubs never collapse, so skip
+    # them when the .nbdb has already filtered them out
+    filtered = use_filtered_neighbors(
+        neighbors_dictionary=neighbors_dictionary,
+        degree_dictionary=degree_dictionary,
+        blocklist=blocklist,
+        degree_threshold=degree_threshold,
+        collapse_threshold=collapse_threshold)
+    if filtered == True:
+        print('Using hub-filtered reaction neighbors...')
+    get_neighbors = get_neighbors_lookup(
+        neighbors_dictionary,
+        filtered=filtered)
+
     counter = 0
     reaction_number = len(list(reaction_dictionary.keys()))
 
@@ -518,9 +535,10 @@ def collapse_nodes(
             output_neighbors = []
 
             # Check for reactions with complete and partial matching sides
-            if key in neighbors_dictionary.keys():
+            neighbor_list = get_neighbors(key)
+            if neighbor_list is not None:
                 # all components connected to that reaction
-                for neighbor_key in neighbors_dictionary[key]:
+                for neighbor_key in neighbor_list:
                     if key != neighbor_key \
                     and neighbor_key in reaction_dictionary.keys():
                         input_neighbors, output_neighbors = check_neighbors(
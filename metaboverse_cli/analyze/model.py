@@ -31,7 +31,6 @@ from __future__ import print_function
 from networkx.readwrite import json_graph
 from collections import Counter
 from datetime import date
-from scipy.stats import gmean
 import networkx as nx
 import pandas as pd
 import numpy as np
@@ -48,8 +47,11 @@ try:
     from analyze.collapse import collapse_nodes
     from analyze.collapse import generate_updated_dictionary
     from analyze.mpl_colormaps import get_mpl_colormap
-    from analyze.utils import convert_rgba, remove_defective_reactions
-    from utils import progress_feed, track_progress, get_metaboverse_cli_version
+    from analyze.utils import convert_rgba, remove_defective_reactions, \
+                              is_interval_stats, get_interval_array, \
+                              read_table, strip_suffix, encode_node_link
+    from utils import progress_feed, track_progress, get_metaboverse_cli_version, \
+                      run_forked
 except:
     import importlib.util
     module_path = os.path.abspath(
@@ -77,6 +79,11 @@ except:
     spec.loader.exec_module(analyze_utils)
     convert_rgba = analyze_utils.convert_rgba
     remove_defective_reactions = analyze_utils.remove_defective_reactions
+    is_interval_stats = analyze_utils.is_interval_stats
+    get_interval_array = analyze_utils.get_interval_array
+    read_table = analyze_utils.read_table
+    strip_suffix = analyze_utils.strip_suffix
+    encode_node_link = analyze_utils.encode_node_link
 
     module_path = os.path.abspath(
         os.path.join(".", "metaboverse_cli", "utils.py"))
@@ -86,11 +93,20 @@ except:
     progress_feed = utils.progress_feed
     track_progress = utils.track_progress
     get_metaboverse_cli_version = utils.get_metaboverse_cli_version
+    run_forked = utils.run_forked
 
 
 CMAP = get_mpl_colormap('seismic')
 REACTION_COLOR = (0.75, 0.75, 0.75, 1)
 MISSING_COLOR = (1, 1, 1, 1)
+CMAP_KEYS = sorted(CMAP.keys())
+CMAP_STEPS = np.rint(np.array(CMAP_KEYS) * 1000)
+CMAP_RGBA = [tuple(CMAP[x]) for x in CMAP_KEYS]
+CMAP_JS = convert_rgba(rgba_tuples=CMAP_RGBA)
+CHUNK_SIZE = 256
+MAPPED_ATTRIBUTES = [
+    'degree', 'synonyms', 'type', 'hmdb_mapper', 'user_label',
+    'values', 'values_rgba', 'values_js', 'stats']
 
 
 def median(lst):
@@ -131,56 +147,162 @@ def build_graph(
         species_id,
         gene_reference,
         compartment_reference,
-        component_database):
+        component_database,
+        reference_index=None,
+        workers=1):
     """Build graph
     - Add nodes and edges
     - Map names to objects in the graph for display
     - Calculate degree for each node
+    - If workers is greater than 1, build contiguous shards of reactions in
+    forked worker processes and merge them in order
     """
 
-    # Initialize graph object
-    G = nx.DiGraph()
-    key_hash = set()
+    if reference_index == None:
+        reference_index = build_reference_index(
+            uniprot_reference=uniprot_reference,
+            ensembl_reference=gene_reference)
+
+    def build_reactions(
+            reactome_ids,
+            key_hash,
+            remove_keys,
+            track=False):
+        # Collect node and edge records to add to the graph in bulk
+        builder = init_graph_builder()
+        complex_cache = {}
+
+        counter = 0
+        reaction_number = len(reactome_ids)
+        for reactome_id in reactome_ids:
+            if track == True:
+                counter = track_progress(
+                    args_dict, counter, reaction_number, 5)
+            builder, _network, key_hash, remove_keys = process_reactions(
+                builder=builder,
+                reactome_id=reactome_id,
+                network=network,
+                species_reference=species_reference,
+                name_reference=name_reference,
+                protein_reference=protein_reference,
+                chebi_dictionary=chebi_dictionary,
+                uniprot_reference=uniprot_reference,
+                complex_reference=complexes,
+                species_id=species_id,
+                gene_reference=gene_reference,
+                compartment_reference=compartment_reference,
+                component_database=component_database,
+                key_hash=key_hash,
+                remove_keys=remove_keys,
+                reference_index=reference_index,
+                complex_cache=complex_cache)
+
+        return builder
+
+    def build_shard(
+            reactome_ids):
+        shard_builder = build_reactions(reactome_ids, {}, [])
+        additional_components = {
+            k: network[k]['additional_components'] for k in reactome_ids}
+
+        return shard_builder, additional_components
+
+    key_hash = {}
     remove_keys = []
+    if workers > 1:
+        # Resolve duplicates before sharding so the same first occurrence of
+        # each reaction is kept as in a serial build
+        for reactome_id in network.keys():
+            signature = reaction_signature(network[reactome_id])
+            if signature in key_hash:
+                remove_keys.append(reactome_id)
+            else:
+                key_hash[signature] = reactome_id
+
+        shards = shard_reactions(
+            reactome_ids=list(key_hash.values()),
+            shard_number=workers)
+        print(
+            'Building ' + str(len(key_hash)) + ' reactions in '
+            + str(len(shards)) + ' shard(s)...')
+        results = run_forked(
+            build_shard,
+            [(x,) for x in shards],
+            max_workers=workers)
+
+        # Merging in shard order gives the same records as a serial build
+        builder = None
+        for shard_builder, additional_components in results:
+            if builder == None:
+                builder = shard_builder
+            else:
+                builder = merge_graph_builder(builder, shard_builder)
+            for k, v in additional_components.items():
+                network[k]['additional_components'] = v
+        progress_feed(args_dict, "graph", 5)
+    else:
+        builder = build_reactions(
+            list(network.keys()),
+            key_hash,
+            remove_keys,
+            track=True)
+    G = commit_graph_builder(builder)
+
+    # Clean up structurally duplicate reactions by ID
+    if len(remove_keys) > 0:
+        print(
+            'Removed ' + str(len(remove_keys))
+            + ' duplicate reaction(s) with the same reactants, products, '
+            + 'modifiers, and compartment as a retained reaction')
+        for k in remove_keys[:10]:
+            print(
+                '\t' + str(k) + ' (duplicate of '
+                + str(key_hash[reaction_signature(network[k])]) + ')')
+        if len(remove_keys) > 10:
+            print('\t...')
 
-    counter = 0
-    reaction_number = len(list(network.keys()))
-    for reactome_id in network.keys():
-        counter = track_progress(args_dict, counter, reaction_number, 5)
-        G, network, key_hash, remove_keys = process_reactions(
-            graph=G,
-            reactome_id=reactome_id,
-            network=network,
-            species_reference=species_reference,
-            name_reference=name_reference,
-            protein_reference=protein_reference,
-            chebi_dictionary=chebi_dictionary,
-            uniprot_reference=uniprot_reference,
-            complex_reference=complexes,
-            species_id=species_id,
-            gene_reference=gene_reference,
-            compartment_reference=compartment_reference,
-            component_database=component_database,
-            key_hash=key_hash,
-            remove_keys=remove_keys)
-
-    # Clean up duplicate reactions by ID
     for k in remove_keys:
         del network[k]
 
+    remove_set = set(remove_keys)
     for k, v in pathway_database.items():
-        reactions = pathway_database[k]['reactions']
-        updated_reactions = []
-        for r in reactions:
-            if r not in remove_keys:
-                updated_reactions.append(r)
-        pathway_database[k]['reactions'] = updated_reactions
+        pathway_database[k]['reactions'] = [
+            r for r in pathway_database[k]['reactions']
+            if r not in remove_set]
 
     return G, network, pathway_database
 
 
+def shard_reactions(
+        reactome_ids,
+        shard_number):
+    """Split reaction IDs into contiguous shards of near-equal size
+    """
+
+    shard_size = int(math.ceil(len(reactome_ids) / max(1, shard_number)))
+
+    return [
+        reactome_ids[x:x + shard_size]
+        for x in range(0, len(reactome_ids), max(1, shard_size))]
+
+
+def reaction_signature(
+        reaction):
+    """Build a canonical structural signature for a reaction
+    - Reactants, products, and modifiers are compared regardless of order
+    - A reversible reaction never matches an irreversible one
+    """
+
+    return (
+        tuple(sorted(reaction['reactants'])),
+        tuple(sorted(reaction['products'])),
+        tuple(sorted(tuple(x) for x in reaction['modifiers'])),
+        reaction['compartment'],
+        reaction['reversible'])
+
+
 def process_reactions(
-        graph,
+        builder,
         reactome_id,
         network,
         species_reference,
@@ -194,19 +316,29 @@ def process_reactions(
         compartment_reference,
         component_database,
         key_hash,
-        remove_keys):
-    """
+        remove_keys,
+        reference_index=None,
+        complex_cache=None):
+    """Add a reaction and its components to the graph builder
+
+    Pass a reference_index from build_reference_index() to avoid rebuilding
+    the UniProt and Ensembl lookups for each reaction, and a complex_cache
+    dictionary shared across reactions to expand each complex only once
+
+    key_hash maps each reaction_signature() to the first reaction ID seen
+    with it; later reactions with the same signature are added to
+    remove_keys
     """
     new_components = []
 
-    # Get reaction name and check if already addded
+    # Check if a reaction with the same structure was already added
     reaction_name = network[reactome_id]['name']
-    sort_name = ''.join(sorted(reaction_name.lower().replace(" ", "")))
+    signature = reaction_signature(network[reactome_id])
 
-    if sort_name in key_hash:
+    if signature in key_hash:
         remove_keys.append(reactome_id)
     else:
-        key_hash.add(sort_name)
+        key_hash[signature] = reactome_id
 
         reaction_id = network[reactome_id]['id']
         reaction_rev = network[reactome_id]['reversible']
@@ -222,28 +354,24 @@ def process_reactions(
             # for non-Reactome models where reactions do not have a compartment annotation
             compartment_name = ''
 
-        prot_ref = {}
-        for k, v in uniprot_reference.items():
-            prot_ref[k] = v
-            prot_ref[v] = k
-        uniprot_reference = prot_ref
-
-        flipped_ensembl = {}
-        for k, v in gene_reference.items():
-            flipped_ensembl[k] = v
-            flipped_ensembl[v] = k
+        if reference_index == None:
+            reference_index = build_reference_index(
+                uniprot_reference=uniprot_reference,
+                ensembl_reference=gene_reference)
+        uniprot_reference = reference_index['uniprot']
+        flipped_ensembl = reference_index['ensembl']
 
         # Add reaction node
-        graph.add_node(reaction_id)
-        graph.nodes()[reaction_id]['id'] = reactome_id
-        graph.nodes()[reaction_id]['map_id'] = 'none'
-        graph.nodes()[reaction_id]['name'] = reaction_name
-        graph.nodes()[reaction_id]['reversible'] = reaction_rev
-        graph.nodes()[reaction_id]['notes'] = reaction_notes
-        graph.nodes()[reaction_id]['type'] = 'reaction'
-        graph.nodes()[reaction_id]['sub_type'] = 'reaction'
-        graph.nodes()[reaction_id]['compartment'] = compartment_id
-        graph.nodes()[reaction_id]['compartment_display'] = compartment_name
+        add_builder_node(builder, reaction_id, {
+            'id': reactome_id,
+            'map_id': 'none',
+            'name': reaction_name,
+            'reversible': reaction_rev,
+            'notes': reaction_notes,
+            'type': 'reaction',
+            'sub_type': 'reaction',
+            'compartment': compartment_id,
+            'compartment_display': compartment_name})
 
         # Add vanilla element nodes and their edges
         for reactant in reactants:
@@ -253,8 +381,8 @@ def process_reactions(
             else:
                 map_id = 'none'
                 
-            graph = add_node_edge(
-                graph=graph,
+            builder = add_node_edge(
+                builder=builder,
                 id=reactant,
                 map_id=map_id,
                 name=component_database[reactant]['name'],
@@ -270,10 +398,10 @@ def process_reactions(
                 compartment_reference=compartment_reference)
 
             if len(component_database[reactant]['hasPart']) > 0:
-                graph.nodes()[reactant]['complex'] = 'true'
-                graph, additional_components = check_complexes(
+                add_builder_node(builder, reactant, {'complex': 'true'})
+                builder, additional_components = check_complexes(
                     species_id=species_id,
-                    graph=graph,
+                    builder=builder,
                     id=reactant,
                     complex_reference=complex_reference,
                     species_reference=species_reference,
@@ -283,11 +411,13 @@ def process_reactions(
                     uniprot_reference=uniprot_reference,
                     gene_reference=gene_reference,
                     component_database=component_database,
-                    compartment_reference=compartment_reference)
+                    compartment_reference=compartment_reference,
+                    reference_index=reference_index,
+                    complex_cache=complex_cache)
                 for x in additional_components:
                     new_components.append(x)
             else:
-                graph.nodes()[reactant]['complex'] = 'false'
+                add_builder_node(builder, reactant, {'complex': 'false'})
 
             if component_database[reactant]['type'] == 'protein_component':
                 try:
@@ -295,8 +425,8 @@ def process_reactions(
                     gene = flipped_ensembl[uniprot_reference[uniprot_id]]
                     new_components.append(gene)
 
-                    graph = add_node_edge(
-                        graph=graph,
+                    builder = add_node_edge(
+                        builder=builder,
                         id=gene,
                         map_id=gene,
                         name=gene_reference[gene],
@@ -320,8 +450,8 @@ def process_reactions(
             else:
                 map_id = 'none'
 
-            graph = add_node_edge(
-                graph=graph,
+            builder = add_node_edge(
+                builder=builder,
                 id=product,
                 map_id=map_id,
                 name=component_database[product]['name'],
@@ -337,10 +467,10 @@ def process_reactions(
                 compartment_reference=compartment_reference)
 
             if len(component_database[product]['hasPart']) > 0:
-                graph.nodes()[product]['complex'] = 'true'
-                graph, additional_components = check_complexes(
+                add_builder_node(builder, product, {'complex': 'true'})
+                builder, additional_components = check_complexes(
                     species_id=species_id,
-                    graph=graph,
+                    builder=builder,
                     id=product,
                     complex_reference=complex_reference,
                     species_reference=species_reference,
@@ -350,11 +480,13 @@ def process_reactions(
                     uniprot_reference=uniprot_reference,
                     gene_reference=gene_reference,
                     component_database=component_database,
-                    compartment_reference=compartment_reference)
+                    compartment_reference=compartment_reference,
+                    reference_index=reference_index,
+                    complex_cache=complex_cache)
                 for x in additional_components:
                     new_components.append(x)
             else:
-                graph.nodes()[product]['complex'] = 'false'
+                add_builder_node(builder, product, {'complex': 'false'})
 
                 if component_database[product]['type'] == 'protein_component':
                     try:
@@ -362,8 +494,8 @@ def process_reactions(
                         gene = flipped_ensembl[uniprot_reference[uniprot_id]]
                         new_components.append(gene)
 
-                        graph = add_node_edge(
-                            graph=graph,
+                        builder = add_node_edge(
+                            builder=builder,
                             id=gene,
                             map_id=gene,
                             name=gene_reference[gene],
@@ -396,8 +528,8 @@ def process_reactions(
             else:
                 map_id = 'none'
 
-            graph = add_node_edge(
-                graph=graph,
+            builder = add_node_edge(
+                builder=builder,
                 id=id,
                 map_id=map_id,
                 name=component_database[id]['name'],
@@ -413,10 +545,10 @@ def process_reactions(
                 compartment_reference=compartment_reference)
 
             if len(component_database[id]['hasPart']) > 0:
-                graph.nodes()[id]['complex'] = 'true'
-                graph, additional_components = check_complexes(
+                add_builder_node(builder, id, {'complex': 'true'})
+                builder, additional_components = check_complexes(
                     species_id=species_id,
-                    graph=graph,
+                    builder=builder,
                     id=id,
                     complex_reference=complex_reference,
                     species_reference=species_reference,
@@ -426,19 +558,21 @@ def process_reactions(
                     uniprot_reference=uniprot_reference,
                     gene_reference=gene_reference,
                     component_database=component_database,
-                    compartment_reference=compartment_reference)
+                    compartment_reference=compartment_reference,
+                    reference_index=reference_index,
+                    complex_cache=complex_cache)
                 for x in additional_components:
                     new_components.append(x)
             else:
-                graph.nodes()[id]['complex'] = 'false'
+                add_builder_node(builder, id, {'complex': 'false'})
 
                 if component_database[id]['type'] == 'protein_component':
                     try:
                         uniprot_id = component_database[id]['is']
                         gene = flipped_ensembl[uniprot_reference[uniprot_id]]
                         new_components.append(gene)
-                        graph = add_node_edge(
-                            graph=graph,
+                        builder = add_node_edge(
+                            builder=builder,
                             id=gene,
                             map_id=gene,
                             name=gene_reference[gene],
@@ -457,11 +591,85 @@ def process_reactions(
 
         network[reactome_id]['additional_components'] = new_components
 
-    return graph, network, key_hash, remove_keys
+    return builder, network, key_hash, remove_keys
+
+
+def init_graph_builder():
+    """Initialize node and edge records for bulk graph building
+    """
+
+    return {
+        'nodes': {},
+        'edges': {}}
+
+
+def add_builder_node(
+        builder,
+        id,
+        attributes):
+    """Add or update a node record in the graph builder
+    - Later attribute values replace earlier ones, as with graph.nodes()
+    """
+
+    if id in builder['nodes']:
+        builder['nodes'][id].update(attributes)
+    else:
+        builder['nodes'][id] = dict(attributes)
+
+    return builder
+
+
+def add_builder_edge(
+        builder,
+        source,
+        target,
+        attributes):
+    """Add or update an edge record in the graph builder
+    """
+
+    edge = (source, target)
+    if edge in builder['edges']:
+        builder['edges'][edge].update(attributes)
+    else:
+        builder['edges'][edge] = dict(attributes)
+
+    return builder
+
+
+def commit_graph_builder(
+        builder,
+        graph=None):
+    """Add all node and edge records to a graph in two bulk calls
+    - Nodes and edges keep the order in which they were first recorded
+    """
+
+    if graph == None:
+        graph = nx.DiGraph()
+
+    graph.add_nodes_from(builder['nodes'].items())
+    graph.add_edges_from(
+        (edge[0], edge[1], attributes)
+        for edge, attributes in builder['edges'].items())
+
+    return graph
+
+
+def merge_graph_builder(
+        builder,
+        other):
+    """Add the node and edge records of another builder to a graph builder
+    """
+
+    for id, attributes in other['nodes'].items():
+        add_builder_node(builder, id, attributes)
+    for edge, attributes in other['edges'].items():
+        add_builder_edge(builder, edge[0], edge[1], attributes)
+
+    return builder
 
 
 def add_node_edge(
-        graph,
+        builder,
         id,  # node id
         map_id,  # used for mapping user data
         name,
@@ -475,60 +683,43 @@ def add_node_edge(
         name_reference,
         protein_reference,
         compartment_reference):
-    """Add node and edge information to graph
+    """Add node and edge records to the graph builder
     """
 
-    graph.add_node(id)
-    graph.nodes()[id]['id'] = id
-    graph.nodes()[id]['map_id'] = map_id
-    graph.nodes()[id]['name'] = name
-    graph.nodes()[id]['type'] = type
-    graph.nodes()[id]['sub_type'] = sub_type
-    graph.nodes()[id]['inferred'] = 'false'
     try:
-        graph.nodes()[id]['compartment'] = compartment
-        graph.nodes()[
-            id]['compartment_display'] = compartment_reference[compartment]
+        compartment_display = compartment_reference[compartment]
     except:
-        graph.nodes()[id]['compartment'] = 'none'
-        graph.nodes()[id]['compartment_display'] = 'none'
-
-    if type == 'reactant':
-        graph.add_edges_from([
-            (id, reaction_membership)])
-        graph.edges()[(id, reaction_membership)]['type'] = type
-        graph.edges()[(id, reaction_membership)]['sub_type'] = sub_type
-
+        compartment = compartment_display = 'none'
+
+    add_builder_node(builder, id, {
+        'id': id,
+        'map_id': map_id,
+        'name': name,
+        'type': type,
+        'sub_type': sub_type,
+        'inferred': 'false',
+        'compartment': compartment,
+        'compartment_display': compartment_display})
+
+    edge = {
+        'type': type,
+        'sub_type': sub_type}
+    if type == 'product':
+        add_builder_edge(builder, reaction_membership, id, edge)
         if reversible == 'true':
-            graph.add_edges_from([
-                (reaction_membership, id)])
-            graph.edges()[(reaction_membership, id)]['type'] = type
-            graph.edges()[(reaction_membership, id)]['sub_type'] = sub_type
-
-    elif type == 'product':
-        graph.add_edges_from([
-            (reaction_membership, id)])
-        graph.edges()[(reaction_membership, id)]['type'] = type
-        graph.edges()[(reaction_membership, id)]['sub_type'] = sub_type
-
-        if reversible == 'true':
-            graph.add_edges_from([
-                (id, reaction_membership)])
-            graph.edges()[(id, reaction_membership)]['type'] = type
-            graph.edges()[(id, reaction_membership)]['sub_type'] = sub_type
+            add_builder_edge(builder, id, reaction_membership, edge)
 
     else:
-        graph.add_edges_from([
-            (id, reaction_membership)])
-        graph.edges()[(id, reaction_membership)]['type'] = type
-        graph.edges()[(id, reaction_membership)]['sub_type'] = sub_type
+        add_builder_edge(builder, id, reaction_membership, edge)
+        if type == 'reactant' and reversible == 'true':
+            add_builder_edge(builder, reaction_membership, id, edge)
 
-    return graph
+    return builder
 
 
 def check_complexes(
         species_id,
-        graph,
+        builder,
         id,
         complex_reference,
         species_reference,
@@ -538,13 +729,30 @@ def check_complexes(
         uniprot_reference,
         gene_reference,
         component_database,
-        compartment_reference):
+        compartment_reference,
+        reference_index=None,
+        complex_cache=None):
     """Check if species being added is in complex dictionary
     - If record exists, add nodes and edges for the new relationship.
     - If record contains a UniProt ID, cross reference with Ensembl database
     - If complex, label true; else label as false
+    - If a complex_cache is provided, replay the records of a complex that
+    was already expanded instead of expanding it again
     """
 
+    if complex_cache != None and id in complex_cache:
+        records, add_components = complex_cache[id]
+        builder = merge_graph_builder(builder, records)
+        return builder, list(add_components)
+
+    if reference_index != None:
+        uniprot_reference = reference_index['uniprot']
+
+    # Expand into a separate builder so the records can be cached
+    complex_builder = builder
+    if complex_cache != None:
+        builder = init_graph_builder()
+
     add_components = []
 
     for x in component_database[id]['hasPart']:
@@ -556,8 +764,8 @@ def check_complexes(
             add_components.append(x)
             display_name = uniprot_reference[x]
 
-            graph = add_node_edge(
-                graph=graph,
+            builder = add_node_edge(
+                builder=builder,
                 id=x,
                 map_id=x,
                 name=display_name,
@@ -580,8 +788,8 @@ def check_complexes(
                     gene = name = display_name
                 add_components.append(gene)
 
-                graph = add_node_edge(
-                    graph=graph,
+                builder = add_node_edge(
+                    builder=builder,
                     id=gene,
                     map_id=gene,
                     name=name,
@@ -632,8 +840,8 @@ def check_complexes(
 
             add_components.append(component_id)
 
-            graph = add_node_edge(
-                graph=graph,
+            builder = add_node_edge(
+                builder=builder,
                 id=component_id,
                 map_id=map_id,
                 name=display_name,
@@ -648,7 +856,12 @@ def check_complexes(
                 protein_reference=protein_reference,
                 compartment_reference=compartment_reference)
 
-    return graph, add_components
+    if complex_cache != None:
+        complex_cache[id] = (builder, add_components)
+        builder = merge_graph_builder(complex_builder, builder)
+        add_components = list(add_components)
+
+    return builder, add_components
 
 
 def uniprot_ensembl_reference(
@@ -668,26 +881,57 @@ def uniprot_ensembl_reference(
     return new_dict
 
 
+def build_reference_index(
+        uniprot_reference,
+        ensembl_reference):
+    """Build the UniProt and Ensembl lookups used while building the network
+    once, so they can be shared across reactions and complexes
+
+    - uniprot: UniProt ID to name and name to UniProt ID
+    - ensembl: Ensembl ID to name and name to Ensembl ID
+    - reverse_genes: gene name to Ensembl ID
+    - protein_genes: UniProt ID to Ensembl ID
+    """
+
+    uniprot = {}
+    for k, v in uniprot_reference.items():
+        uniprot[k] = v
+        uniprot[v] = k
+
+    ensembl = {}
+    for k, v in ensembl_reference.items():
+        ensembl[k] = v
+        ensembl[v] = k
+
+    reverse_genes = {v: k for k, v in ensembl_reference.items()}
+    protein_genes = uniprot_ensembl_reference(
+        uniprot_reference=uniprot_reference,
+        ensembl_reference=reverse_genes)
+
+    return {
+        'uniprot': uniprot,
+        'ensembl': ensembl,
+        'reverse_genes': reverse_genes,
+        'protein_genes': protein_genes}
+
+
 def reindex_data(
         data,
         stats):
     """Fix duplicate labels, etc
     """
 
-    data_renamed = data.copy()
-    data_renamed = data_renamed.loc[data_renamed.dropna(
+    data_renamed = data.loc[data.dropna(
         axis=0).index.drop_duplicates(keep=False)]
     d_cols = data_renamed.columns
-    data_renamed[d_cols] = data_renamed[d_cols].apply(
-        pd.to_numeric, errors='coerce')
+    if not all(pd.api.types.is_numeric_dtype(data_renamed[x]) for x in d_cols):
+        data_renamed[d_cols] = data_renamed[d_cols].apply(
+            pd.to_numeric, errors='coerce')
 
-    stats_renamed = stats.copy()
-    stats_renamed = stats_renamed.loc[stats_renamed.dropna(
+    stats_renamed = stats.loc[stats.dropna(
         axis=0).index.drop_duplicates(keep=False)]
     s_cols = stats_renamed.columns
-    
-    # Only force stats to numeric if not list type (list type indicates confidence interval arrays)
-    if type(stats_renamed.iloc[0,0]) != list:
+    if not all(pd.api.types.is_numeric_dtype(stats_renamed[x]) for x in s_cols):
         stats_renamed[s_cols] = stats_renamed[s_cols].apply(
             pd.to_numeric, errors='coerce')
 
@@ -792,8 +1036,8 @@ def prepare_mapping_data(graph, data, stats):
     data_renamed, stats_renamed = reindex_data(data, stats)
     data_max = abs(data_renamed).max().max()
     
-    # Allow for lists of stats
-    if type(stats_renamed.iloc[0,0]) == list:
+    # Allow for confidence interval stats
+    if is_interval_stats(stats_renamed):
         stats_logged = -1 
         stats_max = -1 
     else:
@@ -834,10 +1078,17 @@ def map_attributes(
         chebi_synonyms,
         uniprot_mapper,
         metabolite_mapper,
-        ignore_enantiomers=True):
+        ignore_enantiomers=True,
+        chunk_size=CHUNK_SIZE):
     """Data overlay
     - Map repo id to species_id
     - If a node is a complex, take average of neighbors that are not
+    - Nodes are first matched to data rows, then values, colors, and stats
+    are attached in chunks of chunk_size columns
+    - Chunking only bounds the arrays built while attaching; the prepared
+    data and the broadcast step still hold every column
+    - Unmapped and reaction nodes get their own values and stats lists, but
+    share their placeholder color lists, which are only ever replaced
     To do:
     - Currently, many metabolites that should map are not found in name
     database
@@ -851,9 +1102,39 @@ def map_attributes(
         data=data,
         stats=stats)
     print("Pre-processed data dimensions: " + str(data_renamed.shape))
-    
+
+    data_index = data_renamed.index.tolist()
+    data_labels = set(data_index)
+    stats_labels = set(stats_renamed.index.tolist())
+    temp_lookup = {}
+    for i, t in enumerate(temp_idx):
+        if t not in temp_lookup:
+            temp_lookup[t] = i
+
+    missing_values = [None for x in range(n)]
+    missing_colors = [MISSING_COLOR for x in range(n)]
+    missing_js = convert_rgba(rgba_tuples=missing_colors)
+    reaction_colors = [REACTION_COLOR for x in range(n)]
+    reaction_js = convert_rgba(rgba_tuples=reaction_colors)
+
+    mapped = []
     mapped_nodes = []
 
+    def add_mapping(x, label):
+        graph.nodes()[x]['user_label'] = label
+        graph.nodes()[x]['values'] = []
+        graph.nodes()[x]['values_rgba'] = []
+        graph.nodes()[x]['values_js'] = []
+        graph.nodes()[x]['stats'] = []
+        mapped.append((x, label))
+        mapped_nodes.append(label)
+
+    def add_missing(x):
+        graph.nodes()[x]['values'] = list(missing_values)
+        graph.nodes()[x]['values_rgba'] = missing_colors
+        graph.nodes()[x]['values_js'] = missing_js
+        graph.nodes()[x]['stats'] = list(missing_values)
+
     counter = 0
     node_number = len(list(graph.nodes()))
 
@@ -911,44 +1192,24 @@ def map_attributes(
             
         if graph.nodes()[x]['sub_type'] == 'reaction':
             graph.nodes()[x]['type'] = 'reaction'
-            colors = [REACTION_COLOR for x in range(n)]
-            graph.nodes()[x]['values'] = [None for x in range(n)]
-            graph.nodes()[x]['values_rgba'] = colors
-            graph.nodes()[x]['values_js'] = convert_rgba(
-                rgba_tuples=colors)
-            graph.nodes()[x]['stats'] = [None for x in range(n)]
-
-        elif map_id in set(data_renamed.index.tolist()) \
-        and map_id in set(stats_renamed.index.tolist()) \
+            graph.nodes()[x]['values'] = list(missing_values)
+            graph.nodes()[x]['values_rgba'] = reaction_colors
+            graph.nodes()[x]['values_js'] = reaction_js
+            graph.nodes()[x]['stats'] = list(missing_values)
+
+        elif map_id in data_labels \
+        and map_id in stats_labels \
         and map_id != 'none' \
         and len(map_id) > 1 \
         and graph.nodes()[x]['type'] != 'metabolite_component':
-            graph.nodes()[x]['user_label'] = map_id
-            graph.nodes()[x]['values'] = data_renamed.loc[map_id].tolist()
-            graph.nodes()[x]['values_rgba'] = extract_value(
-                value_array=data_renamed.loc[map_id].tolist(),
-                max_value=data_max)
-            graph.nodes()[x]['values_js'] = convert_rgba(
-                rgba_tuples=graph.nodes()[x]['values_rgba'])
-            graph.nodes()[x]['stats'] = stats_renamed.loc[map_id].tolist()
-            mapped_nodes.append(map_id)
-
-        elif backup_mapper in set(data_renamed.index.tolist()) \
-        and backup_mapper in set(stats_renamed.index.tolist()) \
+            add_mapping(x, map_id)
+
+        elif backup_mapper in data_labels \
+        and backup_mapper in stats_labels \
         and backup_mapper != 'none' \
         and len(backup_mapper) > 1 \
         and graph.nodes()[x]['type'] != 'metabolite_component':
-            graph.nodes()[x]['user_label'] = backup_mapper
-            graph.nodes()[
-                x]['values'] = data_renamed.loc[backup_mapper].tolist()
-            graph.nodes()[x]['values_rgba'] = extract_value(
-                value_array=data_renamed.loc[backup_mapper].tolist(),
-                max_value=data_max)
-            graph.nodes()[x]['values_js'] = convert_rgba(
-                rgba_tuples=graph.nodes()[x]['values_rgba'])
-            graph.nodes()[
-                x]['stats'] = stats_renamed.loc[backup_mapper].tolist()
-            mapped_nodes.append(backup_mapper)
+            add_mapping(x, backup_mapper)
 
         # elif map_id in chebi_synonyms
         elif ('chebi' in map_id.lower() or map_id in chebi_synonyms) \
@@ -961,20 +1222,19 @@ def map_attributes(
             for a in all_synonyms:
                 _a = ''.join(c.lower() for c in a if c.isalnum())
                 if _a in temp_idx_set:
-                    _idx = data_renamed.index.tolist()[
-                        temp_idx.index(_a)]
+                    _idx = data_index[temp_lookup[_a]]
                 elif ignore_enantiomers == True:
-                    if 'D-' + str(a) in data_renamed.index.tolist():
+                    if 'D-' + str(a) in data_labels:
                         _idx = 'D-' + str(a)
-                    if 'd-' + str(a) in data_renamed.index.tolist():
+                    if 'd-' + str(a) in data_labels:
                         _idx = 'd-' + str(a)
-                    if 'L-' + str(a) in data_renamed.index.tolist():
+                    if 'L-' + str(a) in data_labels:
                         _idx = 'L-' + str(a)
-                    if 'l-' + str(a) in data_renamed.index.tolist():
+                    if 'l-' + str(a) in data_labels:
                         _idx = 'l-' + str(a)
-                    if 'N-' + str(a) in data_renamed.index.tolist():
+                    if 'N-' + str(a) in data_labels:
                         _idx = 'N-' + str(a)
-                    if 'n-' + str(a) in data_renamed.index.tolist():
+                    if 'n-' + str(a) in data_labels:
                         _idx = 'n-' + str(a)
                 else:
                     pass
@@ -985,49 +1245,110 @@ def map_attributes(
 
             if _idx != None \
             and len(_idx) > 1:
-                graph.nodes()[x]['user_label'] = _idx
-                graph.nodes()[x]['values'] = data_renamed.loc[_idx].tolist()
-                graph.nodes()[x]['values_rgba'] = extract_value(
-                    value_array=data_renamed.loc[_idx].tolist(),
-                    max_value=data_max)
-                graph.nodes()[x]['values_js'] = convert_rgba(
-                    rgba_tuples=graph.nodes()[x]['values_rgba'])
-                graph.nodes()[x]['stats'] = stats_renamed.loc[_idx].tolist()
-                mapped_nodes.append(_idx)
-            elif map_id in set(data_renamed.index.tolist()) \
-            and map_id in set(stats_renamed.index.tolist()) \
+                add_mapping(x, _idx)
+            elif map_id in data_labels \
+            and map_id in stats_labels \
             and map_id != 'none' \
             and len(map_id) > 1:
-                graph.nodes()[x]['user_label'] = map_id
-                graph.nodes()[x]['values'] = data_renamed.loc[map_id].tolist()
-                graph.nodes()[x]['values_rgba'] = extract_value(
-                    value_array=data_renamed.loc[map_id].tolist(),
-                    max_value=data_max)
-                graph.nodes()[x]['values_js'] = convert_rgba(
-                    rgba_tuples=graph.nodes()[x]['values_rgba'])
-                graph.nodes()[x]['stats'] = stats_renamed.loc[map_id].tolist()
-                mapped_nodes.append(map_id)
+                add_mapping(x, map_id)
             else:
-                colors = [MISSING_COLOR for x in range(n)]
-                graph.nodes()[x]['values'] = [None for x in range(n)]
-                graph.nodes()[x]['values_rgba'] = colors
-                graph.nodes()[x]['values_js'] = convert_rgba(
-                    rgba_tuples=colors)
-                graph.nodes()[x]['stats'] = [None for x in range(n)]
+                add_missing(x)
 
         else:
-            colors = [MISSING_COLOR for x in range(n)]
-            graph.nodes()[x]['values'] = [None for x in range(n)]
-            graph.nodes()[x]['values_rgba'] = colors
-            graph.nodes()[x]['values_js'] = convert_rgba(
-                rgba_tuples=colors)
-            graph.nodes()[x]['stats'] = [None for x in range(n)]
+            add_missing(x)
+
+    # Attach values, colors, and stats to mapped nodes by column chunk
+    attach_chunks(
+        graph=graph,
+        mapped=mapped,
+        data=data_renamed,
+        stats=stats_renamed,
+        max_value=data_max,
+        chunk_size=chunk_size)
 
+    mapped_nodes = set(mapped_nodes)
     non_mappers = [x for x in data.index.tolist() if x not in mapped_nodes]
 
     return graph, data_max, stats_max, non_mappers
 
 
+def attach_chunks(
+        graph,
+        mapped,
+        data,
+        stats,
+        max_value,
+        chunk_size=CHUNK_SIZE):
+    """Attach data columns to mapped nodes, chunk_size columns at a time
+    - mapped is a list of (node, data label) pairs
+    - Working arrays are bounded by the chunk, and per-node lists are
+    extended as each chunk is processed
+    """
+
+    if len(mapped) == 0:
+        return graph
+
+    nodes = [x for x, label in mapped]
+    labels = [label for x, label in mapped]
+    data_rows = data.index.get_indexer(labels)
+    stats_rows = stats.index.get_indexer(labels)
+    if (stats_rows < 0).any():
+        raise KeyError(labels[np.nonzero(stats_rows < 0)[0][0]])
+
+    # Keep the dtype a whole row would have, whatever the chunk holds
+    data_dtype = np.result_type(*data.dtypes.tolist())
+    stats_dtype = np.result_type(*stats.dtypes.tolist())
+    interval = is_interval_stats(stats)
+    bounds = 2 if interval else 1
+
+    n = len(data.columns)
+    chunk_size = max(1, int(chunk_size))
+    for start in range(0, n, chunk_size):
+        end = min(start + chunk_size, n)
+
+        values = data.iloc[data_rows, start:end].to_numpy(dtype=data_dtype)
+        colors = get_color_index(values, max_value).tolist()
+        values = values.tolist()
+        stats_chunk = stats.iloc[
+            stats_rows, start * bounds:end * bounds]
+        if interval:
+            stats_chunk = get_interval_array(stats_chunk).tolist()
+        else:
+            stats_chunk = stats_chunk.to_numpy(dtype=stats_dtype).tolist()
+
+        for i, x in enumerate(nodes):
+            graph.nodes()[x]['values'].extend(values[i])
+            graph.nodes()[x]['values_rgba'].extend(
+                [CMAP_RGBA[c] for c in colors[i]])
+            graph.nodes()[x]['values_js'].extend(
+                [CMAP_JS[c] for c in colors[i]])
+            graph.nodes()[x]['stats'].extend(stats_chunk[i])
+
+    return graph
+
+
+def get_color_index(
+        values,
+        max_value):
+    """Get colormap positions for an array of values
+    - Positions are rounded to three decimals and take the closest color
+    key at or below them
+    """
+
+    values = np.asarray(values, dtype=np.float64)
+    max_value = float(max_value)
+    positions = (values + max_value) / (2 * max_value)
+
+    # Round values near a tie as Python's round() does
+    scaled = positions * 1000
+    steps = np.rint(scaled)
+    ties = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for i in zip(*np.nonzero(ties)):
+        steps[i] = round(round(float(positions[i]), 3) * 1000)
+
+    return np.searchsorted(CMAP_STEPS, steps, side='right') - 1
+
+
 def extract_value(
         value_array,
         max_value,
@@ -1035,19 +1356,8 @@ def extract_value(
     """Extract expression value
     """
 
-    def get_key_value(d, key):
-        if key in d:
-            return d[key]
-        else:
-            return d[max([x for x in d.keys() if x < key])]
-
-    rgba = []
-    for x in value_array:
-        position = (x + max_value) / (2 * max_value)
-        rgba_tuple = get_key_value(CMAP, round(position, 3))
-        rgba.append(tuple(rgba_tuple))
-
-    return rgba
+    return [
+        CMAP_RGBA[x] for x in get_color_index(value_array, max_value)]
 
 
 def output_graph(
@@ -1068,11 +1378,19 @@ def output_graph(
         blocklist,
         species_blocklist,
         metadata,
-        unmapped):
+        unmapped,
+        encode_categories=False):
     """Output graph and necessary metadata
+    - If encode_categories is True, categorical node and edge attributes are
+    written as integer codes with their vocabularies (see
+    encode_node_link())
+    - Only graph templates are encoded; the final graph keeps its strings
+    because the Metaboverse app reads them directly
     """
 
     data = json_graph.node_link_data(graph)
+    if encode_categories == True:
+        data = encode_node_link(data)
     data['pathway_dictionary'] = pathway_dictionary
     data['collapsed_pathway_dictionary'] = collapsed_pathway_dictionary
     data['super_pathways'] = super_pathways
@@ -1125,6 +1443,24 @@ def compile_node_degrees(
     return d
 
 
+def get_degree_threshold(
+        degree_dictionary,
+        percentile=98):
+    """Degree above which a non-reaction node is treated as a hub
+    """
+
+    degrees = []
+    for k in degree_dictionary.keys():
+        if 'reaction' not in k:
+            degrees.append(degree_dictionary[k])
+    if len(degrees) > 0:
+        degree_threshold = np.percentile(degrees, percentile)
+    else:
+        degree_threshold = 0
+
+    return degree_threshold
+
+
 def remove_nulls(values):
 
     if all(None in v for v in values) == True:
@@ -1155,11 +1491,28 @@ def infer_protein_values(values, length):
     return protein_vals
 
 
+def geometric_mean(values):
+    """Same result as scipy.stats.gmean for a list, without its call overhead
+    """
+
+    with np.errstate(divide='ignore'):
+        return np.exp(np.mean(np.log(np.asarray(values, dtype=np.float64))))
+
+
 def infer_protein_stats(stats, length, stat_type="float"):
 
-    # Do not infer confidence intervals
+    # Take the median of each bound for confidence intervals
     if stat_type == "array":
-        protein_stats = [None for x in range(length)]
+        protein_stats = []
+        for i in range(length):
+
+            pos = [stats[j][i] for j in range(len(stats))
+                   if stats[j][i] != None]
+            if len(pos) > 0:
+                protein_stats.append(
+                    np.median(np.array(pos, dtype=np.float64), axis=0).tolist())
+            else:
+                protein_stats.append(None)
     else:
         protein_stats = []
         for i in range(length):
@@ -1174,7 +1527,7 @@ def infer_protein_stats(stats, length, stat_type="float"):
             if len(pos) == 1:
                 this_stat = pos[0]
             else:
-                this_stat = (math.e * gmean(pos))
+                this_stat = (math.e * geometric_mean(pos))
 
             if this_stat > 1.0:
                 this_stat = 1.0
@@ -1450,15 +1803,18 @@ def load_references(
         ensembl,
         uniprot,
         chebi,
-        uniprot_metabolites):
+        uniprot_metabolites,
+        reference_index=None):
     """Load and prepare reference databases
     """
 
     # Prepare uniprot to ensembl name mapper
-    reverse_genes = {v: k for k, v in ensembl.items()}
-    protein_dictionary = uniprot_ensembl_reference(
-        uniprot_reference=uniprot,
-        ensembl_reference=reverse_genes)
+    if reference_index == None:
+        reference_index = build_reference_index(
+            uniprot_reference=uniprot,
+            ensembl_reference=ensembl)
+    reverse_genes = reference_index['reverse_genes']
+    protein_dictionary = reference_index['protein_genes']
     progress_feed(args_dict, "graph", 1)
 
     chebi_dictionary = build_chebi_reference(
@@ -1493,17 +1849,26 @@ def __template__(
         template=True)
 
     print('Preparing references...')
+    reference_index = build_reference_index(
+        uniprot_reference=network['uniprot_synonyms'],
+        ensembl_reference=network['ensembl_synonyms'])
     reverse_genes, protein_dictionary, chebi_dictionary, \
         name_reference, uniprot_mapper = load_references(
             args_dict=args_dict,
             ensembl=network['ensembl_synonyms'],
             uniprot=network['uniprot_synonyms'],
             chebi=network['chebi_mapper'],
-            uniprot_metabolites=network['uniprot_metabolites'])
+            uniprot_metabolites=network['uniprot_metabolites'],
+            reference_index=reference_index)
     metabolite_mapper = load_metabolite_synonym_dictionary()
 
     # Generate graph and name mapping
     print('Building network...')
+    if 'workers' in args_dict \
+            and args_dict['workers'] != None:
+        workers = int(args_dict['workers'])
+    else:
+        workers = 1
     G, network['reaction_database'], network['pathway_database'] = build_graph(
         args_dict=args_dict,
         network=network['reaction_database'],
@@ -1517,7 +1882,9 @@ def __template__(
         species_id=species_id,
         gene_reference=network['ensembl_synonyms'],
         compartment_reference=network['compartment_dictionary'],
-        component_database=network['components_database'])
+        component_database=network['components_database'],
+        reference_index=reference_index,
+        workers=workers)
     # additional_reactions=args_dict['additional_reactions'])
     progress_feed(args_dict, "graph", 1)
 
@@ -1561,45 +1928,39 @@ def __template__(
         blocklist=args_dict['blocklist'],
         species_blocklist=[],
         metadata=args_dict,
-        unmapped=[])
+        unmapped=[],
+        encode_categories=True)
     print('Graphing complete.')
 
     return G, args_dict, network, name_reference, degree_dictionary, \
         super_pathways, chebi_dictionary, uniprot_mapper, metabolite_mapper
 
 
-def __model__(
-        graph,
+def map_data(
         args_dict,
+        graph,
         network,
         data,
         stats,
-        species_id,
-        output_file,
-        neighbors_dictionary,
         name_reference,
         degree_dictionary,
         chebi_dictionary,
         uniprot_mapper,
         metabolite_mapper,
-        super_pathways,
-        unmapped,
         flag_data=False):
-    """Generate graph object for visualization
+    """Map user data onto the graph
+    - Returns the mapped attributes of each node with the data summaries
+    used downstream, which apply_mapping() can restore onto the same
+    template graph without the data
     """
 
-    # Generate output file name
-    graph_name = name_graph(
-        output_file=output_file,
-        species_id=species_id)
-
-    print('Post-processing graph metadata...')
-    # Remove disease reactions that are "defective" from reaction collapse
-    no_defective_reactions = remove_defective_reactions(
-        network=network)
-
     print('Mapping user data...')
-    G, max_value, max_stat, non_mappers = map_attributes(
+    if 'chunk_size' in args_dict \
+            and args_dict['chunk_size'] != None:
+        chunk_size = int(args_dict['chunk_size'])
+    else:
+        chunk_size = CHUNK_SIZE
+    graph, max_value, max_stat, non_mappers = map_attributes(
         args_dict=args_dict,
         graph=graph,
         data=data,
@@ -1609,22 +1970,112 @@ def __model__(
         chebi_dictionary=chebi_dictionary,
         chebi_synonyms=network['chebi_synonyms'],
         uniprot_mapper=uniprot_mapper,
-        metabolite_mapper=metabolite_mapper)
+        metabolite_mapper=metabolite_mapper,
+        chunk_size=chunk_size)
     
     print('Outputting unmapped metabolomics values (if any exist)...')
     if args_dict['metabolomics'].lower() != 'none':
-        m_data = pd.read_csv(
-            args_dict['metabolomics'],
-            sep='\t',
-            index_col=0)
+        m_data = read_table(args_dict['metabolomics'])
 
         m_non_mapper = m_data[m_data.index.isin(non_mappers)]
         print("\t- Outputting " + str(len(m_non_mapper.index.tolist())) + " unmapped metabolites for reference.")
         if len(m_non_mapper.index.tolist()) > 0:
             m_non_mapper.to_csv(
-                args_dict['metabolomics'][:-4] + '_unmapped.txt',
+                strip_suffix(args_dict['metabolomics']) + '_unmapped.txt',
                 sep='\t')
 
+    if flag_data == True:
+        max_value = 5
+        max_stat = 1
+
+    if is_interval_stats(stats):
+        stat_type = 'array'
+    else:
+        stat_type = 'float'
+
+    nodes = {}
+    for x in graph.nodes():
+        nodes[x] = {
+            k: graph.nodes()[x][k] for k in MAPPED_ATTRIBUTES
+            if k in graph.nodes()[x]}
+
+    return {
+        'nodes': nodes,
+        'max_value': max_value,
+        'max_stat': max_stat,
+        'non_mappers': non_mappers,
+        'categories': data.columns.tolist(),
+        'stat_type': stat_type}
+
+
+def apply_mapping(
+        graph,
+        mapping):
+    """Restore node attributes from map_data() onto a template graph
+    """
+
+    for x, attributes in mapping['nodes'].items():
+        graph.nodes()[x].update(attributes)
+
+    return graph
+
+
+def __model__(
+        graph,
+        args_dict,
+        network,
+        data,
+        stats,
+        species_id,
+        output_file,
+        neighbors_dictionary,
+        name_reference,
+        degree_dictionary,
+        chebi_dictionary,
+        uniprot_mapper,
+        metabolite_mapper,
+        super_pathways,
+        unmapped,
+        flag_data=False,
+        mapping=None):
+    """Generate graph object for visualization
+    - mapping is the output of map_data(); if given, data and stats are not
+    used and the graph is expected to be a fresh copy of the template
+    """
+
+    # Generate output file name
+    graph_name = name_graph(
+        output_file=output_file,
+        species_id=species_id)
+
+    print('Post-processing graph metadata...')
+    # Remove disease reactions that are "defective" from reaction collapse
+    no_defective_reactions = remove_defective_reactions(
+        network=network)
+
+    if mapping == None:
+        mapping = map_data(
+            args_dict=args_dict,
+            graph=graph,
+            network=network,
+            data=data,
+            stats=stats,
+            name_reference=name_reference,
+            degree_dictionary=degree_dictionary,
+            chebi_dictionary=chebi_dictionary,
+            uniprot_mapper=uniprot_mapper,
+            metabolite_mapper=metabolite_mapper,
+            flag_data=flag_data)
+    else:
+        print('Restoring mapped user data...')
+        apply_mapping(
+            graph=graph,
+            mapping=mapping)
+    G = graph
+    max_value = mapping['max_value']
+    max_stat = mapping['max_stat']
+    non_mappers = mapping['non_mappers']
+
     print('Broadcasting values where available...')
     if 'broadcast_genes' in args_dict \
             and args_dict['broadcast_genes'] == True:
@@ -1638,15 +2089,8 @@ def __model__(
     else:
         broadcast_metabolites = False
 
-    if flag_data == True:
-        max_value = 5
-        max_stat = 1
-
-    categories = data.columns.tolist()
-    if type(stats.iloc[0,0]) == list:
-        args_dict["stat_type"] = 'array'
-    else:
-        args_dict["stat_type"] = 'float'
+    categories = mapping['categories']
+    args_dict["stat_type"] = mapping['stat_type']
     G = broadcast_values(
         args_dict=args_dict,
         graph=G,
@@ -1660,15 +2104,8 @@ def __model__(
 
     print('Compiling collapsed reaction reference...')
     # Get hub threshold
-    degrees = []
-    for k in degree_dictionary.keys():
-        if 'reaction' not in k:
-            degrees.append(degree_dictionary[k])
-    if len(degrees) > 0:
-        degree_threshold = np.percentile(degrees, 98)
-    else:
-        degree_threshold = 0
-
+    degree_threshold = get_degree_threshold(
+        degree_dictionary=degree_dictionary)
 
     if 'blocklist' in args_dict \
             and isinstance(args_dict['blocklist'], str):
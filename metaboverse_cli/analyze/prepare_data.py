@@ -34,10 +34,50 @@ import ast
 import sys
 import re
 
+"""Import internal dependencies
+"""
+try:
+    from analyze.utils import make_interval_stats, is_interval_stats, \
+                              INTERVAL_BOUNDS, read_table, strip_suffix
+except:
+    import os
+    import importlib.util
+    spec = importlib.util.spec_from_file_location(
+        "", os.path.abspath("./metaboverse_cli/analyze/utils.py"))
+    analyze_utils = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(analyze_utils)
+    make_interval_stats = analyze_utils.make_interval_stats
+    is_interval_stats = analyze_utils.is_interval_stats
+    INTERVAL_BOUNDS = analyze_utils.INTERVAL_BOUNDS
+    read_table = analyze_utils.read_table
+    strip_suffix = analyze_utils.strip_suffix
+
 
 def eval_table(table):
-    
-    return table.applymap(lambda x: ast.literal_eval(str(x)))
+    """Parse table cells into numbers, or lists of numbers for intervals
+    - Float columns are kept as they are, and integers or text that reads as
+    numbers become float64
+    - Only the remaining text columns are parsed as literals
+    """
+
+    if all(pd.api.types.is_float_dtype(table[x]) for x in table.columns):
+        return table
+
+    table = table.copy()
+    for column in table.columns:
+        if pd.api.types.is_float_dtype(table[column]):
+            continue
+        if pd.api.types.is_numeric_dtype(table[column]):
+            table[column] = table[column].astype(np.float64)
+            continue
+        numeric = pd.to_numeric(table[column], errors='coerce')
+        if numeric.notna().sum() == table[column].notna().sum():
+            table[column] = numeric.astype(np.float64)
+        else:
+            table[column] = table[column].map(
+                lambda x: ast.literal_eval(str(x)))
+
+    return table
     
     
 # Source: https://www.geeksforgeeks.org/python-program-to-flatten-a-nested-list-using-recursion/
@@ -57,17 +97,32 @@ def flattenList(nestedList):
     return nestedList[:1] + flattenList(nestedList[1:])
 
 
+def is_interval_layout(
+        columns):
+    """Check for value, lower bound, upper bound columns for each sample
+    - Bound columns are named with a "lower" or "upper" suffix
+    """
+
+    names = [str(x).strip().lower() for x in columns]
+    if len(names) == 0 or len(names) % 3 != 0:
+        return False
+
+    return all(x.endswith('lower') for x in names[1::3]) \
+        and all(x.endswith('upper') for x in names[2::3])
+
+
 def read_data(
         url,
-        delimiter='\t',
+        delimiter=None,
         duplicates=False):
     """Expected to contain an even number of columns for the data type
+    - Delimited text (optionally compressed), Parquet, or Feather, chosen by
+    file extension
     """
 
-    data = pd.read_csv(
+    data = read_table(
         url,
-        sep=delimiter,
-        index_col=0)
+        delimiter=delimiter)
 
     data = data.dropna(axis=1, how="all")
     
@@ -87,46 +142,154 @@ def read_data(
             print("\t- " + str(x))
         data = data.loc[~data.index.duplicated(keep=duplicates)] 
 
-    if len(data.columns.tolist()) % 2 != 0:
+    if len(data.columns.tolist()) % 2 != 0 \
+            and not is_interval_layout(data.columns):
         raise Exception('Improperly formatted datatable provided: ', url)
 
     return data
 
 
-def check_data(data, data_type="unknown"):
-
-    print("{} data conversion errors:".format(data_type))
-    should_exit = False 
-    _count = 0
+def check_data(
+        data,
+        data_type="unknown",
+        max_print=20):
+    """Find data cells that are not numbers and row names that are not text
+    - Cells are screened as whole columns; only those that fail are checked
+    with float(), so the report matches a cell-by-cell check
+    - Numeric columns cannot hold bad cells and are skipped
+    - Returns a report of errors with their coordinates; prints the first
+    max_print
+    """
 
     # Check cell values
-    for r in data.index:
-        for c in data.columns:
+    positions = []
+    for c in range(len(data.columns)):
+        column = data.iloc[:, c]
+        if pd.api.types.is_numeric_dtype(column):
+            continue
+        candidates = pd.to_numeric(column, errors='coerce').isna().values \
+            & column.notna().values
+        for r in np.nonzero(candidates)[0]:
             try:
-                float(data.at[r, c])
-            except ValueError:
-                print("    Formatting error in data cell at coordinates: {0}, {1}  (row {2})".format(r, c, data.index.get_loc(r)))
-                _count += 1
-                should_exit = True
-    
+                float(column.iat[r])
+            except (ValueError, TypeError):
+                positions.append((int(r), c))
+
+    cells = [
+        (data.index[r], data.columns[c], r)
+        for r, c in sorted(positions)]
+
     # Check index values
-    for r in data.index:
-        try:
-            str(r.lstrip().rstrip())
-        except AttributeError:
-            print("    Formatting error in index: {0}  (row {1})".format(r, data.index.get_loc(r)))
-            _count += 1
-            should_exit = True
-
-    if _count == 0:
+    index = []
+    if data.index.inferred_type != 'string':
+        for r, x in enumerate(data.index):
+            if not isinstance(x, str):
+                index.append((x, r))
+
+    messages = [
+        "    Formatting error in data cell at coordinates: {0}, {1}  (row {2})".format(r, c, x)
+        for r, c, x in cells] + [
+        "    Formatting error in index: {0}  (row {1})".format(r, x)
+        for r, x in index]
+
+    print("{} data conversion errors:".format(data_type))
+    for m in messages[:max_print]:
+        print(m)
+    if len(messages) > max_print:
+        print("    ... and {} more".format(len(messages) - max_print))
+    if len(messages) == 0:
         print("    None")
 
-    return should_exit
+    return {
+        'data_type': data_type,
+        'cells': cells,
+        'index': index,
+        'count': len(messages),
+        'should_exit': len(messages) > 0}
+
+
+def make_reference(
+        pairs):
+    """Build a translation index from (key, ID) pairs
+    - Later pairs win, as with a dict
+    - Keys claimed by more than one ID are returned as ambiguous
+    """
+
+    reference = {}
+    ambiguous = set()
+    for key, _id in pairs:
+        if key in reference and reference[key] != _id:
+            ambiguous.add(key)
+        reference[key] = _id
+
+    return pd.Series(
+        list(reference.values()),
+        index=pd.Index(list(reference.keys()), dtype=object),
+        dtype=object), ambiguous
+
+
+def normalize_symbol(
+        symbol):
+    """Drop phospho- prefixes, parenthesized modifications, and extra spaces
+    """
+
+    if 'phospho-' in symbol and '-phospho-' not in symbol:
+        symbol = symbol.replace('phospho-', '')
+    if '(' in symbol and ')' in symbol:
+        symbol = re.sub("[\(\[].[^a-zA-Z]+?[\)\]]", "", symbol)
+    if '  ' in symbol:
+        symbol = symbol.replace('  ', ' ')
+
+    return symbol.strip()
+
+
+def make_symbol_reference(
+        synonyms):
+    """Build a translation index from normalized, upper-case symbols and IDs
+    - Each ID also maps to itself
+    """
+
+    def pairs():
+        for k, v in synonyms.items():
+            yield normalize_symbol(v).upper(), k
+            yield k.upper(), k
+
+    return make_reference(pairs())
+
+
+def translate_index(
+        index,
+        reference,
+        ambiguous=None):
+    """Translate index labels through a reference, keeping unknown labels
+    - Returns the translated index and counts of mapped, unmapped, and
+    ambiguous labels
+    """
+
+    if not isinstance(reference, pd.Series):
+        reference = pd.Series(
+            list(reference.values()),
+            index=pd.Index(list(reference.keys()), dtype=object),
+            dtype=object)
+
+    index = pd.Index(index, dtype=object)
+    translated = index.map(reference)
+    found = translated.notna()
+
+    counts = {
+        'mapped': int(found.sum()),
+        'unmapped': int((~found).sum()),
+        'ambiguous': 0}
+    if ambiguous:
+        counts['ambiguous'] = int(index[found].isin(list(ambiguous)).sum())
+
+    return translated.where(found, index), counts
 
 
 def format_data(
         data,
-        reference):
+        reference,
+        ambiguous=None):
     """Format data for processing
     0) Transcriptomics
     - Accepts entities mapping to ensembl genes and their synonyms
@@ -142,15 +305,24 @@ def format_data(
     - Columns should be condition_fc, condition_p, etc.
     """
 
-    data_output = data.copy()
-    data_output.index = data_output.index.str.upper()
+    # Shallow copy, so relabeling leaves the input untouched
+    data_output = data.copy(deep=False)
+    data_output.index, counts = translate_index(
+        index=data_output.index.str.upper(),
+        reference=reference,
+        ambiguous=ambiguous)
 
-    reference_ids = list(reference.values())
+    if isinstance(reference, pd.Series):
+        reference_ids = reference.values
+    else:
+        reference_ids = list(reference.values())
 
-    data_output.index = data_output.index.to_series().replace(reference)
-    data_unmapped = data_output.copy()
+    data_unmapped = data_output[~data_output.index.isin(reference_ids)]
 
-    data_unmapped = data_unmapped[~data_unmapped.index.isin(reference_ids)]
+    print(
+        'ID translation: ' + str(counts['mapped']) + ' mapped, '
+        + str(counts['unmapped']) + ' unmapped, '
+        + str(counts['ambiguous']) + ' ambiguous')
 
     return data_output, data_unmapped
 
@@ -164,26 +336,55 @@ def output_unmapped(
 
     if len(data.index.tolist()):
         data.to_csv(
-            url[:-4] + '_unmapped.txt',
+            strip_suffix(url) + '_unmapped.txt',
             sep=delimiter)
 
 
 def extract_data(
-        data):
+        data,
+        precision='float64'):
     """Seperate out fold change and p-values
     - Formatting follows fold change, p-values, etc...
+    - Confidence intervals follow fold change, lower bound, upper bound,
+    etc..., and are returned as (sample, bound) stats columns
+    - Numeric fold changes are stored at the given precision; stats stay
+    float64 as p-values often fall below the float32 range
     """
-    data_c = data.copy()
-    data_c = data_c.dropna(axis=0)
+    data_c = data.dropna(axis=0)
     data_c.index = [d.lstrip().rstrip() for d in data_c.index.tolist()]
 
-    _values = data_c.T[::2].T
-    _stats = data_c.T[1::2].T
+    if is_interval_layout(data_c.columns):
+        _values = data_c.iloc[:, ::3]
+        _lower = data_c.iloc[:, 1::3]
+        _upper = data_c.iloc[:, 2::3]
+        _values.columns = [x for x in range(len(_values.columns))]
+        _lower.columns = [x for x in range(len(_lower.columns))]
+        _upper.columns = [x for x in range(len(_upper.columns))]
+        _stats = make_interval_stats(_lower, _upper)
+
+        return set_precision(_values, precision), _stats
+
+    _values = data_c.iloc[:, ::2]
+    _stats = data_c.iloc[:, 1::2]
 
     _values.columns = [x for x in range(len(_values.columns))]
     _stats.columns = [x for x in range(len(_stats.columns))]
 
-    return _values, _stats
+    return set_precision(_values, precision), _stats
+
+
+def set_precision(
+        data,
+        precision='float64'):
+    """Cast numeric data to the given float precision
+    - Tables that are not all numbers, or already match, are returned as is
+    """
+
+    if all(pd.api.types.is_numeric_dtype(data[x]) for x in data.columns) \
+            and not all(data[x].dtype == precision for x in data.columns):
+        data = data.astype(precision)
+
+    return data
 
 
 def broadcast_transcriptomics(
@@ -198,22 +399,37 @@ def broadcast_transcriptomics(
     from 0)
     """
 
-    proteomics = transcriptomics.copy()
-    proteomics_stats = transcriptomics_stats.copy()
-
-    uniprot_dict = {}
-    for x in protein_dictionary.keys():
-        uniprot_dict[protein_dictionary[x]] = x
-
-    proteomics.index = proteomics.index.to_series().replace(
-        gene_dictionary)
-    proteomics_stats.index = proteomics_stats.index.to_series().replace(
-        gene_dictionary)
-
-    proteomics.index = proteomics.index.to_series().replace(
-        uniprot_dict)
-    proteomics_stats.index = proteomics_stats.index.to_series().replace(
-        uniprot_dict)
+    proteomics = transcriptomics.copy(deep=False)
+    proteomics_stats = transcriptomics_stats.copy(deep=False)
+
+    gene_reference, _ = make_reference(
+        gene_dictionary.items())
+    uniprot_reference, ambiguous = make_reference(
+        (v, k) for k, v in protein_dictionary.items())
+
+    genes, _ = translate_index(
+        index=proteomics.index,
+        reference=gene_reference)
+    proteins, protein_counts = translate_index(
+        index=genes,
+        reference=uniprot_reference,
+        ambiguous=ambiguous)
+
+    # Stats share the data labels unless rows were dropped separately
+    if proteomics_stats.index.equals(proteomics.index):
+        proteomics_stats.index = proteins
+    else:
+        proteomics_stats.index = translate_index(
+            index=translate_index(
+                index=proteomics_stats.index,
+                reference=gene_reference)[0],
+            reference=uniprot_reference)[0]
+    proteomics.index = proteins
+
+    print(
+        'Broadcast to proteins: ' + str(protein_counts['mapped'])
+        + ' mapped, ' + str(protein_counts['unmapped']) + ' unmapped, '
+        + str(protein_counts['ambiguous']) + ' ambiguous')
 
     return proteomics, proteomics_stats
 
@@ -223,17 +439,25 @@ def copy_columns(
         stats,
         _max):
     """Copy data columns for every time point provided by the user
+    - Each table is filled in one allocation rather than column by column
     """
 
-    data_c = data.copy()
-    stats_c = stats.copy()
-
-    counter = 1
-
-    while counter < _max:
-        data_c[counter] = data_c[0]
-        stats_c[counter] = stats_c[0]
-        counter += 1
+    data_c = pd.DataFrame(
+        np.repeat(data[[0]].values, _max, axis=1),
+        index=data.index,
+        columns=[x for x in range(_max)])
+
+    if is_interval_stats(stats):
+        stats_c = pd.DataFrame(
+            np.tile(stats[0].values, (1, _max)),
+            index=stats.index,
+            columns=pd.MultiIndex.from_product(
+                [[x for x in range(_max)], INTERVAL_BOUNDS]))
+    else:
+        stats_c = pd.DataFrame(
+            np.repeat(stats[[0]].values, _max, axis=1),
+            index=stats.index,
+            columns=[x for x in range(_max)])
 
     return data_c, stats_c
 
@@ -261,18 +485,42 @@ def catenate_data(
     Return: combined dataframe where indices are species IDs
     """
 
+    # Check that types are the same (p-values or confidence intervals)
+    if len(set(is_interval_stats(x) for x in array)) > 1:
+        raise Exception("Input data types do not match. Please check that all fold change and statistical value types match between datasets.")
+
     tables = [eval_table(x) for x in array]
 
-    combined = pd.concat(tables)
+    if len(tables) == 1:
+        combined = tables[0]
+    else:
+        combined = pd.concat(tables)
+
+    # Numeric tables only need missing and infinite values removed
+    if all(pd.api.types.is_float_dtype(combined[x]) for x in combined.columns):
+        # Screen column by column, as .values would copy a fragmented table
+        missing = np.zeros(len(combined.index), dtype=bool)
+        infinite = np.zeros(len(combined.index), dtype=bool)
+        for c in range(len(combined.columns)):
+            column = combined.iloc[:, c].values
+            missing |= np.isnan(column)
+            infinite |= np.isinf(column)
+        removers = combined.index[~missing & infinite]
+        keep = ~missing & ~combined.index.isin(removers)
+        if not keep.all():
+            combined = combined[keep]
+        if not combined.index.is_monotonic_increasing:
+            combined = combined.sort_index()
+        return combined
+
     combined = combined.dropna(axis=0)
     combined = combined.sort_index()
 
     # Check that types are the same (p-values or confidence intervals)
     if type(combined.iloc[0,0]) == list:
-        if len(set(flattenList(combined.applymap(type).values.tolist()))) != 1:
+        if len(set(type(x) for x in combined.values.ravel())) != 1:
             raise Exception("Input data types do not match. Please check that all fold change and statistical value types match between datasets.")
 
-    ### Need to fix
     removers = []  # Remove non-numbers
     for idx, row in combined.iterrows():
         for x in row:
@@ -288,7 +536,19 @@ def catenate_data(
                     removers.append(idx)
 
     combined = combined[~combined.index.isin(removers)]
-    
+
+    # Hold confidence interval lists as paired bound columns
+    if len(combined.index) > 0 \
+            and all(type(x) == list and len(x) == 2
+                    for x in combined.values.ravel()):
+        combined = make_interval_stats(
+            lower=pd.DataFrame(
+                {c: [x[0] for x in combined[c]] for c in combined.columns},
+                index=combined.index),
+            upper=pd.DataFrame(
+                {c: [x[1] for x in combined[c]] for c in combined.columns},
+                index=combined.index))
+
     return combined
 
 
@@ -297,7 +557,8 @@ def __main__(
         transcriptomics_url,
         proteomics_url,
         metabolomics_url,
-        database_source='reactome'):
+        database_source='reactome',
+        precision='float64'):
     """Get user data and preprocess
     """
 
@@ -310,28 +571,21 @@ def __main__(
 
         transcriptomics = read_data(
             url=transcriptomics_url)
-        should_transcriptomics_exit = check_data(transcriptomics, data_type="Transcriptomics")
+        should_transcriptomics_exit = check_data(transcriptomics, data_type="Transcriptomics")['should_exit']
         if not should_transcriptomics_exit:
-            e_sym = {}
             if database_source.lower() == 'reactome':
-                for k, v in network['ensembl_synonyms'].items():
-                    if 'phospho-' in v and '-phospho-' not in v:
-                        v = v.replace('phospho-', '')
-                    if '(' in v and ')' in v:
-                        v = re.sub("[\(\[].[^a-zA-Z]+?[\)\]]", "", v)
-                    if '  ' in v:
-                        v = v.replace('  ', ' ')
-                    v = v.strip()
-                    e_sym[v.upper()] = k
-                    e_sym[k.upper()] = k
+                e_sym, e_ambiguous = make_symbol_reference(
+                    network['ensembl_synonyms'])
                 transcriptomics, transcriptomics_unmapped = format_data(
                     data=transcriptomics,
-                    reference=e_sym)
+                    reference=e_sym,
+                    ambiguous=e_ambiguous)
                 output_unmapped(
                     data=transcriptomics_unmapped,
                     url=transcriptomics_url)
             transcriptomics, transcriptomics_stats = extract_data(
-                data=transcriptomics)
+                data=transcriptomics,
+                precision=precision)
             transcriptomics_length = len(transcriptomics.columns.tolist())
     else:
         transcriptomics_length = 0
@@ -341,28 +595,21 @@ def __main__(
 
         proteomics = read_data(
             url=proteomics_url)
-        should_proteomics_exit = check_data(proteomics, data_type="Proteomics")
+        should_proteomics_exit = check_data(proteomics, data_type="Proteomics")['should_exit']
         if not should_proteomics_exit:
-            u_sym = {}
             if database_source.lower() == 'reactome':
-                for k, v in network['uniprot_synonyms'].items():
-                    if 'phospho-' in v and '-phospho-' not in v:
-                        v = v.replace('phospho-', '')
-                    if '(' in v and ')' in v:
-                        v = re.sub("[\(\[].[^a-zA-Z]+?[\)\]]", "", v)
-                    if '  ' in v:
-                        v = v.replace('  ', ' ')
-                    v = v.strip()
-                    u_sym[v.upper()] = k
-                    u_sym[k.upper()] = k
+                u_sym, u_ambiguous = make_symbol_reference(
+                    network['uniprot_synonyms'])
                 proteomics, proteomics_unmapped = format_data(
                     data=proteomics,
-                    reference=u_sym)
+                    reference=u_sym,
+                    ambiguous=u_ambiguous)
                 output_unmapped(
                     data=proteomics_unmapped,
                     url=proteomics_url)
             proteomics, proteomics_stats = extract_data(
-                data=proteomics)
+                data=proteomics,
+                precision=precision)
             proteomics_length = len(proteomics.columns.tolist())
     else:
         proteomics_length = 0
@@ -372,10 +619,11 @@ def __main__(
 
         metabolomics = read_data(
             url=metabolomics_url)
-        should_metabolomics_exit = check_data(metabolomics, data_type="Metabolomics")
+        should_metabolomics_exit = check_data(metabolomics, data_type="Metabolomics")['should_exit']
         if not should_metabolomics_exit:
             metabolomics, metabolomics_stats = extract_data(
-                data=metabolomics)
+                data=metabolomics,
+                precision=precision)
             metabolomics_length = len(metabolomics.columns.tolist())
     else:
         metabolomics_length = 0
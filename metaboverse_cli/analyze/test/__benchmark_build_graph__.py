@@ -0,0 +1,187 @@
+"""License Information
+metaboverse-cli
+Back-end CLI Tool for Curating Metabolic Networks for Metaboverse
+https://github.com/Metaboverse/metaboverse-cli/
+alias: metaboverse-cli
+
+MIT License
+
+Copyright (c) 2022 Metaboverse
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Benchmark build_graph() on synthetic Reactome-like networks
+
+Each network has the given number of reactions, with the species pool,
+complexes, and UniProt/Ensembl synonym tables growing in proportion, so
+linear scaling shows as a constant time per reaction.
+
+Run from the repository root:
+    python metaboverse_cli/analyze/test/__benchmark_build_graph__.py [reactions ...]
+"""
+from __future__ import print_function
+import importlib.util
+import random
+import time
+import sys
+import os
+
+spec = importlib.util.spec_from_file_location(
+    "", os.path.abspath("./metaboverse_cli/analyze/model.py"))
+model = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(model)
+
+
+def make_network(
+        reactions,
+        seed=42):
+    """Generate a synthetic curation with the given number of reactions
+    """
+
+    random.seed(seed)
+    species_number = reactions * 2
+    protein_number = reactions * 4
+    complex_number = reactions // 5
+
+    uniprot_synonyms = {}
+    ensembl_synonyms = {}
+    protein_genes = {}
+    for x in range(protein_number):
+        uniprot_synonyms['P' + str(x)] = 'PROT' + str(x)
+        ensembl_synonyms['ENSG' + str(x)] = 'GENE' + str(x)
+        protein_genes['P' + str(x)] = 'ENSG' + str(x)
+
+    compartments = {
+        'c_' + str(x): 'compartment ' + str(x) for x in range(8)}
+
+    components_database = {}
+    species_database = {}
+    name_database = {}
+    for x in range(species_number):
+        species = 'species_' + str(x)
+        if x % 3 == 0:
+            _is = 'P' + str(random.randrange(protein_number))
+            _type = 'protein_component'
+        else:
+            _is = 'CHEBI:' + str(x)
+            _type = 'metabolite_component'
+        components_database[species] = {
+            'id': species,
+            'reactome_id': species,
+            'name': 'name ' + str(x),
+            'is': _is,
+            'isEncodedBy': '',
+            'hasPart': [],
+            'type': _type,
+            'compartment': random.choice(list(compartments.keys()))}
+        species_database[species] = 'name ' + str(x)
+        name_database['name ' + str(x)] = species
+
+    for x in range(complex_number):
+        species = 'complex_' + str(x)
+        components_database[species] = {
+            'id': species,
+            'reactome_id': species,
+            'name': 'complex ' + str(x),
+            'is': '',
+            'isEncodedBy': '',
+            'hasPart': [
+                'P' + str(random.randrange(protein_number))
+                for y in range(4)] + ['CHEBI:' + str(random.randrange(species_number))],
+            'type': 'complex_component',
+            'compartment': random.choice(list(compartments.keys()))}
+        species_database[species] = 'complex ' + str(x)
+        name_database['complex ' + str(x)] = species
+
+    species_ids = [x for x in components_database.keys() if 'species' in x]
+    complex_ids = [x for x in components_database.keys() if 'complex' in x]
+
+    reaction_database = {}
+    for x in range(reactions):
+        reaction = 'reaction_' + str(x)
+        reaction_database[reaction] = {
+            'compartment': random.choice(list(compartments.keys())),
+            'id': reaction,
+            'name': 'reaction ' + str(x),
+            'reversible': random.choice(['true', 'false']),
+            'notes': '',
+            'reactome': reaction,
+            'reactants': random.sample(species_ids, 2),
+            'products': random.sample(species_ids, 2),
+            'modifiers': [[random.choice(complex_ids), 'catalyst']]}
+
+    pathway_database = {
+        'pathway_' + str(x): {
+            'id': 'pathway_' + str(x),
+            'reactome': 'pathway_' + str(x),
+            'name': 'pathway ' + str(x),
+            'reactions': random.sample(
+                list(reaction_database.keys()), min(reactions, 50))}
+        for x in range(max(1, reactions // 100))}
+
+    return {
+        'reaction_database': reaction_database,
+        'pathway_database': pathway_database,
+        'species_database': species_database,
+        'name_database': name_database,
+        'components_database': components_database,
+        'compartment_dictionary': compartments,
+        'uniprot_synonyms': uniprot_synonyms,
+        'ensembl_synonyms': ensembl_synonyms,
+        'protein_genes': protein_genes}
+
+
+def run_build_graph(
+        network):
+
+    return model.build_graph(
+        args_dict={},
+        network=network['reaction_database'],
+        pathway_database=network['pathway_database'],
+        species_reference=network['species_database'],
+        name_reference=network['name_database'],
+        protein_reference=network['protein_genes'],
+        chebi_dictionary={},
+        uniprot_reference=network['uniprot_synonyms'],
+        complexes={},
+        species_id='HSA',
+        gene_reference=network['ensembl_synonyms'],
+        compartment_reference=network['compartment_dictionary'],
+        component_database=network['components_database'])
+
+
+if __name__ == '__main__':
+
+    if len(sys.argv) > 1:
+        sizes = [int(x) for x in sys.argv[1:]]
+    else:
+        sizes = [1000, 2000, 4000, 8000]
+
+    print('reactions\tnodes\tedges\tseconds\tms_per_reaction')
+    for size in sizes:
+        network = make_network(size)
+        start = time.time()
+        graph, reactions, pathways = run_build_graph(network)
+        elapsed = time.time() - start
+        print('\t'.join([
+            str(size),
+            str(graph.number_of_nodes()),
+            str(graph.number_of_edges()),
+            '%.2f' % elapsed,
+            '%.3f' % (1000 * elapsed / size)]))
@@ -0,0 +1,124 @@
+"""License Information
+metaboverse-cli
+Back-end CLI Tool for Curating Metabolic Networks for Metaboverse
+https://github.com/Metaboverse/metaboverse-cli/
+alias: metaboverse-cli
+
+MIT License
+
+Copyright (c) 2022 Metaboverse
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Benchmark peak memory of prepare_data on a synthetic timecourse
+
+Each table holds the given number of metabolites with a fold change and a
+p-value for every time point, so the default 60,000 x 200 table covers 100
+time points. Peak traced memory is reported for each --precision mode.
+
+Run from the repository root:
+    python metaboverse_cli/analyze/test/__benchmark_prepare_data__.py [rows [columns]]
+"""
+from __future__ import print_function
+import importlib.util
+import tracemalloc
+import tempfile
+import shutil
+import time
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+spec = importlib.util.spec_from_file_location(
+    "", os.path.abspath("./metaboverse_cli/analyze/prepare_data.py"))
+prepare_data = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(prepare_data)
+
+
+def make_timecourse(
+        rows,
+        columns,
+        output_url,
+        seed=42):
+    """Write a synthetic fold change and p-value timecourse
+    """
+
+    random = np.random.default_rng(seed)
+    data = np.empty((rows, columns))
+    data[:, ::2] = random.normal(size=(rows, columns // 2))
+    data[:, 1::2] = random.uniform(size=(rows, columns // 2))
+
+    pd.DataFrame(
+        data,
+        index=['CHEBI:' + str(x) for x in range(rows)],
+        columns=[
+            ('time' + str(x // 2) + (' fc' if x % 2 == 0 else ' p'))
+            for x in range(columns)]).to_csv(output_url, sep='\t')
+
+
+def run(
+        data_url,
+        precision):
+    """Run prepare_data on a metabolomics table, tracing peak memory
+    """
+
+    tracemalloc.start()
+    start = time.time()
+    data, stats, unmapped = prepare_data.__main__(
+        network={},
+        transcriptomics_url='None',
+        proteomics_url='None',
+        metabolomics_url=data_url,
+        precision=precision)
+    elapsed = time.time() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return data, stats, elapsed, peak
+
+
+if __name__ == '__main__':
+
+    rows = 60000
+    columns = 200
+    if len(sys.argv) > 1:
+        rows = int(sys.argv[1])
+    if len(sys.argv) > 2:
+        columns = int(sys.argv[2])
+
+    temp_dir = tempfile.mkdtemp()
+    data_url = os.path.join(temp_dir, 'timecourse.txt')
+    make_timecourse(rows, columns, data_url)
+    table_mb = rows * columns * 8 / 1e6
+
+    print('rows\tcolumns\tprecision\tseconds\tpeak_mb\tpeak_per_table')
+    for precision in ['float64', 'float32']:
+        data, stats, elapsed, peak = run(data_url, precision)
+        assert str(data[0].dtype) == precision, \
+            'Data not stored at ' + precision
+        print('\t'.join([
+            str(rows),
+            str(columns),
+            precision,
+            '%.2f' % elapsed,
+            '%.1f' % (peak / 1e6),
+            '%.2f' % (peak / 1e6 / table_mb)]))
+
+    shutil.rmtree(temp_dir)
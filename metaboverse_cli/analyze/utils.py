@@ -29,9 +29,27 @@ SOFTWARE.
 """
 from __future__ import print_function
 import pandas as pd
+import numpy as np
+import importlib.util
+import hashlib
+import pickle
+import json
 import os
 
 
+INTERVAL_BOUNDS = ['lower', 'upper']
+COMPRESSION_SUFFIXES = ['gz', 'xz', 'bz2', 'zip']
+COLUMNAR_SUFFIXES = ['parquet', 'feather']
+CATEGORICAL_ATTRIBUTES = [
+    'type',
+    'sub_type',
+    'compartment',
+    'compartment_display',
+    'complex',
+    'inferred',
+    'reversible']
+
+
 def file_path(
         input):
     # Check input is contains full path address
@@ -39,40 +57,95 @@ def file_path(
     return os.path.abspath(input)
 
 
+def strip_compression(
+        file):
+    # Remove a compression suffix from a file name
+
+    for ext in COMPRESSION_SUFFIXES:
+        if file.lower().endswith('.' + ext):
+            return file[:-len(ext) - 1]
+
+    return file
+
+
+def strip_suffix(
+        file):
+    # Remove the compression and table suffixes from a file name
+
+    file = strip_compression(file)
+    if '.' in os.path.basename(file):
+        file = file[:file.rfind('.')]
+
+    return file
+
+
 def check_suffix(
         file):
     # Get file suffix
 
-    if file.split('.')[-1] == 'csv':
+    suffix = strip_compression(file).split('.')[-1].lower()
+    if file.split('.')[-1].lower() in COLUMNAR_SUFFIXES:
+        suffix = None
+    elif suffix == 'csv':
         suffix = ','
-    elif file.split('.')[-1] == 'tsv':
+    elif suffix == 'tsv':
         suffix = '\t'
-    elif file.split('.')[-1] == 'txt':
+    elif suffix == 'txt':
         suffix = '\t'
     else:
         raise Exception(
-            'Invalid data file provided. Expected a tab- or comma-delimited file')
+            'Invalid data file provided. Expected a tab- or comma-delimited, '
+            + 'Parquet, or Feather file')
 
     return suffix
 
 
-def add_data(
-        file):
-    # Input data type
-    # Check that file has full path
-    file = file_path(file)
+def read_table(
+        file,
+        delimiter=None):
+    """Read a data table, choosing the reader by file extension
+    - Text tables may be gzip, xz, bz2, or zip compressed
+    - Parquet and Feather tables need pyarrow
+    - The first column holds row names unless the table stored an index
+    """
 
-    # Figure out file type
     suffix = check_suffix(file)
+    if suffix == None:
+        if importlib.util.find_spec('pyarrow') == None:
+            raise Exception(
+                'Reading Parquet or Feather files requires pyarrow. '
+                + 'Install it with: pip install pyarrow')
 
-    # Import dataframe
-    data = pd.read_csv(
+        if file.split('.')[-1].lower() == 'parquet':
+            data = pd.read_parquet(file)
+        else:
+            data = pd.read_feather(file)
+
+        if isinstance(data.index, pd.RangeIndex):
+            data = data.set_index(data.columns[0])
+
+        return data
+
+    if delimiter == None:
+        delimiter = suffix
+
+    return pd.read_csv(
         file,
-        sep=suffix,
+        sep=delimiter,
         header=0,
         index_col=0,
         low_memory=False)
 
+
+def add_data(
+        file):
+    # Input data type
+    # Check that file has full path
+    file = file_path(file)
+
+    # Import dataframe
+    data = read_table(file)
+
     return data
 
 
@@ -97,6 +170,57 @@ def convert_rgba(
     return js
 
 
+def make_interval_stats(
+        lower,
+        upper):
+    """Pair tables of lower and upper bounds into confidence interval stats
+    - Columns are (sample, bound) pairs, so the values reshape to an
+    entities x samples x bounds array
+    """
+
+    columns = pd.MultiIndex.from_product(
+        [lower.columns.tolist(), INTERVAL_BOUNDS])
+    values = np.stack(
+        [lower.values.astype(np.float64), upper.values.astype(np.float64)],
+        axis=2)
+
+    return pd.DataFrame(
+        values.reshape(len(lower.index), -1),
+        index=lower.index,
+        columns=columns)
+
+
+def is_interval_stats(
+        stats):
+    """Check whether stats hold confidence intervals
+    """
+
+    return isinstance(stats.columns, pd.MultiIndex)
+
+
+def get_interval_array(
+        stats):
+    """Get confidence interval stats as an entities x samples x bounds array
+    """
+
+    return stats.values.astype(np.float64).reshape(
+        len(stats.index), -1, len(INTERVAL_BOUNDS))
+
+
+def get_stats_rows(
+        stats):
+    """Get each entity's stats as a list with one item per sample
+    - Confidence intervals give a [lower, upper] pair per sample
+    """
+
+    if is_interval_stats(stats):
+        rows = get_interval_array(stats).tolist()
+    else:
+        rows = stats.values.tolist()
+
+    return dict(zip(stats.index, rows))
+
+
 def remove_defective_reactions(
         network):
     """
@@ -109,3 +233,193 @@ def remove_defective_reactions(
             no_defective_reactions[key] = network['reaction_database'][key]
 
     return no_defective_reactions
+
+
+def get_index_dtype(
+        size):
+    """Use 32-bit positions unless the graph is too large for them
+    """
+
+    if size < np.iinfo(np.int32).max:
+        return np.int32
+    else:
+        return np.int64
+
+
+def encode_node_link(
+        data,
+        attributes=CATEGORICAL_ATTRIBUTES):
+    """Dictionary encode categorical attributes in node-link data
+    - Returns a copy of data where each attribute value is replaced by its
+    position in data['vocabularies'][element][attribute]
+    - This only shrinks template files; graphs in memory keep the strings
+    """
+
+    encoded = dict(data)
+    encoded['vocabularies'] = {}
+    for element in ['nodes', 'links', 'edges']:
+        if element not in data:
+            continue
+        records = [dict(x) for x in data[element]]
+        vocabularies = {}
+        for name in attributes:
+            codes = {}
+            try:
+                for record in records:
+                    if name in record:
+                        codes.setdefault(record[name], len(codes))
+            except TypeError:
+                # Unhashable values are left unencoded
+                continue
+            if len(codes) > 0:
+                for record in records:
+                    if name in record:
+                        record[name] = codes[record[name]]
+                vocabularies[name] = list(codes.keys())
+        encoded[element] = records
+        encoded['vocabularies'][element] = vocabularies
+
+    return encoded
+
+
+def decode_node_link(
+        data):
+    """Decode node-link data written by encode_node_link(), in place
+    - Decoded values are shared vocabulary objects rather than one string
+    per record
+    - Data without vocabularies is returned unchanged
+    """
+
+    if 'vocabularies' not in data:
+        return data
+
+    for element, vocabularies in data['vocabularies'].items():
+        for name, vocabulary in vocabularies.items():
+            for record in data[element]:
+                if name in record:
+                    record[name] = vocabulary[record[name]]
+    del data['vocabularies']
+
+    return data
+
+
+
+def use_filtered_neighbors(
+        neighbors_dictionary,
+        degree_dictionary,
+        blocklist,
+        degree_threshold,
+        collapse_threshold):
+    """Check whether hub-filtered neighbors give the same collapse
+    - Every hub dropped from the lists must also be ignored by collapse, as
+    a blocklisted species or one over the degree threshold
+    - A collapse threshold of 0 matches neighbors sharing nothing but hubs
+    """
+
+    if 'nbdb-hubs' not in neighbors_dictionary \
+            or float(collapse_threshold) <= 0:
+        return False
+
+    blocklist = set(blocklist)
+    for x in neighbors_dictionary['nbdb-hubs']:
+        if x not in blocklist \
+                and (x not in degree_dictionary
+                     or degree_dictionary[x] <= degree_threshold):
+            return False
+
+    return True
+
+
+def get_neighbors_lookup(
+        neighbors_dictionary,
+        filtered=False):
+    """Get a function returning a reaction's neighbors, or None if unlisted
+    - Reads the CSR arrays of current .nbdb files and the reaction-keyed
+    lists of older ones
+    - Set filtered to read the hub-filtered lists instead
+    """
+
+    if 'nbdb-indptr' not in neighbors_dictionary:
+        def lookup(key):
+            if key in neighbors_dictionary:
+                return neighbors_dictionary[key]
+            else:
+                return None
+        return lookup
+
+    reactions = neighbors_dictionary['nbdb-reactions']
+    if filtered == True:
+        indptr = neighbors_dictionary['nbdb-filtered-indptr']
+        indices = neighbors_dictionary['nbdb-filtered-indices']
+    else:
+        indptr = neighbors_dictionary['nbdb-indptr']
+        indices = neighbors_dictionary['nbdb-indices']
+    positions = {x: i for i, x in enumerate(reactions)}
+
+    def lookup(key):
+        if key not in positions:
+            return None
+        i = positions[key]
+        return [reactions[x] for x in indices[indptr[i]:indptr[i + 1]].tolist()]
+
+    return lookup
+
+
+def get_mapping_cache_file(
+        output_dir,
+        key,
+        cache_name='mapping_cache'):
+    """Get the cache file for a data mapping, named by a digest of its key
+    """
+
+    digest = hashlib.sha256(
+        json.dumps(key, sort_keys=True).encode('utf-8')).hexdigest()
+
+    return os.path.join(output_dir, cache_name, digest + '.pickle')
+
+
+def read_mapping_cache(
+        output_dir,
+        key):
+    """Read a cached data mapping
+
+    Returns (True, mapping) when one exists for the same key, otherwise
+    (False, None)
+    """
+
+    cache_file = get_mapping_cache_file(output_dir, key)
+    if not os.path.exists(cache_file):
+        return False, None
+
+    try:
+        with open(cache_file, 'rb') as input_file:
+            cache = pickle.load(input_file)
+    except Exception:
+        print('Unable to read cached data mapping, data will be re-mapped.')
+        return False, None
+
+    if cache['key'] != key:
+        return False, None
+    else:
+        return True, cache['mapping']
+
+
+def write_mapping_cache(
+        output_dir,
+        key,
+        mapping):
+    """Cache a data mapping without leaving partial files behind
+    """
+
+    cache_file = get_mapping_cache_file(output_dir, key)
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+
+    temp_file = cache_file + '.' + str(os.getpid()) + '.tmp'
+    with open(temp_file, 'wb') as output_file:
+        pickle.dump(
+            {
+                'key': key,
+                'mapping': mapping},
+            output_file,
+            protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_file, cache_file)
@@ -72,6 +72,8 @@ description_table = """\
         +-----------------------+--------------------------------------------+
         |   curate              |   Curate network with optional user data   |
         +-----------------------+--------------------------------------------+
+        |   prebuild            |   Build source files for a local mirror    |
+        +-----------------------+--------------------------------------------+
 """
 
 def check_arguments(
@@ -89,6 +91,8 @@ def check_arguments(
         pass
     elif args_dict['cmd'] == 'electrum':
         pass
+    elif args_dict['cmd'] == 'prebuild':
+        pass
     else:
         raise Exception('Invalid sub-module selected')
 
@@ -227,6 +231,47 @@ def parse_arguments(
         type=str,
         required=True)
 
+    # prebuild parser
+    prebuild_parser = subparser.add_parser(
+        'prebuild',
+        description='Pre-build organism source files for a local mirror',
+        add_help=False)
+
+    # prebuild required arguments
+    prebuild_reqs = prebuild_parser.add_argument_group('required arguments')
+    prebuild_reqs.add_argument(
+        '--output',
+        help='Path to mirror directory. Files are written to <path>/v<version>/mvdb, mvrs, and nbdb.',
+        metavar='<path>',
+        type=str,
+        required=True)
+    prebuild_reqs.add_argument(
+        '--organisms',
+        help='Comma separated list of Reactome species IDs',
+        metavar='HSA, MMU, ...',
+        type=str,
+        required=True)
+
+    # prebuild optional arguments
+    prebuild_opts = prebuild_parser.add_argument_group('optional arguments')
+    prebuild_opts.add_argument(
+        '--help',
+        action='help',
+        help='Show help message and exit')
+    prebuild_opts.add_argument(
+        '--workers',
+        help='Number of organisms to build at once (default: 1).',
+        metavar='<int>',
+        type=int,
+        default=1,
+        required=False)
+    prebuild_opts.add_argument(
+        '--progress_log',
+        help='Path and filename to progress log file',
+        metavar='<path/filename>',
+        type=str,
+        required=False)
+
     # Curate parser
     curate_parser = subparser.add_parser(
         'curate',
@@ -273,6 +318,12 @@ def parse_arguments(
         metavar='<path/filename_template.mvrs>',
         type=str,
         required=False)
+    curate_opts.add_argument(
+        '--source_url',
+        help='URL or local path of a source file mirror, such as one written by "metaboverse prebuild" (default: the Metaboverse source archive).',
+        metavar='<url or path>',
+        type=str,
+        required=False)
     curate_opts.add_argument(
         '--output_file',
         help='Path and name for output database file',
@@ -316,9 +367,27 @@ def parse_arguments(
     #    required = False)
     curate_opts.add_argument(
         '--force_new_curation',
-        help='Force all intermediate database files to be freshly created.',
+        help='Force all intermediate database files and outputs to be freshly created, even if their provenance manifests show they are up to date.',
         action='store_true',
         required=False)
+    curate_opts.add_argument(
+        '--resume',
+        help='Resume an interrupted curation, skipping stages with valid checkpoints in the output directory.',
+        action='store_true',
+        required=False)
+    curate_opts.add_argument(
+        '--batch',
+        help='Path and filename of a tab-delimited manifest of datasets to model on the organism, one per row. Columns: transcriptomics, proteomics, metabolomics, labels, experiment_name, experiment_type, and output_file (required). The network and references are loaded once for all rows.',
+        metavar='<path/manifest.tsv>',
+        type=str,
+        required=False)
+    curate_opts.add_argument(
+        '--workers',
+        help='Number of worker processes to use when building a graph template or modeling --batch datasets (default: 1).',
+        metavar='<int>',
+        type=int,
+        default=1,
+        required=False)
     curate_opts.add_argument(
         '--collapse_with_modifiers',
         help='Include modifiers when considering a potential reaction collapse.',
@@ -364,6 +433,19 @@ def parse_arguments(
         type=str,
         default="0.3",
         required=False)
+    curate_opts.add_argument(
+        '--precision',
+        help='Float precision for user data values (default: "float64"; "float32" halves their memory use, stats stay float64).',
+        type=str,
+        choices=['float64', 'float32'],
+        default='float64',
+        required=False)
+    curate_opts.add_argument(
+        '--chunk_size',
+        help='Number of sample columns to attach to network nodes at a time (default: 256). Lower values shrink the working arrays used while mapping very wide datasets.',
+        type=int,
+        default=256,
+        required=False)
     curate_opts.add_argument(
         '--session_data',
         help='Path and filename to session data file',
@@ -38,15 +38,21 @@ import os
 """
 try:
     from curate.load_reactions_db import __main__ as load_reactions
+    from curate.load_reactions_db import get_model_id
     from curate.load_complexes_db import __main__ as load_complexes
+    from curate.utils import load_reactome_partition, run_stages, \
+    prune_stages, get_checkpoint_directory, read_checkpoint, \
+    write_checkpoint, remove_checkpoints
     from utils import progress_feed, write_database, write_database_json, \
-    safestr, get_metaboverse_cli_version
+    safestr, get_metaboverse_cli_version, update_session, make_provenance, \
+    read_provenance, write_provenance, reuse_outputs
 except:
     import importlib.util
     spec = importlib.util.spec_from_file_location(
         "__main__", os.path.abspath("./metaboverse_cli/curate/load_reactions_db.py"))
     load_reactions = importlib.util.module_from_spec(spec)
     spec.loader.exec_module(load_reactions)
+    get_model_id = load_reactions.get_model_id
     load_reactions = load_reactions.__main__
 
     spec = importlib.util.spec_from_file_location(
@@ -55,6 +61,18 @@ except:
     spec.loader.exec_module(load_complexes)
     load_complexes = load_complexes.__main__
 
+    spec = importlib.util.spec_from_file_location(
+        "", os.path.abspath("./metaboverse_cli/curate/utils.py"))
+    curate_utils = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(curate_utils)
+    load_reactome_partition = curate_utils.load_reactome_partition
+    run_stages = curate_utils.run_stages
+    prune_stages = curate_utils.prune_stages
+    get_checkpoint_directory = curate_utils.get_checkpoint_directory
+    read_checkpoint = curate_utils.read_checkpoint
+    write_checkpoint = curate_utils.write_checkpoint
+    remove_checkpoints = curate_utils.remove_checkpoints
+
     spec = importlib.util.spec_from_file_location(
         "", os.path.abspath("./metaboverse_cli/utils.py"))
     utils = importlib.util.module_from_spec(spec)
@@ -64,6 +82,15 @@ except:
     write_database_json = utils.write_database_json
     safestr = utils.safestr
     get_metaboverse_cli_version = utils.get_metaboverse_cli_version
+    update_session = utils.update_session
+    make_provenance = utils.make_provenance
+    read_provenance = utils.read_provenance
+    write_provenance = utils.write_provenance
+    reuse_outputs = utils.reuse_outputs
+
+
+# Arguments set from the model while loading reactions
+MODEL_ARGUMENTS = ['organism_id', 'organism', 'database_version']
 
 
 def parse_table(
@@ -91,105 +118,106 @@ def parse_table(
     reference_parsed['compartment'] = reference_parsed['analyte_name'].str.split(
         ' \[').str[1].str.split('\]').str[0]
 
-    reference_dictionary = {}
+    # Later rows for the same analyte replace earlier ones
+    reference_parsed = reference_parsed.drop_duplicates(
+        subset='analyte_id',
+        keep='last')
+    output_columns = [
+        x for x in reference_parsed.columns.tolist()
+        if x != 'analyte_name']
+    reference_dictionary = dict(zip(
+        reference_parsed['analyte_id'],
+        reference_parsed[output_columns].to_dict('records')))
 
-    counter = 0
-    total = len(reference_parsed.index.tolist())
+    if args_dict != None:
+        progress_feed(args_dict, "graph", 15)
 
-    for index, row in reference_parsed.iterrows():
+    return reference_dictionary
 
-        reference_dictionary[row[0]] = {}
-        reference_dictionary[row[0]]['analyte_id'] = row[0]
-        reference_dictionary[row[0]]['reaction_id'] = row[2]
-        reference_dictionary[row[0]]['reaction_name'] = row[3]
 
-        if 'source_id' in reference[key].columns.tolist():
-            reference_dictionary[row[0]]['source_id'] = row[4]
-            reference_dictionary[row[0]]['analyte'] = row[5]
-            reference_dictionary[row[0]]['compartment'] = row[6]
+def split_participants(
+        participants,
+        participant_types=['chebi', 'uniprot', 'ensembl', 'mirbase', 'ncbi']):
+    """Split |-delimited complex participant strings into per-type ID lists
 
-        else:
-            reference_dictionary[row[0]]['analyte'] = row[4]
-            reference_dictionary[row[0]]['compartment'] = row[5]
+    Returns a dictionary of participant type to a Series of lists, indexed
+    as the provided participants Series
+    """
 
-        if int(counter % (total / 15)) == 0 and args_dict != None:
-            progress_feed(args_dict, "graph")
+    exploded = participants.str.split('|').explode().dropna()
+    identifiers = exploded.str.split(':').str[1]
 
-        counter += 1
+    participant_lists = {}
+    for participant_type in participant_types:
+        mask = exploded.str.contains(participant_type, regex=False)
+        participant_lists[participant_type] = identifiers[mask].groupby(
+            level=0, sort=False).agg(list)
 
-    return reference_dictionary
+    return participant_lists
 
 
 def parse_complexes(
         reference):
 
-    pathway_dictionary = {}
-    for index, row in reference['complex_pathway'].iterrows():
-
-        pathway_dictionary[row[0]] = {}
-        pathway_dictionary[row[0]]['complex'] = row[0]
-        pathway_dictionary[row[0]]['pathway'] = row[1]
-        pathway_dictionary[row[0]]['top_level_pathway'] = row[2]
+    complex_pathway = reference['complex_pathway'].drop_duplicates(
+        subset=reference['complex_pathway'].columns[0],
+        keep='last')
+    pathway_dictionary = dict(zip(
+        complex_pathway.iloc[:, 0],
+        zip(complex_pathway.iloc[:, 1], complex_pathway.iloc[:, 2])))
 
     column_names = [
         'identifier',
         'name',
         'participants',
         'participatingComplex']
-    complexes_information = reference['complex_participants'][column_names].copy(
-    )
+    complexes_information = reference['complex_participants'][column_names].drop_duplicates(
+        subset='identifier',
+        keep='last').reset_index(drop=True)
     complexes_information['complex'] = complexes_information['name'].str.split(
         ' \[').str[0]
     complexes_information['compartment'] = complexes_information['name'].str.split(
         ' \[').str[1].str.split('\]').str[0]
 
-    complex_dictionary = {}
+    participant_lists = split_participants(
+        complexes_information['participants'])
+    for participant_type in participant_lists.keys():
+        complexes_information[participant_type] = participant_lists[participant_type].reindex(
+            complexes_information.index)
 
-    for index, row in complexes_information.iterrows():
+    complex_dictionary = {}
+    for row in zip(
+            complexes_information['identifier'],
+            complexes_information['complex'],
+            complexes_information['compartment'],
+            complexes_information['participatingComplex'],
+            *[complexes_information[x] for x in participant_lists.keys()]):
 
         complex_dictionary[row[0]] = {}
         complex_dictionary[row[0]]['complex_id'] = row[0]
-        complex_dictionary[row[0]]['complex_name'] = row[4]
-        complex_dictionary[row[0]]['compartment'] = row[5]
+        complex_dictionary[row[0]]['complex_name'] = row[1]
+        complex_dictionary[row[0]]['compartment'] = row[2]
 
         if row[3] == '-':
             complex_dictionary[row[0]]['participating_complex'] = None
         else:
             complex_dictionary[row[0]]['participating_complex'] = row[3]
 
-        if row[0] in pathway_dictionary.keys():
+        if row[0] in pathway_dictionary:
             complex_dictionary[row[0]
-                               ]['pathway'] = pathway_dictionary[row[0]]['pathway']
+                               ]['pathway'] = pathway_dictionary[row[0]][0]
             complex_dictionary[row[0]
-                               ]['top_level_pathway'] = pathway_dictionary[row[0]]['top_level_pathway']
+                               ]['top_level_pathway'] = pathway_dictionary[row[0]][1]
 
         complex_dictionary[row[0]]['participants'] = {}
-        complex_dictionary[row[0]]['participants']['chebi'] = []
-        complex_dictionary[row[0]]['participants']['uniprot'] = []
-        complex_dictionary[row[0]]['participants']['ensembl'] = []
-        complex_dictionary[row[0]]['participants']['mirbase'] = []
-        complex_dictionary[row[0]]['participants']['ncbi'] = []
-
-        participants = row[2].split('|')
-
-        for x in participants:
-            if 'chebi' in x:
-                complex_dictionary[row[0]]['participants']['chebi'].append(
-                    x.split(':')[1])
-            if 'uniprot' in x:
-                complex_dictionary[row[0]]['participants']['uniprot'].append(
-                    x.split(':')[1])
-            if 'ensembl' in x:
-                complex_dictionary[row[0]]['participants']['ensembl'].append(
-                    x.split(':')[1])
-            if 'mirbase' in x:
-                complex_dictionary[row[0]]['participants']['mirbase'].append(
-                    x.split(':')[1])
-            if 'ncbi' in x:
-                complex_dictionary[row[0]]['participants']['ncbi'].append(
-                    x.split(':')[1])
+        for participant_type, participants in zip(
+                participant_lists.keys(), row[4:]):
+            if isinstance(participants, list):
+                complex_dictionary[row[0]
+                                   ]['participants'][participant_type] = participants
             else:
-                pass
+                complex_dictionary[row[0]
+                                   ]['participants'][participant_type] = []
 
     return complex_dictionary
 
@@ -204,20 +232,15 @@ def parse_ensembl_synonyms(
         id_location=0):
     """Retrieve Ensembl gene entity synonyms
     """
-    print('Downloading Ensembl synonym database...', '\n\t', url)
-    os.system('curl -kL ' + url + ' -o \"' + output_dir + file_name + '\"')
-    ensembl = pd.read_csv(
-        output_dir + file_name,
-        sep='\t',
-        header=None)
-    os.remove(output_dir + file_name)
-
-    ensembl[name_location] = ensembl[name_location].str.split(
-        ' \[').str[0].tolist()
-    ensembl = ensembl[ensembl[reactome_location].str.contains(species_id)]
-    ensembl_name_dictionary = pd.Series(
-        ensembl[name_location].values,
-        index=ensembl[id_location]).to_dict()
+    print('Loading Ensembl synonym database...')
+    ensembl_name_dictionary = load_reactome_partition(
+        url=url,
+        file_name=file_name,
+        species_id=species_id,
+        output_dir=output_dir,
+        reactome_location=reactome_location,
+        name_location=name_location,
+        id_location=id_location)
 
     return ensembl_name_dictionary
 
@@ -233,20 +256,15 @@ def parse_uniprot_synonyms(
     """Retrieve UniProt protein entity synonyms
     """
 
-    print('Downloading UniProt synonym database...', '\n\t', url)
-    os.system('curl -kL ' + url + ' -o "' + output_dir + file_name + '"')
-    uniprot = pd.read_csv(
-        output_dir + file_name,
-        sep='\t',
-        header=None)
-    os.remove(output_dir + file_name)
-
-    uniprot[name_location] = uniprot[name_location].str.split(
-        ' \[').str[0].tolist()
-    uniprot = uniprot[uniprot[reactome_location].str.contains(species_id)]
-    uniprot_name_dictionary = pd.Series(
-        uniprot[name_location].values,
-        index=uniprot[id_location]).to_dict()
+    print('Loading UniProt synonym database...')
+    uniprot_name_dictionary = load_reactome_partition(
+        url=url,
+        file_name=file_name,
+        species_id=species_id,
+        output_dir=output_dir,
+        reactome_location=reactome_location,
+        name_location=name_location,
+        id_location=id_location)
 
     return uniprot_name_dictionary
 
@@ -328,12 +346,30 @@ def reference_complex_species(
 
     new_dict = {}
     for k, v in reference.items():
-        if reference[k]['complex_id'] in list(name_database.keys()):
+        if reference[k]['complex_id'] in name_database:
             new_dict[name_database[reference[k]['complex_id']]] = reference[k]
 
     return new_dict
 
 
+def fetch_supplement_table(
+        output_dir,
+        url='https://reactome.org/download/current/ChEBI2Reactome_PE_All_Levels.txt',
+        file_name='ChEBI2Reactome_PE_All_Levels.txt'):
+    """Download the ChEBI to Reactome physical entity table
+    """
+
+    print('Downloading ChEBI synonym database...', '\n\t', url)
+    os.system('curl -kL ' + url + ' -o "' + output_dir + file_name + '"')
+    chebi = pd.read_csv(
+        output_dir + file_name,
+        sep='\t',
+        header=None)
+    os.remove(output_dir + file_name)
+
+    return chebi
+
+
 def supplement_components(
         species_database,
         name_database,
@@ -345,17 +381,21 @@ def supplement_components(
         file_name='ChEBI2Reactome_PE_All_Levels.txt',
         name_string=2,
         id_string=1,
-        source_string=3):
-    """
+        source_string=3,
+        table=None):
+    """Add ChEBI physical entities missing from the reaction files to the
+    species, name, and components databases
+
+    Pass a table from fetch_supplement_table() to skip the download
     """
 
-    print('Downloading ChEBI synonym database...', '\n\t', url)
-    os.system('curl -kL ' + url + ' -o "' + output_dir + file_name + '"')
-    chebi = pd.read_csv(
-        output_dir + file_name,
-        sep='\t',
-        header=None)
-    os.remove(output_dir + file_name)
+    if table is None:
+        chebi = fetch_supplement_table(
+            output_dir=output_dir,
+            url=url,
+            file_name=file_name)
+    else:
+        chebi = table
 
     chebi = chebi.loc[chebi[source_string].str.contains(species_id)]
     reversed_compartments = {v:k for k, v in compartment_dictionary.items()}
@@ -413,6 +453,16 @@ def get_reactome_version():
     return current_version
 
 
+def find_reactome_version():
+    """Get the current Reactome release, or None if it cannot be looked up
+    """
+
+    try:
+        return get_reactome_version()
+    except Exception:
+        return None
+
+
 def add_genes(
         name_database,
         ensembl_reference):
@@ -425,6 +475,53 @@ def add_genes(
     return name_database
 
 
+def get_checkpoint_key(
+        args_dict):
+    """Settings a curation checkpoint must match to be reused
+    - Reactome curations also record the current Reactome release, which is
+    None if it cannot be looked up
+    """
+
+    key = {
+        'metaboverse-curate_version': get_metaboverse_cli_version(),
+        'organism_id': args_dict['organism_id'],
+        'database_source': args_dict['database_source'].lower(),
+        'organism_curation_file': args_dict['organism_curation_file']}
+
+    # Reactome curations download their sources, other sources are files
+    curation_file = str(args_dict['organism_curation_file'])
+    if key['database_source'] == 'reactome':
+        key['reactome_version'] = find_reactome_version()
+    elif os.path.isfile(curation_file):
+        key['organism_curation_stamp'] = [
+            os.path.getsize(curation_file),
+            os.path.getmtime(curation_file)]
+
+    return key
+
+
+def get_curation_provenance(
+        args_dict):
+    """Inputs and settings a curated database depends on
+    - Reactome sources are downloaded rather than read from files, so the
+    current Reactome release is recorded in place of an input hash
+    - The release is None if it cannot be looked up
+    """
+
+    inputs = {}
+    settings = {
+        'organism_id': args_dict['organism_id'],
+        'database_source': args_dict['database_source'].lower()}
+    if settings['database_source'] != 'reactome':
+        inputs['organism_curation_file'] = args_dict['organism_curation_file']
+    else:
+        settings['reactome_version'] = find_reactome_version()
+
+    return make_provenance(
+        inputs=inputs,
+        settings=settings)
+
+
 def __main__(
         args_dict):
     """Curate database
@@ -437,31 +534,90 @@ def __main__(
             + '.mvdb'
     args_dict['network'] = args_dict['organism_curation_file']
 
-    # Load reactions
-    print('Curating reaction network database. Please be patient, this will take several minutes...')
-    print('Loading reactions...')
-    args_dict, pathway_database, reaction_database, species_database, \
-    name_database, compartment_dictionary, components_database = load_reactions(
+    # Return a database curated before from the same inputs and settings
+    provenance = get_curation_provenance(args_dict)
+    # An unknown Reactome release cannot show the database is current
+    release_known = 'reactome_version' not in provenance['settings'] \
+        or provenance['settings']['reactome_version'] != None
+    if args_dict['cmd'] == 'curate' \
+            and reuse_outputs(args_dict) \
+            and release_known:
+        # Models are written under their own ID, not the one passed in
+        curation_file = os.path.join(
+            args_dict['output'],
+            get_model_id(
+                species_id=args_dict['organism_id'],
+                database_source=args_dict['database_source'],
+                sbml_url=args_dict['organism_curation_file']) + '.mvdb')
+        found, manifest = read_provenance(
+            output_file=curation_file,
+            provenance=provenance)
+        if found == True:
+            print('Metaboverse database is up to date: ' + curation_file)
+            for key, value in manifest['arguments'].items():
+                args_dict[key] = value
+                if key in MODEL_ARGUMENTS and 'session_data' in args_dict:
+                    update_session(
+                        session_file=args_dict['session_data'],
+                        key=key,
+                        value=value)
+            progress_feed(args_dict, "graph", 50)
+            return args_dict
+
+    source = args_dict['database_source'].lower()
+    checkpoint_dir = get_checkpoint_directory(args_dict['output'])
+    checkpoint_key = get_checkpoint_key(args_dict)
+
+    # Stages run as soon as their dependencies are met, so downloads overlap
+    # with each other and with reaction parsing
+    def load_reactions_stage(results):
+        print('Loading reactions...')
+        output = load_reactions(
             species_id=args_dict['organism_id'],
             output_dir=args_dict['output'],
             database_source=args_dict['database_source'],
             sbml_url=args_dict['organism_curation_file'],
             args_dict=args_dict)
+        model_arguments = {
+            x: output[0][x] for x in MODEL_ARGUMENTS if x in output[0]}
+        return (model_arguments,) + output[1:]
+
+    def restore_reactions(output):
+        for key, value in output[0].items():
+            args_dict[key] = value
+            if 'session_data' in args_dict:
+                update_session(
+                    session_file=args_dict['session_data'],
+                    key=key,
+                    value=value)
+
+    def supplement_table_stage(results):
+        return fetch_supplement_table(
+            output_dir=args_dict['output'])
 
-    species_database, name_database, components_database = supplement_components(
-        species_database=species_database,
-        name_database=name_database,
-        components_database=components_database,
-        compartment_dictionary=compartment_dictionary,
-        species_id=args_dict['organism_id'],
-        output_dir=args_dict['output'])
-
-    print('Parsing ChEBI database...')
-    chebi_mapper, chebi_synonyms, uniprot_metabolites = parse_chebi_synonyms(
-        output_dir=args_dict['output'])
-    progress_feed(args_dict, "graph", 5)
+    def supplement_stage(results):
+        # organism_id may be updated from the model during reaction loading
+        _, pathway_database, reaction_database, species_database, \
+        name_database, compartment_dictionary, \
+        components_database = results['reactions']
+        species_database, name_database, components_database = supplement_components(
+            species_database=species_database,
+            name_database=name_database,
+            components_database=components_database,
+            compartment_dictionary=compartment_dictionary,
+            species_id=args_dict['organism_id'],
+            output_dir=args_dict['output'],
+            table=results['supplement_table'])
+        return species_database, name_database, components_database
 
-    if args_dict['database_source'].lower() == 'reactome':
+    def chebi_stage(results):
+        print('Parsing ChEBI database...')
+        output = parse_chebi_synonyms(
+            output_dir=args_dict['output'])
+        progress_feed(args_dict, "graph", 5)
+        return output
+
+    def complexes_stage(results):
         print('Loading complex database...')
         complexes_reference = load_complexes(
             output_dir=args_dict['output'])
@@ -471,32 +627,142 @@ def __main__(
         complexes_reference['complex_dictionary'] = parse_complexes(
             complexes_reference)
         progress_feed(args_dict, "graph", 1)
+        return complexes_reference
 
+    def complex_species_stage(results):
         print('Finalizing complex database...')
+        complexes_reference = results['complexes']
         complexes_reference['complex_dictionary'] = reference_complex_species(
             reference=complexes_reference['complex_dictionary'],
-            name_database=name_database)
+            name_database=results['supplement'][1])
         progress_feed(args_dict, "graph", 1)
+        return complexes_reference
 
+    def ensembl_stage(results):
         print('Parsing Ensembl database...')
-        ensembl_reference = parse_ensembl_synonyms(
+        output = parse_ensembl_synonyms(
             output_dir=args_dict['output'],
             species_id=args_dict['organism_id'])
         progress_feed(args_dict, "graph", 7)
+        return output
 
+    def genes_stage(results):
         print('Adding gene IDs to name database...')
         name_database = add_genes(
-            name_database=name_database,
-            ensembl_reference=ensembl_reference)
+            name_database=results['supplement'][1],
+            ensembl_reference=results['ensembl'])
         progress_feed(args_dict, "graph", 1)
+        return name_database
 
+    def uniprot_stage(results):
         print('Parsing UniProt database...')
-        uniprot_reference = parse_uniprot_synonyms(
+        output = parse_uniprot_synonyms(
             output_dir=args_dict['output'],
             species_id=args_dict['organism_id'])
         progress_feed(args_dict, "graph", 3)
+        return output
+
+    def version_stage(results):
+        return str(get_reactome_version() + ' (Reactome)')
+
+    stages = {
+        'reactions': {
+            'function': load_reactions_stage,
+            'depends': []},
+        'supplement_table': {
+            'function': supplement_table_stage,
+            'depends': []},
+        'supplement': {
+            'function': supplement_stage,
+            'depends': ['reactions', 'supplement_table']},
+        'chebi': {
+            'function': chebi_stage,
+            'depends': []}}
+    if source == 'reactome':
+        stages['complexes'] = {
+            'function': complexes_stage,
+            'depends': []}
+        stages['complex_species'] = {
+            'function': complex_species_stage,
+            'depends': ['complexes', 'supplement']}
+        stages['ensembl'] = {
+            'function': ensembl_stage,
+            'depends': []}
+        stages['genes'] = {
+            'function': genes_stage,
+            'depends': ['ensembl', 'complex_species']}
+        stages['uniprot'] = {
+            'function': uniprot_stage,
+            'depends': []}
+        stages['version'] = {
+            'function': version_stage,
+            'depends': []}
+
+    required = ['reactions', 'supplement', 'chebi']
+    if source == 'reactome':
+        required += [
+            'complex_species', 'genes', 'ensembl', 'uniprot', 'version']
+
+    # Reuse stage outputs from an earlier run with the same settings
+    restored = {}
+    resume = 'resume' in args_dict and args_dict['resume'] == True
+    if resume == True \
+            and 'reactome_version' in checkpoint_key \
+            and checkpoint_key['reactome_version'] == None:
+        # Checkpoints may come from an older release
+        print('Unable to find the current Reactome release, not resuming from checkpoints...')
+        resume = False
+    if resume == True:
+        for name in stages.keys():
+            found, data = read_checkpoint(
+                checkpoint_dir=checkpoint_dir,
+                stage=name,
+                key=checkpoint_key)
+            if found:
+                print('Resuming curation stage from checkpoint: ' + name)
+                restored[name] = data
+        if 'reactions' in restored:
+            restore_reactions(restored['reactions'])
+    stages = prune_stages(
+        stages=stages,
+        required=required,
+        completed=restored.keys())
+
+    def checkpoint_stage(name, function):
+        def stage(results):
+            if name in restored:
+                return restored[name]
+            output = function(results)
+            # Raw download tables are only kept within a run
+            if name != 'supplement_table':
+                write_checkpoint(
+                    checkpoint_dir=checkpoint_dir,
+                    stage=name,
+                    key=checkpoint_key,
+                    data=output)
+            return output
+        return stage
+
+    for name in stages.keys():
+        stages[name]['function'] = checkpoint_stage(
+            name, stages[name]['function'])
 
-        database_version = str(get_reactome_version() + ' (Reactome)')
+    print('Curating reaction network database. Please be patient, this will take several minutes...')
+    results = run_stages(stages)
+
+    model_arguments, pathway_database, reaction_database, _, _, \
+    compartment_dictionary, _ = results['reactions']
+    for key, value in model_arguments.items():
+        args_dict[key] = value
+    species_database, name_database, components_database = results['supplement']
+    chebi_mapper, chebi_synonyms, uniprot_metabolites = results['chebi']
+
+    if source == 'reactome':
+        complexes_reference = results['complex_species']
+        name_database = results['genes']
+        ensembl_reference = results['ensembl']
+        uniprot_reference = results['uniprot']
+        database_version = results['version']
         _species_id = args_dict['organism_id']
 
     else:
@@ -536,6 +802,14 @@ def __main__(
             output=args_dict['output'],
             file=args_dict['curation'],
             database=metaboverse_db)
+        write_provenance(
+            output_file=os.path.join(
+                args_dict['output'],
+                args_dict['curation']),
+            provenance=provenance,
+            arguments={
+                x: args_dict[x] for x in MODEL_ARGUMENTS + ['curation']
+                if x in args_dict})
     elif args_dict['cmd'] == 'electrum':
         args_dict['curation'] = _species_id + '.eldb'
         write_database_json(
@@ -544,6 +818,7 @@ def __main__(
             database=metaboverse_db)
     else:
         raise Exception('Unable to output database file.')
+    remove_checkpoints(checkpoint_dir)
     progress_feed(args_dict, "graph", 5)
     print('Metaboverse database curation complete.')
 
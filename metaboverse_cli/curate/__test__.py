@@ -32,6 +32,7 @@ import importlib.util
 import xml.etree.ElementTree as et
 import pandas as pd
 from shutil import copyfile
+import shutil
 import pickle
 import os
 
@@ -72,6 +73,17 @@ spec = importlib.util.spec_from_file_location(
 load_reactions_db = importlib.util.module_from_spec(spec)
 spec.loader.exec_module(load_reactions_db)
 
+spec = importlib.util.spec_from_file_location(
+    "", os.path.abspath("./metaboverse_cli/curate/utils.py"))
+curate_utils = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(curate_utils)
+
+spec = importlib.util.spec_from_file_location(
+    "", os.path.abspath("./metaboverse_cli/utils.py"))
+utils = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(utils)
+run_forked = utils.run_forked
+
 # test __main__() -- functional test
 args_dict = {
     'organism_id': 'SCE',
@@ -203,6 +215,156 @@ table = get_table.get_table(
 assert 'Homo sapiens' in table['7'].tolist(), 'Problem getting table download'
 os.remove(args_dict['output'] + test_file)
 
+# partition_reactome_table()
+mapping_table = pd.DataFrame([
+    ['ENSG01', 'R-HSA-0001', 'GENE1 [cytosol]', 'R-HSA-1001'],
+    ['ENSG02', 'R-HSA-0002', 'GENE2 [nucleoplasm]', 'R-HSA-1002'],
+    ['ENSMUSG01', 'R-MMU-0001', 'Gene1 [cytosol]', 'R-MMU-1001'],
+    ['ENSG01', 'R-HSA-0003', 'GENE1B [cytosol]', 'R-HSA-1003']])
+partitions = curate_utils.partition_reactome_table(mapping_table)
+assert sorted(partitions.keys()) == ['HSA', 'MMU'], 'partition_reactome_table() failed'
+assert partitions['HSA'] == {
+    'ENSG01': 'GENE1B',
+    'ENSG02': 'GENE2'}, 'partition_reactome_table() failed'
+assert partitions['MMU'] == {'ENSMUSG01': 'Gene1'}, 'partition_reactome_table() failed'
+
+# run_stages()
+stage_order = []
+
+
+def record_stage(name, value):
+    def stage(results):
+        stage_order.append(name)
+        return value + sum([results[x] for x in results])
+    return stage
+
+
+stage_results = curate_utils.run_stages({
+    'a': {'function': record_stage('a', 1), 'depends': []},
+    'b': {'function': record_stage('b', 10), 'depends': ['a']},
+    'c': {'function': record_stage('c', 100), 'depends': ['a', 'b']}})
+assert stage_order == ['a', 'b', 'c'], 'run_stages() failed'
+assert stage_results == {'a': 1, 'b': 11, 'c': 112}, 'run_stages() failed'
+try:
+    curate_utils.run_stages({
+        'a': {'function': record_stage('a', 1), 'depends': ['b']},
+        'b': {'function': record_stage('b', 1), 'depends': ['a']}})
+    raise AssertionError('run_stages() failed')
+except AssertionError:
+    raise
+except Exception:
+    pass
+
+# prune_stages()
+stages = {
+    'download': {'function': None, 'depends': []},
+    'parse': {'function': None, 'depends': ['download']},
+    'other': {'function': None, 'depends': []}}
+pruned = curate_utils.prune_stages(
+    stages=stages,
+    required=['parse', 'other'],
+    completed=['parse'])
+assert sorted(pruned.keys()) == ['other', 'parse'], 'prune_stages() failed'
+assert pruned['parse']['depends'] == [], 'prune_stages() failed'
+pruned = curate_utils.prune_stages(
+    stages=stages,
+    required=['parse'],
+    completed=[])
+assert sorted(pruned.keys()) == ['download', 'parse'], 'prune_stages() failed'
+
+# write_checkpoint() / read_checkpoint()
+checkpoint_dir = curate_utils.get_checkpoint_directory(args_dict['output'])
+curate_utils.write_checkpoint(
+    checkpoint_dir=checkpoint_dir,
+    stage='chebi',
+    key={'organism_id': 'HSA'},
+    data={'CHEBI:15377': 'water'})
+assert curate_utils.read_checkpoint(
+    checkpoint_dir=checkpoint_dir,
+    stage='chebi',
+    key={'organism_id': 'HSA'}) == (True, {'CHEBI:15377': 'water'}), 'read_checkpoint() failed'
+assert curate_utils.read_checkpoint(
+    checkpoint_dir=checkpoint_dir,
+    stage='chebi',
+    key={'organism_id': 'MMU'}) == (False, None), 'read_checkpoint() failed'
+curate_utils.remove_checkpoints(checkpoint_dir)
+assert os.path.exists(checkpoint_dir) == False, 'remove_checkpoints() failed'
+
+# load_reactome_partition()
+mapping_file = args_dict['output'] + 'test_PE_All_Levels.txt'
+mapping_table.to_csv(mapping_file, sep='\t', header=False, index=False)
+for x in range(2):
+    hsa_partition = curate_utils.load_reactome_partition(
+        url='file://' + mapping_file,
+        file_name='test_PE_All_Levels.txt',
+        species_id='HSA',
+        output_dir=args_dict['output'])
+    assert hsa_partition == partitions['HSA'], 'load_reactome_partition() failed'
+assert curate_utils.load_reactome_partition(
+    url='file://' + mapping_file,
+    file_name='test_PE_All_Levels.txt',
+    species_id='SCE',
+    output_dir=args_dict['output']) == {}, 'load_reactome_partition() failed'
+
+# install_cache_directory()
+cache_dir = curate_utils.get_cache_directory(args_dict['output']) \
+    + 'test_PE_All_Levels' + os.path.sep
+index_file = cache_dir + 'index.pickle'
+with open(index_file, 'rb') as f:
+    index = pickle.load(f)
+index['url'] = 'file://stale'
+with open(index_file, 'wb') as f:
+    pickle.dump(index, f)
+def rebuild_partition(species_id):
+    return curate_utils.load_reactome_partition(
+        url='file://' + mapping_file,
+        file_name='test_PE_All_Levels.txt',
+        species_id=species_id,
+        output_dir=args_dict['output'])
+assert run_forked(rebuild_partition, [('HSA',), ('HSA',), ('HSA',)], 3) \
+    == [partitions['HSA']] * 3, 'load_reactome_partition() failed'
+assert sorted(os.listdir(args_dict['output'] + 'reactome_cache')) \
+    == ['test_PE_All_Levels'], 'install_cache_directory() failed'
+assert rebuild_partition('HSA') == partitions['HSA'], \
+    'install_cache_directory() failed'
+os.remove(mapping_file)
+shutil.rmtree(args_dict['output'] + 'reactome_cache')
+
+# get_curation_provenance()
+get_reactome_version = curate.get_reactome_version
+curate.get_reactome_version = lambda: '90'
+provenance = curate.get_curation_provenance({
+    'organism_id': 'HSA',
+    'database_source': 'Reactome',
+    'organism_curation_file': 'None'})
+assert provenance['settings']['reactome_version'] == '90', \
+    'get_curation_provenance() failed'
+assert provenance['inputs'] == {}, 'get_curation_provenance() failed'
+curate.get_reactome_version = lambda: '91'
+assert curate.get_curation_provenance({
+    'organism_id': 'HSA',
+    'database_source': 'Reactome',
+    'organism_curation_file': 'None'}) != provenance, \
+    'get_curation_provenance() failed'
+
+# get_checkpoint_key()
+curate.get_reactome_version = lambda: '90'
+checkpoint_key = curate.get_checkpoint_key({
+    'organism_id': 'HSA',
+    'database_source': 'Reactome',
+    'organism_curation_file': 'None'})
+assert checkpoint_key['reactome_version'] == '90', \
+    'get_checkpoint_key() failed'
+def offline():
+    raise Exception('offline')
+curate.get_reactome_version = offline
+assert curate.get_checkpoint_key({
+    'organism_id': 'HSA',
+    'database_source': 'Reactome',
+    'organism_curation_file': 'None'})['reactome_version'] == None, \
+    'get_checkpoint_key() failed'
+curate.get_reactome_version = get_reactome_version
+
 # parse_table()
 
 
@@ -236,6 +398,34 @@ ref_dict = curate.parse_table(
     key='this_one')
 assert run_checks(ref_dict) == True, 'Problem parsing Reactome table'
 
+# parse_complexes()
+complex_reference = {
+    'complex_participants': pd.DataFrame([
+        ['R-HSA-1', 'complex_1 [cytosol]', 'uniprot:P1|chebi:15377|uniprot:P2', '-'],
+        ['R-HSA-2', 'complex_2 [nucleoplasm]', 'ensembl:ENSG01', 'R-HSA-1']],
+        columns=['identifier', 'name', 'participants', 'participatingComplex']),
+    'complex_pathway': pd.DataFrame([
+        ['R-HSA-1', 'R-HSA-100', 'R-HSA-1000']],
+        columns=['complex', 'pathway', 'top_level_pathway'])}
+complex_dictionary = curate.parse_complexes(complex_reference)
+assert complex_dictionary['R-HSA-1']['participants']['uniprot'] == [
+    'P1', 'P2'], 'parse_complexes() failed'
+assert complex_dictionary['R-HSA-1']['participants']['chebi'] == [
+    '15377'], 'parse_complexes() failed'
+assert complex_dictionary['R-HSA-1']['participating_complex'] == None, 'parse_complexes() failed'
+assert complex_dictionary['R-HSA-1']['top_level_pathway'] == 'R-HSA-1000', 'parse_complexes() failed'
+assert complex_dictionary['R-HSA-2']['participants']['ensembl'] == [
+    'ENSG01'], 'parse_complexes() failed'
+assert complex_dictionary['R-HSA-2']['participants']['ncbi'] == [], 'parse_complexes() failed'
+assert complex_dictionary['R-HSA-2']['compartment'] == 'nucleoplasm', 'parse_complexes() failed'
+assert 'pathway' not in complex_dictionary['R-HSA-2'], 'parse_complexes() failed'
+
+# reference_complex_species()
+complex_dictionary = curate.reference_complex_species(
+    reference=complex_dictionary,
+    name_database={'R-HSA-1': 'species_1'})
+assert list(complex_dictionary.keys()) == ['species_1'], 'reference_complex_species() failed'
+
 # Test unpacking of a reaction file
 species_id = 'HSA'
 path = args_dict['output']
@@ -388,6 +578,33 @@ assert name_database['L-Proline'] == 'M_pro__L_e', "BioModels/BiGG database cura
 assert compartment_dictionary['c'] == 'cytosol', "BioModels/BiGG database curation failed"
 assert components_database['M_pro__L_e']['is'] == 'D00035', "BioModels/BiGG database curation failed"
 
+# stream_manual() matches process_manual()
+sbml_url = os.path.abspath(os.path.join(
+    ".", "metaboverse_cli", "curate", "test", "iIS312.xml"))
+tree_output = load_reactions_db.process_manual(
+    sbml_db=load_reactions_db.load_sbml(sbml_url),
+    args_dict=args_dict)
+stream_output = load_reactions_db.stream_manual(
+    sbml_url=sbml_url,
+    args_dict=args_dict)
+assert tree_output[1:] == stream_output[1:], "stream_manual() failed"
+
+# get_model_id() names a model as curation does
+assert load_reactions_db.get_model_id(
+    species_id='find',
+    database_source='biomodels/bigg',
+    sbml_url=sbml_url) == stream_output[0]['organism_id'], \
+    "get_model_id() failed"
+assert load_reactions_db.get_model_id(
+    species_id='find',
+    database_source='custom',
+    sbml_url=os.path.join('models', 'test_model.json')) == 'test_model', \
+    "get_model_id() failed"
+assert load_reactions_db.get_model_id(
+    species_id='HSA',
+    database_source='reactome',
+    sbml_url='None') == 'HSA', "get_model_id() failed"
+
 os.remove(dst)
 
 
@@ -306,20 +306,35 @@ def add_names(
         for _rank in rank.iter(str(rdf_namespace + 'li')):
 
             item = _rank.attrib[str(rdf_namespace + 'resource')]
-            _id = item.split('/')[-1]
-            if 'chebi' in item.lower():
-                _id = check_chebi(item=_id)
-                _id = _id.split(' ')[0]
-            name_database[_id] = specie
-            name_database[specie] = specie
-
-            # If element has parentheses, remove what's in between as
-            # additional key
-            if '(' in _id and ')' in _id:
-                name_database = add_alternative_names(
-                    name_database=name_database,
-                    item=_id,
-                    specie=specie)
+            name_database = add_name_item(
+                name_database=name_database,
+                item=item,
+                specie=specie)
+
+    return name_database
+
+
+def add_name_item(
+        name_database,
+        item,
+        specie):
+    """Add a single annotation resource to dictionary to map species ID
+    """
+
+    _id = item.split('/')[-1]
+    if 'chebi' in item.lower():
+        _id = check_chebi(item=_id)
+        _id = _id.split(' ')[0]
+    name_database[_id] = specie
+    name_database[specie] = specie
+
+    # If element has parentheses, remove what's in between as
+    # additional key
+    if '(' in _id and ')' in _id:
+        name_database = add_alternative_names(
+            name_database=name_database,
+            item=_id,
+            specie=specie)
 
     return name_database
 
@@ -677,25 +692,36 @@ def update_model_metadata(
     """Get model metadata and update session info
     """
 
+    return update_model_attributes(
+        attributes=sbml_db[0].attrib,
+        args_dict=args_dict)
+
+
+def update_model_attributes(
+        attributes,
+        args_dict):
+    """Update session info from the attributes of an SBML model element
+    """
+
     session_file = args_dict['session_data']
     update_session(
         session_file=session_file,
         key='organism_id',
-        value=sbml_db[0].attrib['id'])
-    args_dict['organism_id'] = sbml_db[0].attrib['id']
+        value=attributes['id'])
+    args_dict['organism_id'] = attributes['id']
 
-    if 'name' in sbml_db[0].attrib:
+    if 'name' in attributes:
         update_session(
             session_file=session_file,
             key='organism',
-            value=sbml_db[0].attrib['name'])
+            value=attributes['name'])
     else:
         update_session(
             session_file=session_file,
             key='organism',
             value='unknown')
-    if 'metaid' in sbml_db[0].attrib:
-        _ver = sbml_db[0].attrib['metaid'] + ' (' + args_dict['database_source'] + ')'
+    if 'metaid' in attributes:
+        _ver = attributes['metaid'] + ' (' + args_dict['database_source'] + ')'
         update_session(
             session_file=session_file,
             key='database_version',
@@ -711,10 +737,180 @@ def update_model_metadata(
     return args_dict
 
 
+def add_manual_species(
+        child,
+        species_database,
+        name_database,
+        compartment_database,
+        components_database,
+        sbml_namespace):
+    """Add an SBML species element to the network databases
+
+    The element's annotation is walked once for all qualifiers
+    """
+
+    specie = child.attrib['id']
+    if 'name' in child.attrib:
+        name = child.attrib['name']
+    else:
+        name = specie
+    if 'sboTerm' in child.attrib:
+        sboTerm = child.attrib['sboTerm']
+    else:
+        sboTerm = ''
+    compartment = child.attrib['compartment']
+
+    species_database[specie] = name
+    compartment_database[specie] = compartment
+    name_database[name] = specie
+    components_database[specie] = {
+        'id': specie,
+        'reactome_id': sboTerm,
+        'name': name,
+        'is': specie,
+        'isEncodedBy': '',
+        'hasPart': [],
+        'type': '',
+        'compartment': compartment
+    }
+
+    is_tag = str(bqbiol_namespace + 'is')
+    has_part_tag = str(bqbiol_namespace + 'hasPart')
+    encoded_tag = str(bqbiol_namespace + 'isEncodedBy')
+    li_tag = str(rdf_namespace + 'li')
+    resource_tag = str(rdf_namespace + 'resource')
+
+    is_items = []
+    has_part = False
+    for rank in child.iter():
+        if rank.tag == is_tag:
+            for _rank in rank.iter(li_tag):
+                item = _rank.attrib[resource_tag]
+                is_items.append(item)
+                if 'reactome' not in item.lower():
+                    if 'chebi' in item.lower() \
+                            or 'kegg' in item.lower() \
+                            or 'hmdb' in item.lower() \
+                            or 'bigg' in item.lower():
+                        _id = item.split('/')[-1]
+                        components_database[specie]['is'] = _id
+                        components_database[specie]['type'] = 'metabolite_component'
+                    elif 'uniprot' in item.lower():
+                        _id = item.split('/')[-1]
+                        components_database[specie]['is'] = _id
+                        components_database[specie]['type'] = 'protein_component'
+                    else:
+                        components_database[specie]['type'] = 'other'
+                else:
+                    r_id = item.split('/')[-1]
+                    components_database[specie]['reactome_id'] = r_id
+
+        elif rank.tag == has_part_tag:
+            for _rank in rank.iter(li_tag):
+                item = _rank.attrib[resource_tag]
+                if 'reactome' not in item:
+                    has_part = True
+                    if 'chebi' in item.lower() \
+                            or 'kegg' in item.lower() \
+                            or 'hmdb' in item.lower() \
+                            or 'bigg' in item.lower():
+                        _id = item.split('/')[-1]
+                        components_database[specie]['hasPart'].append(
+                            _id)
+                    elif 'uniprot' in item.lower():
+                        _id = item.split('/')[-1]
+                        components_database[specie]['hasPart'].append(
+                            _id)
+                    elif 'mirbase' in item.lower():
+                        _id = item.split('acc=')[1]
+                        components_database[specie]['hasPart'].append(
+                            _id)
+                    else:
+                        pass
+
+        elif rank.tag == encoded_tag:
+            for _rank in rank.iter(li_tag):
+                item = _rank.attrib[resource_tag]
+                if 'reactome' not in item:
+                    if 'kegg.genes' in item.lower():
+                        _id = item.split('/')[-1]
+                        _id_ = _id.split(':')[-1]
+                        components_database[specie]['isEncodedBy'] = _id_
+                    else:
+                        _id = item.split('/')[-1]
+                        components_database[specie]['isEncodedBy'] = _id
+
+    # hasPart takes precedence over the type given by "is"
+    if has_part:
+        components_database[specie]['type'] = 'complex_component'
+
+    # Add source ID
+    for item in is_items:
+        name_database = add_name_item(
+            name_database=name_database,
+            item=item,
+            specie=specie)
+
+    name_database = add_bigg_names(
+        name_database=name_database,
+        child=child,
+        specie=specie,
+        sbml_namespace=sbml_namespace,
+        search_string='notes')
+
+    return species_database, name_database, compartment_database, \
+        components_database
+
+
+def add_manual_reaction(
+        child,
+        pathway_database,
+        reaction_database,
+        name_database,
+        sbml_namespace):
+    """Add an SBML reaction element to the network databases
+    """
+
+    _id = child.attrib['id']
+    if 'name' in child.attrib:
+        _name = child.attrib['name']
+    else:
+        _name = _id
+    if 'reversible' in child.attrib:
+        _reversible = child.attrib['reversible']
+    else:
+        _reversible = 'false'
+
+    name_database[_name] = _id
+    pathway_database['All']['reactions'].add(_id)
+    reaction_database[_id] = {
+        'compartment': '',
+        'id': _id,
+        'name': _name,
+        'reversible': _reversible,
+        'notes': ''}
+    reaction_database[_id]['reactants'] = add_reaction_components_manual(
+        type='listOfReactants',
+        reaction=child,
+        sbml_namespace=sbml_namespace)
+    reaction_database[_id]['products'] = add_reaction_components_manual(
+        type='listOfProducts',
+        reaction=child,
+        sbml_namespace=sbml_namespace)
+    reaction_database[_id]['modifiers'] = add_reaction_components_manual(
+        type='listOfModifiers',
+        reaction=child,
+        sbml_namespace=sbml_namespace)
+
+    return pathway_database, reaction_database, name_database
+
+
 def process_manual(
         sbml_db,
         args_dict):
-    """Parse network curation elements
+    """Parse network curation elements from a parsed SBML tree
+    - Curation uses stream_manual(); this is kept only as the reference
+    that __test__.py and test/__benchmark_sbml__.py compare it against
     """
 
     sbml_namespace = get_namespace(
@@ -760,138 +956,26 @@ def process_manual(
         if x.tag == str(sbml_namespace + 'listOfSpecies'):
             for child in x:
                 if child.tag == str(sbml_namespace + 'species'):
-                    specie = child.attrib['id']
-                    if 'name' in child.attrib:
-                        name = child.attrib['name']
-                    else:
-                        name = specie
-                    if 'sboTerm' in child.attrib:
-                        sboTerm = child.attrib['sboTerm']
-                    else:
-                        sboTerm = ''
-                    compartment = child.attrib['compartment']
-
-                    species_database[specie] = name
-                    compartment_database[specie] = compartment
-                    name_database[name] = specie
-                    components_database[specie] = {
-                        'id': specie,
-                        'reactome_id': sboTerm,
-                        'name': name,
-                        'is': specie,
-                        'isEncodedBy': '',
-                        'hasPart': [],
-                        'type': '',
-                        'compartment': compartment
-                    }
-
-                    for rank in child.iter(str(bqbiol_namespace + 'is')):
-                        for _rank in rank.iter(str(rdf_namespace + 'li')):
-                            item = _rank.attrib[str(rdf_namespace + 'resource')]
-                            if 'reactome' not in item.lower():
-                                if 'chebi' in item.lower() \
-                                        or 'kegg' in item.lower() \
-                                        or 'hmdb' in item.lower() \
-                                        or 'bigg' in item.lower():
-                                    _id = item.split('/')[-1]
-                                    components_database[specie]['is'] = _id
-                                    components_database[specie]['type'] = 'metabolite_component'
-                                elif 'uniprot' in item.lower():
-                                    _id = item.split('/')[-1]
-                                    components_database[specie]['is'] = _id
-                                    components_database[specie]['type'] = 'protein_component'
-                                else:
-                                    components_database[specie]['type'] = 'other'
-                            else:
-                                r_id = item.split('/')[-1]
-                                components_database[specie]['reactome_id'] = r_id
-
-                    for rank in child.iter(str(bqbiol_namespace + 'hasPart')):
-                        for _rank in rank.iter(str(rdf_namespace + 'li')):
-                            item = _rank.attrib[str(rdf_namespace + 'resource')]
-                            if 'reactome' not in item:
-                                components_database[specie]['type'] = 'complex_component'
-                                if 'chebi' in item.lower() \
-                                        or 'kegg' in item.lower() \
-                                        or 'hmdb' in item.lower() \
-                                        or 'bigg' in item.lower():
-                                    _id = item.split('/')[-1]
-                                    components_database[specie]['hasPart'].append(
-                                        _id)
-                                elif 'uniprot' in item.lower():
-                                    _id = item.split('/')[-1]
-                                    components_database[specie]['hasPart'].append(
-                                        _id)
-                                elif 'mirbase' in item.lower():
-                                    _id = item.split('acc=')[1]
-                                    components_database[specie]['hasPart'].append(
-                                        _id)
-                                else:
-                                    pass
-
-                    for rank in child.iter(str(bqbiol_namespace + 'isEncodedBy')):
-                        for _rank in rank.iter(str(rdf_namespace + 'li')):
-                            item = _rank.attrib[str(rdf_namespace + 'resource')]
-                            if 'reactome' not in item:
-                                if 'kegg.genes' in item.lower():
-                                    _id = item.split('/')[-1]
-                                    _id_ = _id.split(':')[-1]
-                                    components_database[specie]['isEncodedBy'] = _id_
-                                else:
-                                    _id = item.split('/')[-1]
-                                    components_database[specie]['isEncodedBy'] = _id
-
-                    # Add source ID
-                    name_database = add_names(
-                        name_database=name_database,
+                    species_database, name_database, compartment_database, \
+                    components_database = add_manual_species(
                         child=child,
-                        specie=specie,
-                        search_string='is',
-                        bqbiol_namespace=bqbiol_namespace,
-                        rdf_namespace=rdf_namespace)
-
-                    name_database = add_bigg_names(
+                        species_database=species_database,
                         name_database=name_database,
-                        child=child,
-                        specie=specie,
-                        sbml_namespace=sbml_namespace,
-                        search_string='notes')
+                        compartment_database=compartment_database,
+                        components_database=components_database,
+                        sbml_namespace=sbml_namespace)
 
     # Generate reaction database
     for x in elements:
         if x.tag == str(sbml_namespace + 'listOfReactions'):
             for child in x:
                 if child.tag == str(sbml_namespace + 'reaction'):
-                    # Get metadata
-                    _id = child.attrib['id']
-                    if 'name' in child.attrib:
-                        _name = child.attrib['name']
-                    else:
-                        _name = _id
-                    if 'reversible' in child.attrib:
-                        _reversible = child.attrib['reversible']
-                    else:
-                        _reversible = 'false'
-
-                    name_database[_name] = _id
-                    pathway_database['All']['reactions'].add(_id)
-                    reaction_database[_id] = {
-                        'compartment': '',
-                        'id': _id,
-                        'name': _name,
-                        'reversible': _reversible,
-                        'notes': ''}
-                    reaction_database[_id]['reactants'] = add_reaction_components_manual(
-                        type='listOfReactants',
-                        reaction=child,
-                        sbml_namespace=sbml_namespace)
-                    reaction_database[_id]['products'] = add_reaction_components_manual(
-                        type='listOfProducts',
-                        reaction=child,
-                        sbml_namespace=sbml_namespace)
-                    reaction_database[_id]['modifiers'] = add_reaction_components_manual(
-                        type='listOfModifiers',
-                        reaction=child,
+                    pathway_database, reaction_database, \
+                    name_database = add_manual_reaction(
+                        child=child,
+                        pathway_database=pathway_database,
+                        reaction_database=reaction_database,
+                        name_database=name_database,
                         sbml_namespace=sbml_namespace)
 
     return (args_dict, pathway_database, reaction_database, species_database,
@@ -899,6 +983,98 @@ def process_manual(
     components_database)
 
 
+def stream_manual(
+        sbml_url,
+        args_dict):
+    """Parse network curation elements from an SBML file in a single
+    streaming pass
+
+    Elements are discarded once processed, so memory use does not grow with
+    the size of the model. SBML orders compartments before species and
+    species before reactions, giving the same results as process_manual()
+    """
+
+    # Initialize databases
+    pathway_database = {
+        'All': {
+            'id': 'All',
+            'reactome': 'All',
+            'name': 'All',
+            'reactions': set()
+        }
+    }
+    reaction_database = {}
+    name_database = {}
+    compartment_dictionary = {}
+    compartment_database = {}
+    species_database = {}
+    components_database = {}
+
+    sbml_namespace = ''
+    model = None
+    parent = None
+    depth = 0
+    for event, element in et.iterparse(sbml_url, events=('start', 'end')):
+
+        if event == 'start':
+            depth += 1
+            if depth == 1:
+                sbml_namespace = get_namespace(
+                    sbml_tree=element)
+            elif depth == 2 \
+                    and element.tag == str(sbml_namespace + 'model'):
+                model = element
+                # Get model information
+                args_dict = update_model_attributes(
+                    attributes=element.attrib,
+                    args_dict=args_dict)
+            elif depth == 3:
+                parent = element
+            continue
+
+        if depth == 4:
+            if parent.tag == str(sbml_namespace + 'listOfCompartments') \
+                    and element.tag == str(sbml_namespace + 'compartment'):
+                id = element.attrib['id']
+                name = element.attrib['name']
+                compartment_dictionary[id] = name
+
+            elif parent.tag == str(sbml_namespace + 'listOfSpecies') \
+                    and element.tag == str(sbml_namespace + 'species'):
+                species_database, name_database, compartment_database, \
+                components_database = add_manual_species(
+                    child=element,
+                    species_database=species_database,
+                    name_database=name_database,
+                    compartment_database=compartment_database,
+                    components_database=components_database,
+                    sbml_namespace=sbml_namespace)
+
+            elif parent.tag == str(sbml_namespace + 'listOfReactions') \
+                    and element.tag == str(sbml_namespace + 'reaction'):
+                pathway_database, reaction_database, \
+                name_database = add_manual_reaction(
+                    child=element,
+                    pathway_database=pathway_database,
+                    reaction_database=reaction_database,
+                    name_database=name_database,
+                    sbml_namespace=sbml_namespace)
+
+            parent.remove(element)
+
+        elif depth == 3 and model != None:
+            model.remove(element)
+
+        depth -= 1
+
+    if model == None:
+        raise Exception('Unable to find a model element in ' + str(sbml_url))
+
+    return (args_dict, pathway_database, reaction_database, species_database,
+    name_database, compartment_database, compartment_dictionary,
+    components_database)
+
+
 def update_model_metadata_custom(
         sbml_url,
         sbml_db,
@@ -1054,6 +1230,33 @@ def process_custom(
         components_database)
     
 
+def get_model_id(
+        species_id,
+        database_source,
+        sbml_url):
+    """Get the organism ID a model will be curated under, without loading it
+    - BioModels/BiGG models take their SBML model ID and custom models their
+    file name, as set by update_model_attributes() and
+    update_model_metadata_custom()
+    """
+
+    if database_source.lower() == 'biomodels/bigg' and sbml_url != "None":
+        sbml_namespace = None
+        for event, element in et.iterparse(sbml_url, events=('start',)):
+            if sbml_namespace == None:
+                sbml_namespace = get_namespace(
+                    sbml_tree=element)
+            elif element.tag == str(sbml_namespace + 'model'):
+                return element.attrib['id']
+        raise Exception('No model found in: ' + str(sbml_url))
+
+    elif database_source.lower() == 'custom' and sbml_url != "None":
+        return sbml_url.split(os.path.sep)[-1].split(".json")[0]
+
+    else:
+        return species_id
+
+
 def __main__(
         species_id,
         output_dir,
@@ -1092,16 +1295,12 @@ def __main__(
                 'Could not find SMBL file directory, skipping removal of this directory...')
 
     elif database_source.lower() == 'biomodels/bigg' and sbml_url != "None":
-        sbml_db = load_sbml(
-            sbml_url=sbml_url)
-        progress_feed(args_dict, "graph", 10)
-
         args_dict, pathway_database, reaction_database, species_database, \
         name_database, compartment_database, compartment_dictionary, \
-        components_database = process_manual(
-                sbml_db=sbml_db,
+        components_database = stream_manual(
+                sbml_url=sbml_url,
                 args_dict=args_dict)
-        progress_feed(args_dict, "graph", 13)
+        progress_feed(args_dict, "graph", 23)
 
     elif database_source.lower() == 'custom' and sbml_url != "None":
         sbml_db = load_custom_json(
@@ -0,0 +1,159 @@
+"""License Information
+metaboverse-cli
+Back-end CLI Tool for Curating Metabolic Networks for Metaboverse
+https://github.com/Metaboverse/metaboverse-cli/
+alias: metaboverse-cli
+
+MIT License
+
+Copyright (c) 2022 Metaboverse
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Benchmark BiGG/BioModels SBML ingestion on synthetic genome-scale models
+
+Models are generated by replicating the species and reactions of the iIS312
+test model. A scale of 20 gives ~12,000 species and ~10,000 reactions, the
+size of Recon3D; larger scales go beyond it.
+
+Run from the repository root:
+    python metaboverse_cli/curate/test/__benchmark_sbml__.py [scale ...]
+"""
+from __future__ import print_function
+import xml.etree.ElementTree as et
+import importlib.util
+import tracemalloc
+import tempfile
+import shutil
+import time
+import copy
+import sys
+import os
+
+spec = importlib.util.spec_from_file_location(
+    "", os.path.abspath("./metaboverse_cli/curate/load_reactions_db.py"))
+load_reactions_db = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(load_reactions_db)
+
+template_url = os.path.abspath(
+    "./metaboverse_cli/curate/test/iIS312.xml")
+session_url = os.path.abspath(
+    "./metaboverse_cli/curate/test/test_session_data.json")
+
+
+def make_model(
+        scale,
+        output_url):
+    """Write a synthetic model with scale copies of each species and reaction
+    """
+
+    tree = et.parse(template_url)
+    model = tree.getroot()[0]
+    namespace = load_reactions_db.get_namespace(tree.getroot())
+
+    for element in model:
+        if element.tag not in [
+                str(namespace + 'listOfSpecies'),
+                str(namespace + 'listOfReactions')]:
+            continue
+
+        originals = list(element)
+        for x in range(1, scale):
+            suffix = '_' + str(x)
+            for child in originals:
+                item = copy.deepcopy(child)
+                item.attrib['id'] = item.attrib['id'] + suffix
+                if 'name' in item.attrib:
+                    item.attrib['name'] = item.attrib['name'] + suffix
+                for reference in item.iter():
+                    if 'species' in reference.attrib:
+                        reference.attrib['species'] = \
+                            reference.attrib['species'] + suffix
+                element.append(item)
+
+    tree.write(output_url)
+
+
+def run(
+        function,
+        *args):
+    """Time a parser, then record its peak traced memory in a second run
+    """
+
+    start = time.time()
+    output = function(*args)
+    elapsed = time.time() - start
+
+    tracemalloc.start()
+    function(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return output, elapsed, peak
+
+
+def tree_parser(
+        sbml_url,
+        args_dict):
+
+    return load_reactions_db.process_manual(
+        sbml_db=load_reactions_db.load_sbml(sbml_url),
+        args_dict=args_dict)
+
+
+if __name__ == '__main__':
+
+    if len(sys.argv) > 1:
+        scales = [int(x) for x in sys.argv[1:]]
+    else:
+        scales = [1, 20, 60]
+
+    temp_dir = tempfile.mkdtemp()
+    session_copy = os.path.join(temp_dir, 'session.json')
+    shutil.copyfile(session_url, session_copy)
+
+    print('scale\tspecies\treactions\tsize_mb\tparser\tseconds\tpeak_mb')
+    for scale in scales:
+        sbml_url = os.path.join(temp_dir, 'model' + str(scale) + '.xml')
+        make_model(scale, sbml_url)
+        size = os.path.getsize(sbml_url) / 1e6
+
+        results = {}
+        for label, function in [
+                ('tree', tree_parser),
+                ('stream', load_reactions_db.stream_manual)]:
+            args_dict = {
+                'session_data': session_copy,
+                'database_source': 'biomodels/bigg'}
+            output, elapsed, peak = run(function, sbml_url, args_dict)
+            results[label] = output[1:]
+            print('\t'.join([
+                str(scale),
+                str(len(output[3])),
+                str(len(output[2])),
+                '%.1f' % size,
+                label,
+                '%.2f' % elapsed,
+                '%.1f' % (peak / 1e6)]))
+
+        assert results['tree'] == results['stream'], \
+            'Streaming parser output differs at scale ' + str(scale)
+        os.remove(sbml_url)
+
+    shutil.rmtree(temp_dir)
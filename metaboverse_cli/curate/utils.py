@@ -28,7 +28,11 @@ SOFTWARE.
 
 """
 from __future__ import print_function
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 import pandas as pd
+import requests
+import pickle
+import shutil
 import os
 
 
@@ -80,3 +84,371 @@ def unpack_table(
     os.system('curl -kL ' + url + ' -o "' + file + '"')
 
     return file
+
+
+"""Stage scheduler
+"""
+
+
+def run_stages(
+        stages,
+        max_workers=8):
+    """Run a DAG of curation stages, starting each stage as soon as the
+    stages it depends on have finished
+
+    stages: dictionary of stage name to {'function': f, 'depends': [names]},
+    where f is called with the dictionary of results gathered so far and
+    returns the result of that stage
+
+    Stages are run in threads, so download-bound stages overlap with each
+    other and with parsing. If a stage fails, no new stages are started and
+    the error is raised once running stages finish.
+    """
+
+    for name, stage in stages.items():
+        for dependency in stage['depends']:
+            if dependency not in stages:
+                raise Exception(
+                    'Stage ' + str(name) + ' depends on unknown stage '
+                    + str(dependency))
+
+    results = {}
+    remaining = dict(stages)
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while len(remaining) > 0 or len(running) > 0:
+
+            ready = [
+                name for name, stage in remaining.items()
+                if all(x in results for x in stage['depends'])]
+            for name in ready:
+                stage = remaining.pop(name)
+                running[executor.submit(stage['function'], results)] = name
+
+            if len(running) == 0:
+                raise Exception(
+                    'Unable to schedule stages with circular dependencies: '
+                    + ', '.join(remaining.keys()))
+
+            done, not_done = wait(running.keys(), return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                error = future.exception()
+                if error != None:
+                    wait(running.keys())
+                    raise error
+                results[name] = future.result()
+
+    return results
+
+
+"""Curation checkpoints
+"""
+
+
+def get_checkpoint_directory(
+        output_dir,
+        checkpoint_name='curation_checkpoints'):
+    """Get the directory holding curation stage checkpoints
+    """
+
+    return os.path.join(output_dir, checkpoint_name) + os.path.sep
+
+
+def write_checkpoint(
+        checkpoint_dir,
+        stage,
+        key,
+        data):
+    """Write the output of a curation stage along with the settings it was
+    made with
+    """
+
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    write_cache_file(
+        file=checkpoint_dir + stage + '.pickle',
+        data={
+            'key': key,
+            'data': data})
+
+
+def read_checkpoint(
+        checkpoint_dir,
+        stage,
+        key):
+    """Read the output of a curation stage
+
+    Returns (True, data) when a checkpoint exists and was made with the same
+    settings, otherwise (False, None)
+    """
+
+    checkpoint_file = checkpoint_dir + stage + '.pickle'
+    if not os.path.exists(checkpoint_file):
+        return False, None
+
+    try:
+        with open(checkpoint_file, 'rb') as cache_file:
+            checkpoint = pickle.load(cache_file)
+    except Exception:
+        print('Unable to read checkpoint, stage will be re-run: ' + stage)
+        return False, None
+
+    if checkpoint['key'] != key:
+        return False, None
+    else:
+        return True, checkpoint['data']
+
+
+def remove_checkpoints(
+        checkpoint_dir):
+    """Remove curation checkpoints once a database has been written
+    """
+
+    if os.path.exists(checkpoint_dir):
+        shutil.rmtree(checkpoint_dir, ignore_errors=True)
+
+
+def prune_stages(
+        stages,
+        required,
+        completed):
+    """Drop stages whose output is not needed
+
+    required: stages whose results are used after scheduling
+    completed: stages with a valid checkpoint; their dependencies are only
+    needed if the checkpoint is missing
+    """
+
+    needed = set()
+    pending = list(required)
+    while len(pending) > 0:
+        name = pending.pop()
+        if name in needed:
+            continue
+        needed.add(name)
+        if name not in completed:
+            pending.extend(stages[name]['depends'])
+
+    pruned = {}
+    for name, stage in stages.items():
+        if name in needed:
+            pruned[name] = {
+                'function': stage['function'],
+                'depends': [
+                    x for x in stage['depends']
+                    if x in needed and name not in completed]}
+
+    return pruned
+
+
+"""Species-partitioned cache of Reactome mapping tables
+"""
+
+
+def get_cache_directory(
+        output_dir,
+        cache_name='reactome_cache'):
+    """Get the cache directory for parsed reference tables
+
+    Set METABOVERSE_CACHE to share one cache between curations
+    """
+
+    if 'METABOVERSE_CACHE' in os.environ \
+            and os.environ['METABOVERSE_CACHE'] != '':
+        cache_dir = os.environ['METABOVERSE_CACHE']
+    else:
+        cache_dir = os.path.join(output_dir, cache_name)
+
+    return os.path.abspath(cache_dir) + os.path.sep
+
+
+def get_remote_stamp(
+        url):
+    """Get a version stamp for a remote file from its headers
+
+    Returns None when the remote cannot be reached
+    """
+
+    try:
+        response = requests.head(url, allow_redirects=True, timeout=30)
+    except Exception:
+        return None
+
+    if response.status_code != 200:
+        return None
+
+    stamp = []
+    for header in ['ETag', 'Last-Modified', 'Content-Length']:
+        if header in response.headers:
+            stamp.append(header + '=' + str(response.headers[header]))
+
+    if len(stamp) == 0:
+        return None
+    else:
+        return ';'.join(stamp)
+
+
+def partition_reactome_table(
+        table,
+        reactome_location=3,
+        name_location=2,
+        id_location=0):
+    """Split a Reactome *2Reactome_PE_All_Levels table into per-species
+    ID-to-name dictionaries, keyed by the species code of the Reactome ID
+    (R-<species>-<number>)
+    """
+
+    table = table[[id_location, name_location, reactome_location]].dropna(
+        subset=[reactome_location])
+    names = table[name_location].str.split(' \\[').str[0]
+    species = table[reactome_location].str.split('-').str[1]
+
+    partitions = {}
+    for species_code, index in species.groupby(species, sort=False).groups.items():
+        partitions[species_code] = pd.Series(
+            names.loc[index].values,
+            index=table.loc[index, id_location]).to_dict()
+
+    return partitions
+
+
+def write_cache_file(
+        file,
+        data):
+    """Write a cache file without leaving partial files behind
+    """
+
+    temp_file = file + '.' + str(os.getpid()) + '.tmp'
+    with open(temp_file, 'wb') as cache_file:
+        pickle.dump(data, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_file, file)
+
+
+def build_reactome_cache(
+        url,
+        file_name,
+        cache_dir,
+        stamp,
+        reactome_location=3,
+        name_location=2,
+        id_location=0):
+    """Download and parse a Reactome mapping table once, storing one
+    partition per species
+    """
+
+    download_file = cache_dir + file_name + '.' + str(os.getpid())
+    print('Downloading Reactome mapping table...', '\n\t', url)
+    os.system('curl -kL ' + url + ' -o "' + download_file + '"')
+    table = pd.read_csv(
+        download_file,
+        sep='\t',
+        header=None,
+        usecols=[id_location, name_location, reactome_location],
+        dtype=str)
+    os.remove(download_file)
+
+    partitions = partition_reactome_table(
+        table=table,
+        reactome_location=reactome_location,
+        name_location=name_location,
+        id_location=id_location)
+    del table
+
+    for species_code, partition in partitions.items():
+        write_cache_file(
+            file=cache_dir + species_code + '.pickle',
+            data=partition)
+    write_cache_file(
+        file=cache_dir + 'index.pickle',
+        data={
+            'stamp': stamp,
+            'url': url,
+            'species': sorted(partitions.keys())})
+
+    return partitions
+
+
+def install_cache_directory(
+        build_dir,
+        cache_dir):
+    """Move a freshly built cache directory into place
+    - The current cache is renamed aside before the new one is renamed in,
+    so readers see either a whole cache or none
+    - If another process installs its cache in between, theirs is kept
+    """
+
+    old_dir = cache_dir[:-1] + '.' + str(os.getpid()) + '.old'
+    try:
+        os.replace(cache_dir[:-1], old_dir)
+    except OSError:
+        pass
+
+    try:
+        os.replace(build_dir[:-1], cache_dir[:-1])
+    except OSError:
+        print('Keeping cache installed by another process...', '\n\t', cache_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def load_reactome_partition(
+        url,
+        file_name,
+        species_id,
+        output_dir,
+        reactome_location=3,
+        name_location=2,
+        id_location=0):
+    """Get the ID-to-name dictionary for one species from a Reactome mapping
+    table, using the species-partitioned cache where it is current
+    """
+
+    cache_dir = get_cache_directory(output_dir) \
+        + os.path.splitext(file_name)[0] + os.path.sep
+    index_file = cache_dir + 'index.pickle'
+    stamp = get_remote_stamp(url)
+
+    index = None
+    if os.path.exists(index_file):
+        try:
+            with open(index_file, 'rb') as cache_file:
+                index = pickle.load(cache_file)
+        except Exception:
+            index = None
+
+    if index != None \
+            and index['url'] == url \
+            and (stamp == None or index['stamp'] == stamp):
+        print('Using cached Reactome mapping table...', '\n\t', cache_dir)
+        partition_file = cache_dir + species_id + '.pickle'
+        if species_id not in index['species']:
+            return {}
+        try:
+            with open(partition_file, 'rb') as cache_file:
+                return pickle.load(cache_file)
+        except Exception:
+            print('Unable to read cache partition, rebuilding...')
+
+    # Build in a directory of this process's own, so other processes sharing
+    # the cache never see a partial rebuild
+    build_dir = cache_dir[:-1] + '.' + str(os.getpid()) + '.tmp' + os.path.sep
+    shutil.rmtree(build_dir, ignore_errors=True)
+    os.makedirs(build_dir)
+    try:
+        partitions = build_reactome_cache(
+            url=url,
+            file_name=file_name,
+            cache_dir=build_dir,
+            stamp=stamp,
+            reactome_location=reactome_location,
+            name_location=name_location,
+            id_location=id_location)
+        install_cache_directory(
+            build_dir=build_dir,
+            cache_dir=cache_dir)
+    finally:
+        shutil.rmtree(build_dir, ignore_errors=True)
+
+    if species_id in partitions:
+        return partitions[species_id]
+    else:
+        return {}
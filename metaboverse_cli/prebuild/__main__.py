@@ -0,0 +1,256 @@
+"""License Information
+metaboverse-cli
+Back-end CLI Tool for Curating Metabolic Networks for Metaboverse
+https://github.com/Metaboverse/metaboverse-cli/
+alias: metaboverse-cli
+
+MIT License
+
+Copyright (c) 2022 Metaboverse
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
+from __future__ import print_function
+import shutil
+import os
+
+"""Import internal dependencies
+"""
+try:
+    from curate.__main__ import __main__ as curate
+    from curate.__main__ import parse_ensembl_synonyms, parse_uniprot_synonyms
+    from analyze.__main__ import make_neighbors_dictionary
+    from analyze.model import __template__
+    from analyze.utils import remove_defective_reactions
+    from utils import read_network, run_forked, get_metaboverse_cli_version
+except:
+    import importlib.util
+    spec = importlib.util.spec_from_file_location(
+        "__main__", os.path.abspath("./metaboverse_cli/curate/__main__.py"))
+    curate = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(curate)
+    parse_ensembl_synonyms = curate.parse_ensembl_synonyms
+    parse_uniprot_synonyms = curate.parse_uniprot_synonyms
+    curate = curate.__main__
+
+    spec = importlib.util.spec_from_file_location(
+        "__main__", os.path.abspath("./metaboverse_cli/analyze/__main__.py"))
+    analyze = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(analyze)
+    make_neighbors_dictionary = analyze.make_neighbors_dictionary
+
+    spec = importlib.util.spec_from_file_location(
+        "", os.path.abspath("./metaboverse_cli/analyze/model.py"))
+    model = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(model)
+    __template__ = model.__template__
+
+    spec = importlib.util.spec_from_file_location(
+        "", os.path.abspath("./metaboverse_cli/analyze/utils.py"))
+    analyze_utils = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(analyze_utils)
+    remove_defective_reactions = analyze_utils.remove_defective_reactions
+
+    spec = importlib.util.spec_from_file_location(
+        "", os.path.abspath("./metaboverse_cli/utils.py"))
+    utils = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(utils)
+    read_network = utils.read_network
+    run_forked = utils.run_forked
+    get_metaboverse_cli_version = utils.get_metaboverse_cli_version
+
+
+CURATION_DIR='mvdb'
+TEMPLATE_DIR='mvrs'
+NEIGHBOR_DIR='nbdb'
+
+
+def get_mirror_paths(
+        output,
+        version):
+    """Get the mirror directories for a version, matching the source layout
+    """
+
+    version_dir = os.path.join(output, 'v' + str(version))
+    paths = {
+        CURATION_DIR: os.path.join(version_dir, CURATION_DIR),
+        TEMPLATE_DIR: os.path.join(version_dir, TEMPLATE_DIR),
+        NEIGHBOR_DIR: os.path.join(version_dir, NEIGHBOR_DIR)}
+
+    return paths
+
+
+def collect_artifacts(
+        work_dir,
+        organism_id,
+        paths):
+    """Move an organism's built files from its work directory into the mirror
+    """
+
+    files = {
+        CURATION_DIR: organism_id + '.mvdb',
+        TEMPLATE_DIR: organism_id + '_template.mvrs',
+        NEIGHBOR_DIR: organism_id + '.nbdb'}
+
+    collected = []
+    for folder, file in files.items():
+        source = os.path.join(work_dir, file)
+        if not os.path.exists(source):
+            raise Exception('Missing built file: ' + source)
+        os.makedirs(paths[folder], exist_ok=True)
+        destination = os.path.join(paths[folder], file)
+        shutil.move(source, destination)
+        collected.append(destination)
+
+    return collected
+
+
+def warm_reactome_cache(
+        output_dir,
+        organism_id):
+    """Build the shared Reactome mapping table caches once before forking
+    - Workers started on a cold cache would each download the tables
+    """
+
+    try:
+        parse_ensembl_synonyms(
+            output_dir=output_dir,
+            species_id=organism_id)
+        parse_uniprot_synonyms(
+            output_dir=output_dir,
+            species_id=organism_id)
+    except Exception as e:
+        # Workers fetch the tables themselves if this fails
+        print('Unable to pre-load Reactome mapping tables: ' + str(e))
+
+
+def prebuild_organism(
+        args_dict,
+        organism_id,
+        paths):
+    """Curate an organism and build its graph template and neighbors dictionary
+    """
+
+    work_dir = os.path.join(
+        args_dict['output'], 'build', organism_id) + os.path.sep
+    os.makedirs(work_dir, exist_ok=True)
+
+    organism_args = {
+        'cmd': 'curate',
+        'output': work_dir,
+        'organism_id': organism_id,
+        'organism_curation_file': 'None',
+        'database_source': 'reactome',
+        'force_new_curation': True,
+        'resume': False,
+        'output_file': os.path.join(work_dir, organism_id + '.mvrs'),
+        'labels': None,
+        'blocklist': '',
+        'workers': 1,
+        'session_data': 'None',
+        'progress_log': 'None'}
+
+    try:
+        print('Curating ' + organism_id + '...')
+        organism_args = curate(organism_args)
+        network = read_network(
+            file_path=work_dir,
+            network_url=organism_args['curation'])
+
+        print('Building ' + organism_id + ' graph template...')
+        graph = __template__(
+            args_dict=organism_args,
+            network=network,
+            species_id=organism_id,
+            output_file=organism_args['output_file'])[0]
+
+        print('Building ' + organism_id + ' neighbors dictionary...')
+        make_neighbors_dictionary(
+            args_dict=organism_args,
+            graph=graph,
+            reaction_dictionary=remove_defective_reactions(
+                network=network))
+
+        collect_artifacts(
+            work_dir=work_dir,
+            organism_id=organism_id,
+            paths=paths)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    except Exception as e:
+        return organism_id, False, str(e)
+
+    return organism_id, True, ''
+
+
+def __main__(
+        args_dict):
+    """Build source files for several organisms into a local mirror
+
+    Point curate at the mirror with --source_url to skip template and
+    neighbors dictionary builds
+    """
+
+    organisms = [
+        x.strip() for x in str(args_dict['organisms']).split(',')
+        if x.strip() != '']
+    if len(organisms) == 0:
+        raise Exception('No organisms provided to pre-build.')
+
+    paths = get_mirror_paths(
+        output=args_dict['output'],
+        version=get_metaboverse_cli_version())
+
+    # Organisms share one download cache unless the user has set their own
+    if 'METABOVERSE_CACHE' not in os.environ \
+            or os.environ['METABOVERSE_CACHE'] == '':
+        os.environ['METABOVERSE_CACHE'] = os.path.join(
+            args_dict['output'], 'cache')
+
+    if 'workers' in args_dict \
+            and args_dict['workers'] != None:
+        workers = int(args_dict['workers'])
+    else:
+        workers = 1
+
+    warm_reactome_cache(
+        output_dir=args_dict['output'],
+        organism_id=organisms[0])
+
+    results = run_forked(
+        function=prebuild_organism,
+        arguments=[(args_dict, x, paths) for x in organisms],
+        max_workers=workers)
+
+    failed = []
+    for organism_id, success, message in results:
+        if success == True:
+            print('Pre-built ' + organism_id)
+        else:
+            print('Unable to pre-build ' + organism_id + ': ' + message)
+            failed.append(organism_id)
+
+    if len(failed) > 0:
+        raise Exception('Pre-build failed for: ' + ', '.join(failed))
+
+    print('Mirror written to: ' + os.path.join(
+        args_dict['output'], 'v' + get_metaboverse_cli_version()))
+
+    return paths
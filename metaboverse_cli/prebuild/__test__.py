@@ -0,0 +1,85 @@
+"""License Information
+metaboverse-cli
+Back-end CLI Tool for Curating Metabolic Networks for Metaboverse
+https://github.com/Metaboverse/metaboverse-cli/
+alias: metaboverse-cli
+
+MIT License
+
+Copyright (c) 2022 Metaboverse
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
+from __future__ import print_function
+import importlib.util
+import tempfile
+import shutil
+import os
+
+"""prebuild/__main__.py
+"""
+print("Testing prebuild/__main__.py")
+spec = importlib.util.spec_from_file_location(
+    "__main__", os.path.abspath("./metaboverse_cli/prebuild/__main__.py"))
+prebuild = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(prebuild)
+get_mirror_paths = prebuild.get_mirror_paths
+collect_artifacts = prebuild.collect_artifacts
+
+# get_mirror_paths()
+mirror_dir = tempfile.mkdtemp()
+paths = get_mirror_paths(
+    output=mirror_dir,
+    version='1.2.3')
+assert paths == {
+    'mvdb': os.path.join(mirror_dir, 'v1.2.3', 'mvdb'),
+    'mvrs': os.path.join(mirror_dir, 'v1.2.3', 'mvrs'),
+    'nbdb': os.path.join(mirror_dir, 'v1.2.3', 'nbdb')}, \
+    'get_mirror_paths() failed'
+
+# collect_artifacts()
+work_dir = os.path.join(mirror_dir, 'build', 'HSA')
+os.makedirs(work_dir)
+for file in ['HSA.mvdb', 'HSA_template.mvrs', 'HSA.nbdb']:
+    with open(os.path.join(work_dir, file), 'w') as f:
+        f.write(file)
+collected = collect_artifacts(
+    work_dir=work_dir,
+    organism_id='HSA',
+    paths=paths)
+assert sorted(collected) == sorted([
+    os.path.join(paths['mvdb'], 'HSA.mvdb'),
+    os.path.join(paths['mvrs'], 'HSA_template.mvrs'),
+    os.path.join(paths['nbdb'], 'HSA.nbdb')]), 'collect_artifacts() failed'
+assert os.listdir(work_dir) == [], 'collect_artifacts() failed'
+with open(os.path.join(paths['mvrs'], 'HSA_template.mvrs')) as f:
+    assert f.read() == 'HSA_template.mvrs', 'collect_artifacts() failed'
+
+try:
+    collect_artifacts(
+        work_dir=work_dir,
+        organism_id='MMU',
+        paths=paths)
+    raise AssertionError('collect_artifacts() failed')
+except Exception as e:
+    assert 'Missing built file' in str(e), 'collect_artifacts() failed'
+
+shutil.rmtree(mirror_dir)
+print("Tests completed")
@@ -28,7 +28,16 @@ SOFTWARE.
 
 """
 from __future__ import print_function
+from datetime import date
+import multiprocessing
+import traceback
+import threading
+import urllib.request
+import urllib.parse
+import hashlib
+import queue
 import pickle
+import requests
 import json
 import math
 import sys
@@ -44,6 +53,9 @@ except:
     spec.loader.exec_module(init)
     __version__ = init.__version__
 
+# Guards the progress log when curation stages run in parallel
+progress_lock = threading.Lock()
+
 
 def init_mvrs_file(args_dict):
 
@@ -70,6 +82,45 @@ def get_metaboverse_cli_version():
     return __version__
 
 
+def get_source_url(
+        args_dict,
+        default_url):
+    """Get the base URL of pre-built source files
+    - Uses args_dict['source_url'] if provided, e.g. a local mirror made with
+    the prebuild sub-module; local paths are converted to file:// URLs
+    """
+
+    if 'source_url' not in args_dict \
+            or safestr(args_dict['source_url']) == 'None':
+        return default_url
+
+    url = safestr(args_dict['source_url'])
+    if '://' not in url:
+        url = urllib.parse.urljoin(
+            'file:', urllib.request.pathname2url(os.path.abspath(url)))
+    if not url.endswith('/'):
+        url = url + '/'
+
+    return url
+
+
+def get_source_status(
+        url):
+    """Get the HTTP status code of a pre-built source file
+    - file:// URLs return 200 if the file exists and 404 otherwise
+    - Raises an exception if a remote source cannot be reached
+    """
+
+    if url.startswith('file:'):
+        path = urllib.request.url2pathname(urllib.parse.urlparse(url).path)
+        if os.path.isfile(path):
+            return 200
+        else:
+            return 404
+
+    return requests.head(url).status_code
+
+
 def update_network_vars(args_dict):
     """Update internal network variables when a pre-curated file is provided
     """
@@ -241,20 +292,197 @@ def progress_feed(
                 and str(args_dict['progress_log']) != 'None':
             feed_file = args_dict['progress_log']
 
-            if os.path.exists(feed_file) and process != None:
+            with progress_lock:
+                if os.path.exists(feed_file) and process != None:
 
-                with open(feed_file) as json_file:
-                    data = json.load(json_file)
-                    data[process] += amount
-                    if data[process] >= 100:
-                        data[process] = 100
+                    with open(feed_file) as json_file:
+                        data = json.load(json_file)
+                        data[process] += amount
+                        if data[process] >= 100:
+                            data[process] = 100
 
-                with open(feed_file, 'w') as outfile:
-                    json.dump(data, outfile)
+                    with open(feed_file, 'w') as outfile:
+                        json.dump(data, outfile)
     else:
         print('Could not access local variables during progress_feed() update.')
 
 
+def hash_file(
+        file,
+        block_size=1048576):
+    """Get the SHA-256 digest of a file's contents
+    - Returns None if file is not an existing file (e.g., 'None')
+    """
+
+    if file == None or not os.path.isfile(str(file)):
+        return None
+
+    digest = hashlib.sha256()
+    with open(file, 'rb') as input_file:
+        for block in iter(lambda: input_file.read(block_size), b''):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def get_provenance_file(
+        output_file):
+    """Get the provenance manifest written alongside an output file
+    """
+
+    return str(output_file) + '.manifest.json'
+
+
+def make_provenance(
+        inputs,
+        settings):
+    """Describe what an output file is made from
+    - inputs maps names to input files, recorded by content hash; missing
+    files (e.g., 'None') are recorded as None
+    - settings must be JSON-compatible, with lists rather than tuples
+    """
+
+    return {
+        'metaboverse-cli_version': get_metaboverse_cli_version(),
+        'inputs': {k: hash_file(v) for k, v in inputs.items()},
+        'settings': settings}
+
+
+def read_provenance(
+        output_file,
+        provenance):
+    """Check whether an output file was made from the same inputs and
+    settings
+
+    Returns (True, manifest) when the output and its provenance manifest
+    exist, the manifest matches provenance, and the output still matches the
+    hash recorded for it, otherwise (False, None)
+    """
+
+    manifest_file = get_provenance_file(output_file)
+    if not os.path.isfile(str(output_file)) \
+            or not os.path.isfile(manifest_file):
+        return False, None
+
+    try:
+        with open(manifest_file) as input_file:
+            manifest = json.load(input_file)
+    except Exception:
+        print('Unable to read provenance manifest: ' + manifest_file)
+        return False, None
+
+    for key, value in provenance.items():
+        if key not in manifest or manifest[key] != value:
+            return False, None
+    if 'output' not in manifest \
+            or manifest['output'] != hash_file(output_file):
+        return False, None
+
+    return True, manifest
+
+
+def write_provenance(
+        output_file,
+        provenance,
+        arguments=None):
+    """Write the provenance manifest for an output file
+    - arguments holds values a re-run returning the existing output needs to
+    restore, and is not compared by read_provenance()
+    """
+
+    manifest = dict(provenance)
+    manifest['output'] = hash_file(output_file)
+    manifest['date'] = date.today().strftime('%Y-%m-%d')
+    if arguments != None:
+        manifest['arguments'] = arguments
+
+    manifest_file = get_provenance_file(output_file)
+    temp_file = manifest_file + '.' + str(os.getpid()) + '.tmp'
+    with open(temp_file, 'w') as output:
+        json.dump(manifest, output, indent=4)
+    os.replace(temp_file, manifest_file)
+
+
+def reuse_outputs(
+        args_dict):
+    """Check whether outputs with matching provenance can be returned as is
+    - Set by main() unless --force_new_curation is given
+    """
+
+    return 'reuse_outputs' in args_dict \
+        and args_dict['reuse_outputs'] == True
+
+
+def can_fork(
+        max_workers,
+        tasks):
+    """Check whether run_forked would use forked worker processes
+    """
+
+    return max_workers > 1 \
+        and tasks > 1 \
+        and 'fork' in multiprocessing.get_all_start_methods()
+
+
+def run_forked(
+        function,
+        arguments,
+        max_workers=1):
+    """Run a function over a list of argument tuples in forked processes
+    - Workers inherit the parent's memory, so the function and its inputs do
+    not need to be picklable; only the results are sent back
+    - Results are returned in the order of arguments
+    - Runs serially if max_workers is 1 or fork is unavailable (e.g., Windows)
+    """
+
+    if not can_fork(max_workers, len(arguments)):
+        return [function(*x) for x in arguments]
+
+    context = multiprocessing.get_context('fork')
+    results_queue = context.Queue()
+
+    def worker(position, args):
+        try:
+            results_queue.put((position, True, function(*args)))
+        except Exception:
+            results_queue.put((position, False, traceback.format_exc()))
+
+    results = [None for x in arguments]
+    processes = {}
+    position = 0
+    completed = 0
+    try:
+        while completed < len(arguments):
+            while position < len(arguments) and len(processes) < max_workers:
+                processes[position] = context.Process(
+                    target=worker,
+                    args=(position, arguments[position]))
+                processes[position].start()
+                position += 1
+
+            try:
+                x, success, output = results_queue.get(timeout=1)
+            except queue.Empty:
+                for x, process in processes.items():
+                    if process.exitcode not in [None, 0]:
+                        raise Exception(
+                            'Worker process exited with code '
+                            + str(process.exitcode))
+                continue
+
+            processes.pop(x).join()
+            if success == False:
+                raise Exception('Worker process failed:\n' + output)
+            results[x] = output
+            completed += 1
+    finally:
+        for process in processes.values():
+            process.terminate()
+            process.join()
+
+    return results
+
+
 def track_progress(
         args_dict,
         _counter,
@@ -373,6 +601,14 @@ def check_curate(
     and safestr(args_dict['graph_template_file']).split('.')[-1] == 'mvrs':
         should_exit = False
 
+    if 'batch' in args_dict \
+    and safestr(args_dict['batch']) != 'None' \
+    and safestr(args_dict['batch']) != None \
+    and not os.path.isfile(args_dict['batch']):
+        print('\nBatch manifest file not found : ' +
+              safestr(args_dict['batch']))
+        should_exit = True
+
     if should_exit == True:
         sys.exit(1)
 
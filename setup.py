@@ -65,6 +65,9 @@ setup(
         'scikit-learn',
         'networkx'
     ],
+    extras_require={
+        'columnar': ['pyarrow']
+    },
     entry_points={
         "console_scripts": [
             "metaboverse = metaboverse_cli.__main__:main"